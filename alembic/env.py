@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -26,6 +27,20 @@ target_metadata = None
 # ... etc.
 
 
+def get_url() -> str:
+    """URL базы из тех же переменных окружения, что и у сервисов"""
+    return "postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}".format(
+        user=os.environ.get("DB_USER", "user"),
+        password=os.environ.get("DB_PASSWORD", "password"),
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=os.environ.get("DB_PORT", "5432"),
+        name=os.environ.get("DB_NAME", "database"),
+    )
+
+
+config.set_main_option("sqlalchemy.url", get_url())
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -0,0 +1,375 @@
+"""Baseline schema: auth, hr and comm as they existed before migrations
+
+Revision ID: 0000
+Revises: 
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0000'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Схема создавалась вручную до появления миграций, поэтому все через IF NOT EXISTS:
+# на существующей базе ревизия ничего не меняет, на пустой - создает схему целиком
+SCHEMA_SQL = """
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE SCHEMA IF NOT EXISTS hr;
+CREATE SCHEMA IF NOT EXISTS comm;
+
+CREATE TABLE IF NOT EXISTS auth.service (
+    service_id serial PRIMARY KEY,
+    service varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.service_table (
+    service_table_id serial PRIMARY KEY,
+    service_id integer REFERENCES auth.service (service_id),
+    service_table varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.action (
+    action_id serial PRIMARY KEY,
+    action varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth."group" (
+    group_id serial PRIMARY KEY,
+    "group" varchar NOT NULL,
+    service_table_id integer REFERENCES auth.service_table (service_table_id),
+    actions integer[],
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.role (
+    role_id integer PRIMARY KEY,
+    service_id integer REFERENCES auth.service (service_id),
+    role varchar UNIQUE,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.department (
+    department_id serial PRIMARY KEY,
+    department varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.management (
+    management_id serial PRIMARY KEY,
+    management varchar NOT NULL,
+    department_id integer REFERENCES auth.department (department_id),
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.district (
+    district_id serial PRIMARY KEY,
+    district varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.district_group (
+    district_group_id serial PRIMARY KEY,
+    description text,
+    districts_ids integer[],
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.division (
+    division_id serial PRIMARY KEY,
+    division varchar NOT NULL,
+    management_id integer REFERENCES auth.management (management_id),
+    district_group_id integer REFERENCES auth.district_group (district_group_id),
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.position_list (
+    position_list_id serial PRIMARY KEY,
+    position varchar NOT NULL,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.position (
+    position_id serial PRIMARY KEY,
+    position_list_id integer REFERENCES auth.position_list (position_list_id),
+    management_id integer REFERENCES auth.management (management_id),
+    division_id integer REFERENCES auth.division (division_id),
+    obey_id integer,
+    position_rank integer,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS auth.work_type (
+    work_type_id serial PRIMARY KEY,
+    work_type varchar NOT NULL,
+    work_range varchar,
+    notes text,
+    latitude double precision,
+    longtitude double precision
+);
+
+CREATE TABLE IF NOT EXISTS auth."user" (
+    user_uuid uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    login varchar UNIQUE,
+    email varchar UNIQUE,
+    password varchar,
+    first_name varchar,
+    middle_name varchar,
+    last_name varchar,
+    telegram_token varchar,
+    telegram_chat_id bigint,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now(),
+    roles integer[],
+    district_group_id integer REFERENCES auth.district_group (district_group_id),
+    groups integer[],
+    positions integer[],
+    -- Дашборд читает должности под этим именем
+    positions_ids integer[] GENERATED ALWAYS AS (positions) STORED,
+    work_type_id integer REFERENCES auth.work_type (work_type_id)
+);
+
+CREATE TABLE IF NOT EXISTS auth.user_location (
+    user_uuid uuid PRIMARY KEY REFERENCES auth."user" (user_uuid) ON DELETE CASCADE,
+    latitude double precision,
+    longitude double precision,
+    updated_at timestamp DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS hr.candidate_status (
+    status_id integer PRIMARY KEY,
+    name varchar NOT NULL,
+    is_final boolean NOT NULL DEFAULT false
+);
+
+CREATE TABLE IF NOT EXISTS hr.document_status (
+    document_status_id integer PRIMARY KEY,
+    status varchar NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hr.candidate (
+    candidate_uuid uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    first_name varchar NOT NULL,
+    middle_name varchar,
+    last_name varchar NOT NULL,
+    email varchar,
+    sex boolean,
+    tutor_uuid uuid REFERENCES auth."user" (user_uuid),
+    notes text,
+    invitation_code varchar UNIQUE DEFAULT upper(substr(md5(random()::text), 1, 8)),
+    telegram_chat_id bigint UNIQUE,
+    status_id integer NOT NULL DEFAULT 2 REFERENCES hr.candidate_status (status_id),
+    registered_at timestamp DEFAULT now(),
+    agreement_accepted boolean NOT NULL DEFAULT false,
+    agreement_accepted_at timestamp
+);
+
+CREATE TABLE IF NOT EXISTS hr.candidate_archive (
+    candidate_uuid uuid PRIMARY KEY,
+    first_name varchar,
+    last_name varchar,
+    email varchar,
+    status_id integer,
+    archived_at timestamp DEFAULT now(),
+    notes text
+);
+
+CREATE TABLE IF NOT EXISTS hr.document_template (
+    template_id serial PRIMARY KEY,
+    name varchar NOT NULL,
+    description text,
+    markdown_instructions text,
+    instructions text,
+    is_required boolean NOT NULL DEFAULT true,
+    processing_days integer,
+    order_position integer
+);
+
+CREATE TABLE IF NOT EXISTS hr.candidate_document (
+    document_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    candidate_id uuid NOT NULL REFERENCES hr.candidate (candidate_uuid) ON DELETE CASCADE,
+    template_id integer NOT NULL REFERENCES hr.document_template (template_id),
+    status_id integer NOT NULL DEFAULT 1 REFERENCES hr.document_status (document_status_id),
+    s3_bucket varchar,
+    s3_key varchar,
+    content_type varchar,
+    file_size bigint,
+    submitted_at timestamp,
+    approved_at timestamp,
+    rejection_reason text,
+    is_ordered boolean NOT NULL DEFAULT false,
+    notes text,
+    created_at timestamp DEFAULT now(),
+    updated_at timestamp DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS hr.document_history (
+    history_id bigserial PRIMARY KEY,
+    document_uuid uuid NOT NULL REFERENCES hr.candidate_document (document_id) ON DELETE CASCADE,
+    status_id integer NOT NULL,
+    created_at timestamp DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS hr.bank_accounts (
+    account_id bigserial PRIMARY KEY,
+    candidate_uuid uuid REFERENCES hr.candidate (candidate_uuid) ON DELETE CASCADE,
+    bank varchar,
+    account_number varchar,
+    open_date date,
+    close_date date,
+    account_type varchar,
+    status varchar
+);
+
+CREATE TABLE IF NOT EXISTS hr.candidate_location (
+    candidate_uuid uuid UNIQUE REFERENCES hr.candidate (candidate_uuid) ON DELETE CASCADE,
+    latitude double precision NOT NULL,
+    longitude double precision NOT NULL,
+    accuracy double precision,
+    created_at timestamp DEFAULT now(),
+    updated_at timestamp DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS comm.telegram_chat (
+    chat_id bigint PRIMARY KEY,
+    candidate_uuid uuid,
+    chat_type varchar,
+    created_at timestamp DEFAULT now(),
+    updated_at timestamp DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS comm.message (
+    message_id bigserial PRIMARY KEY,
+    chat_id bigint NOT NULL,
+    content text,
+    sender_type varchar,
+    sent_at timestamp NOT NULL DEFAULT now(),
+    is_from_admin boolean NOT NULL DEFAULT false
+);
+
+CREATE TABLE IF NOT EXISTS comm.chat_status (
+    chat_id bigint PRIMARY KEY,
+    last_read timestamp
+);
+
+CREATE TABLE IF NOT EXISTS comm.telegram_message (
+    telegram_message_id bigserial PRIMARY KEY,
+    chat_id bigint NOT NULL,
+    message_text text,
+    is_bot boolean NOT NULL DEFAULT false,
+    created_at timestamp DEFAULT now()
+);
+"""
+
+# Представления для auth_service. CREATE OR REPLACE затер бы представления, которые уже
+# есть в базе, поэтому создаем только недостающие; порядок важен - user_payload
+# строится на двух других
+VIEWS = [
+    ("auth.user_backend_payload", """
+        SELECT
+            u.user_uuid,
+            to_json(u.roles) AS roles_ids,
+            u.district_group_id,
+            to_json(u.groups) AS groups_ids,
+            to_json(u.positions) AS positions_ids,
+            u.telegram_token,
+            u.telegram_chat_id::text AS telegram_chat_id,
+            dg.districts_ids
+        FROM auth."user" u
+        LEFT JOIN auth.district_group dg ON dg.district_group_id = u.district_group_id
+    """),
+    ("auth.user_frontend_payload", """
+        SELECT
+            u.user_uuid,
+            u.first_name,
+            u.middle_name,
+            u.last_name,
+            ARRAY(
+                SELECT r.role FROM auth.role r WHERE r.role_id = ANY(u.roles) ORDER BY r.role_id
+            ) AS roles,
+            ARRAY(
+                SELECT d.district FROM auth.district d WHERE d.district_id = ANY(dg.districts_ids) ORDER BY d.district_id
+            ) AS districts,
+            (
+                SELECT json_agg(json_build_object('group_id', g.group_id, 'group', g."group", 'actions', g.actions))
+                FROM auth."group" g
+                WHERE g.group_id = ANY(u.groups)
+            ) AS groups_info,
+            (
+                SELECT json_agg(json_build_object(
+                    'position_id', p.position_id,
+                    'position', pl.position,
+                    'management', m.management,
+                    'division', dv.division,
+                    'position_rank', p.position_rank
+                ))
+                FROM auth.position p
+                JOIN auth.position_list pl ON pl.position_list_id = p.position_list_id
+                LEFT JOIN auth.management m ON m.management_id = p.management_id
+                LEFT JOIN auth.division dv ON dv.division_id = p.division_id
+                WHERE p.position_id = ANY(u.positions)
+            ) AS positions_info
+        FROM auth."user" u
+        LEFT JOIN auth.district_group dg ON dg.district_group_id = u.district_group_id
+    """),
+    ("auth.user_payload", """
+        SELECT
+            b.user_uuid,
+            f.first_name,
+            f.middle_name,
+            f.last_name,
+            b.roles_ids,
+            to_json(f.roles) AS roles,
+            b.district_group_id,
+            to_json(f.districts) AS districts,
+            b.groups_ids,
+            f.groups_info,
+            b.positions_ids,
+            f.positions_info,
+            b.telegram_token,
+            b.telegram_chat_id,
+            b.districts_ids
+        FROM auth.user_backend_payload b
+        JOIN auth.user_frontend_payload f ON f.user_uuid = b.user_uuid
+    """),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(SCHEMA_SQL)
+    connection = op.get_bind()
+    for name, definition in VIEWS:
+        exists = connection.execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if not exists:
+            op.execute(f"CREATE VIEW {name} AS {definition}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Базовую схему с данными не удаляем: откат ниже 0000 только снимает отметку ревизии
+    pass
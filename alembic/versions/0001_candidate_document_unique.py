@@ -0,0 +1,65 @@
+"""Unique (candidate_id, template_id) for hr.candidate_document
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = '0000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубли документов появлялись при параллельном вызове create_required_documents.
+    # Оставляем документ с загруженным файлом (или самый свежий) и переносим на него историю.
+    op.execute("""
+        CREATE TEMP TABLE candidate_document_duplicates ON COMMIT DROP AS
+        SELECT document_id, keep_id
+        FROM (
+            SELECT
+                document_id,
+                first_value(document_id) OVER (
+                    PARTITION BY candidate_id, template_id
+                    ORDER BY (s3_key IS NOT NULL) DESC, updated_at DESC NULLS LAST, created_at
+                ) AS keep_id
+            FROM hr.candidate_document
+        ) ranked
+        WHERE document_id <> keep_id
+    """)
+    op.execute("""
+        UPDATE hr.document_history h
+        SET document_uuid = dup.keep_id
+        FROM candidate_document_duplicates dup
+        WHERE h.document_uuid = dup.document_id
+    """)
+    op.execute("""
+        DELETE FROM hr.candidate_document d
+        USING candidate_document_duplicates dup
+        WHERE d.document_id = dup.document_id
+    """)
+    op.create_unique_constraint(
+        'candidate_document_candidate_template_key',
+        'candidate_document',
+        ['candidate_id', 'template_id'],
+        schema='hr',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'candidate_document_candidate_template_key',
+        'candidate_document',
+        schema='hr',
+        type_='unique',
+    )
@@ -0,0 +1,35 @@
+"""Version counter for hr.document_template
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Одна строка со счетчиком: процессы сверяют его и перечитывают шаблоны только при изменении
+    op.execute("""
+        CREATE TABLE hr.document_template_version (
+            id boolean PRIMARY KEY DEFAULT true CHECK (id),
+            version bigint NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("INSERT INTO hr.document_template_version (id, version) VALUES (true, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE hr.document_template_version")
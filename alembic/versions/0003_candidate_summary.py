@@ -0,0 +1,37 @@
+"""Precomputed AI summaries for candidates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # input_hash - хэш промпта, по нему видно, изменились ли данные кандидата с прошлой генерации
+    op.execute("""
+        CREATE TABLE hr.candidate_summary (
+            candidate_uuid uuid PRIMARY KEY REFERENCES hr.candidate (candidate_uuid) ON DELETE CASCADE,
+            input_hash text NOT NULL,
+            summary text NOT NULL,
+            model text NOT NULL,
+            generated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE hr.candidate_summary")
@@ -0,0 +1,82 @@
+"""Indexes for the hot lookups of the bot and the HR portal
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, таблица, колонки). Уникальный (candidate_id, template_id) для
+# hr.candidate_document уже дает ограничение из ревизии 0001
+INDEXES = [
+    # Каждый апдейт бота ищет кандидата по чату
+    ("ix_candidate_telegram_chat_id", "hr.candidate", ["telegram_chat_id"]),
+    # Авторизация в боте по коду приглашения
+    ("ix_candidate_invitation_code", "hr.candidate", ["invitation_code"]),
+    # Списки кандидатов куратора с фильтром по статусу
+    ("ix_candidate_tutor_status", "hr.candidate", ["tutor_uuid", "status_id"]),
+    # Лента чата: последние сообщения по chat_id
+    ("ix_message_chat_sent_at", "comm.message", ["chat_id", "sent_at DESC"]),
+    ("ix_document_history_document_created", "hr.document_history", ["document_uuid", "created_at"]),
+]
+
+
+def is_covered(connection, table: str, columns: list[str]) -> bool:
+    """
+    Есть ли уже рабочий индекс, который начинается с этих колонок: в базах,
+    созданных вручную, часть индексов могла появиться под другими именами
+    (например, из UNIQUE на колонке), второй такой же только замедлит запись
+    """
+    names = [column.split()[0] for column in columns]
+    rows = connection.execute(sa.text("""
+        SELECT ARRAY(
+            SELECT a.attname::text
+            FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, position)
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+            ORDER BY k.position
+        )
+        FROM pg_index i
+        WHERE i.indrelid = CAST(:table AS regclass)
+          AND i.indisvalid
+          AND i.indpred IS NULL
+    """), {"table": table}).scalars()
+    return any(list(indexed[:len(names)]) == names for indexed in rows)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    # CONCURRENTLY не блокирует запись в comm.message и hr.candidate на время построения,
+    # но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            schema = table.split(".")[0]
+            # Недостроенный после прерванной миграции индекс невалиден: пересоздаем
+            invalid = connection.execute(
+                sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": f"{schema}.{name}"},
+            ).scalar()
+            if invalid:
+                op.execute(f"DROP INDEX CONCURRENTLY {schema}.{name}")
+            if is_covered(connection, table, columns):
+                continue
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table.split('.')[0]}.{name}")
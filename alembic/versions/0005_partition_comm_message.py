@@ -0,0 +1,156 @@
+"""Monthly range partitions for comm.message and the archive catalog
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Партиции создает одна функция: миграция, задача хранения
+# (service/message_retention_service.py) и генератор данных для бенчмарков.
+# DEFAULT-партиции нет: с ней планировщик не может читать партиции по порядку
+# sent_at и останавливаться на LIMIT, поэтому партиции создаются заранее
+CREATE_PARTITIONS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION comm.create_message_partitions(from_date date, to_date date)
+    RETURNS integer
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        month date;
+        partition_name text;
+        created integer := 0;
+    BEGIN
+        FOR month IN
+            SELECT generate_series(date_trunc('month', from_date), date_trunc('month', to_date), interval '1 month')::date
+        LOOP
+            partition_name := 'message_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM');
+            IF to_regclass('comm.' || partition_name) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE comm.%I PARTITION OF comm.message FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month, (month + interval '1 month')::date
+                );
+                created := created + 1;
+            END IF;
+        END LOOP;
+        RETURN created;
+    END
+    $$
+"""
+
+# Сколько месяцев вперед создать партиции; дальше их создает задача хранения
+PARTITIONS_AHEAD_MONTHS = 3
+
+
+def rename_indexes(connection, table: str, suffix: str):
+    """Имена индексов уникальны в схеме: освобождаем их для новой таблицы"""
+    indexes = connection.execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = 'comm' AND tablename = :table"),
+        {"table": table},
+    ).scalars().all()
+    for index in indexes:
+        op.execute(f'ALTER INDEX comm."{index}" RENAME TO "{index}{suffix}"')
+
+
+def message_sequence(connection) -> str:
+    sequence = connection.execute(sa.text("SELECT pg_get_serial_sequence('comm.message', 'message_id')")).scalar()
+    if sequence is None:
+        op.execute("CREATE SEQUENCE comm.message_message_id_seq")
+        op.execute("SELECT setval('comm.message_message_id_seq', COALESCE((SELECT max(message_id) FROM comm.message), 0) + 1, false)")
+        sequence = "comm.message_message_id_seq"
+    # Последовательность переживет удаление старой таблицы и перейдет к новой
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    return sequence
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    sequence = message_sequence(connection)
+    rename_indexes(connection, "message", "_unpartitioned")
+    op.execute("ALTER TABLE comm.message RENAME TO message_unpartitioned")
+
+    # Ключ партиционирования обязан входить в первичный ключ
+    op.execute(f"""
+        CREATE TABLE comm.message (
+            message_id bigint NOT NULL DEFAULT nextval('{sequence}'),
+            chat_id bigint NOT NULL,
+            content text,
+            sender_type varchar,
+            sent_at timestamp NOT NULL DEFAULT now(),
+            is_from_admin boolean NOT NULL DEFAULT false,
+            PRIMARY KEY (message_id, sent_at)
+        ) PARTITION BY RANGE (sent_at)
+    """)
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    op.execute(f"""
+        SELECT comm.create_message_partitions(
+            COALESCE(min(sent_at), now())::date,
+            GREATEST(max(sent_at), now() + interval '{PARTITIONS_AHEAD_MONTHS} months')::date
+        )
+        FROM comm.message_unpartitioned
+    """)
+    op.execute("""
+        INSERT INTO comm.message (message_id, chat_id, content, sender_type, sent_at, is_from_admin)
+        SELECT message_id, chat_id, content, sender_type, sent_at, is_from_admin
+        FROM comm.message_unpartitioned
+    """)
+    op.execute("DROP TABLE comm.message_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY comm.message.message_id")
+    # Индекс на родительской таблице создается и на каждой новой партиции
+    op.execute("CREATE INDEX ix_message_chat_sent_at ON comm.message (chat_id, sent_at DESC)")
+    op.execute("ANALYZE comm.message")
+
+    # Каталог партиций, выгруженных в Parquet: по нему задача хранения не выгружает
+    # партицию повторно, а аудит находит файлы нужного периода
+    op.execute("""
+        CREATE TABLE comm.message_archive (
+            partition_name text PRIMARY KEY,
+            range_start timestamp NOT NULL,
+            range_end timestamp NOT NULL,
+            s3_bucket text NOT NULL,
+            s3_key text NOT NULL,
+            row_count bigint NOT NULL,
+            size_bytes bigint NOT NULL,
+            archived_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Выгруженные в Parquet сообщения в таблицу не возвращаются
+    connection = op.get_bind()
+    op.execute("DROP TABLE comm.message_archive")
+    sequence = message_sequence(connection)
+    rename_indexes(connection, "message", "_partitioned")
+    op.execute("ALTER TABLE comm.message RENAME TO message_partitioned")
+    op.execute(f"""
+        CREATE TABLE comm.message (
+            message_id bigint PRIMARY KEY DEFAULT nextval('{sequence}'),
+            chat_id bigint NOT NULL,
+            content text,
+            sender_type varchar,
+            sent_at timestamp NOT NULL DEFAULT now(),
+            is_from_admin boolean NOT NULL DEFAULT false
+        )
+    """)
+    op.execute("""
+        INSERT INTO comm.message (message_id, chat_id, content, sender_type, sent_at, is_from_admin)
+        SELECT message_id, chat_id, content, sender_type, sent_at, is_from_admin
+        FROM comm.message_partitioned
+    """)
+    op.execute("DROP TABLE comm.message_partitioned")
+    op.execute("DROP FUNCTION comm.create_message_partitions(date, date)")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY comm.message.message_id")
+    op.execute("CREATE INDEX ix_message_chat_sent_at ON comm.message (chat_id, sent_at DESC)")
@@ -0,0 +1,155 @@
+"""Audit events separated from the chat log
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Служебные строки, которые бот писал в comm.message от имени админа, и их коды
+# из repository.audit_events.AuditEvent. Сообщения HR тоже пишутся с is_from_admin,
+# поэтому переносятся только строки, совпадающие с текстом бота целиком; все, что
+# нельзя однозначно отличить от сообщения HR, остается в истории чата.
+# Строки без подробностей - точное совпадение
+LEGACY_EXACT_EVENTS = [
+    (1, "Пользователю показано главное меню"),
+    (6, "Пользователь отказался от политики конфиденциальности"),
+    (7, "Пользователь запросил документы"),
+    (8, "Пользователю отображен список документов"),
+    (11, "Пользователь запросил отправку геолокации"),
+    (13, "Пользователь запросил сохраненную геолокацию"),
+    (14, "Пользователь просмотрел профиль"),
+    (15, "Пользователь обратился в поддержку"),
+    (16, "Показано меню поддержки"),
+    (17, "Пользователь начал писать сообщение в поддержку"),
+    (19, "Пользователь вернулся в меню"),
+]
+# Строки с подробностями, которые не с чем сверить, - однострочный текст по
+# регулярному выражению от начала до конца строки; исходный текст сохраняется в details
+LEGACY_PATTERN_EVENTS = [
+    (2, r"^Пользователь [^\n]+ запустил бота$"),
+    (3, r"^Пользователь ввел код: \S+$"),
+    (12, r"^Пользователь отправил геолокацию: -?[0-9.]+, -?[0-9.]+$"),
+]
+# Имя кандидата, привязанного к чату
+LEGACY_CANDIDATE_EVENTS = [
+    (4, " авторизовался"),
+    (5, " принял политику конфиденциальности"),
+]
+# Название шаблона документа между префиксом и суффиксом; для смены статуса
+# перечислены все формулировки, которые писал update_document_status
+LEGACY_DOCUMENT_EVENTS = [
+    (9, "Пользователь скачал документ: ", ""),
+    (10, "Документ '", "' сброшен в 'Не загружен'"),
+    (10, "Документ '", "' отмечен как заказанный"),
+    (10, "Документ '", "' отправлен на проверку"),
+    (10, "Документ '", "' отмечен как проверенный"),
+    (10, "Документ '", "' запрошена повторная загрузка"),
+    (10, "Документ '", "' изменен"),
+]
+# Бот писал эту строку сразу после самого сообщения кандидата
+SUPPORT_MESSAGE_EVENT, SUPPORT_MESSAGE_PREFIX = 18, "Пользователь отправил сообщение в поддержку: "
+
+
+def sql_values(rows) -> str:
+    return ", ".join(
+        "({})".format(", ".join(
+            str(value) if isinstance(value, int) else "'{}'".format(value.replace("'", "''"))
+            for value in row
+        ))
+        for row in rows
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE comm.audit_event (
+            event_id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            chat_id bigint NOT NULL,
+            event smallint NOT NULL,
+            details jsonb,
+            created_at timestamp NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("CREATE INDEX ix_audit_event_chat_created ON comm.audit_event (chat_id, created_at)")
+    # События пишутся по времени: BRIN на created_at почти ничего не весит
+    op.execute("CREATE INDEX ix_audit_event_created_brin ON comm.audit_event USING brin (created_at)")
+
+    # Переносим служебные строки из истории чатов
+    op.execute(f"""
+        CREATE TEMP TABLE legacy_audit_event ON COMMIT DROP AS
+        WITH admin_message AS (
+            SELECT message_id, sent_at, chat_id, content
+            FROM comm.message
+            WHERE is_from_admin
+        ),
+        matched AS (
+            SELECT m.message_id, m.sent_at, m.chat_id, p.event, NULL::text AS content
+            FROM admin_message m
+            JOIN (VALUES {sql_values(LEGACY_EXACT_EVENTS)}) AS p (event, text) ON m.content = p.text
+
+            UNION ALL
+            SELECT m.message_id, m.sent_at, m.chat_id, p.event, m.content
+            FROM admin_message m
+            JOIN (VALUES {sql_values(LEGACY_PATTERN_EVENTS)}) AS p (event, pattern) ON m.content ~ p.pattern
+
+            UNION ALL
+            SELECT m.message_id, m.sent_at, m.chat_id, p.event, m.content
+            FROM admin_message m
+            JOIN hr.candidate c ON c.telegram_chat_id = m.chat_id
+            JOIN (VALUES {sql_values(LEGACY_CANDIDATE_EVENTS)}) AS p (event, suffix)
+              ON m.content = 'Пользователь ' || c.first_name || ' ' || c.last_name || p.suffix
+
+            UNION ALL
+            SELECT m.message_id, m.sent_at, m.chat_id, p.event, m.content
+            FROM admin_message m
+            JOIN (
+                SELECT p.event, p.prefix || t.name || p.suffix AS text
+                FROM hr.document_template t
+                CROSS JOIN (VALUES {sql_values(LEGACY_DOCUMENT_EVENTS)}) AS p (event, prefix, suffix)
+            ) AS p ON m.content = p.text
+
+            UNION ALL
+            SELECT m.message_id, m.sent_at, m.chat_id, {SUPPORT_MESSAGE_EVENT}, m.content
+            FROM admin_message m
+            WHERE EXISTS (
+                SELECT 1 FROM comm.message c
+                WHERE c.chat_id = m.chat_id
+                  AND NOT c.is_from_admin
+                  AND c.sent_at BETWEEN m.sent_at - interval '1 minute' AND m.sent_at
+                  AND m.content = {sql_values([(SUPPORT_MESSAGE_PREFIX,)])[1:-1]} || c.content
+            )
+        )
+        SELECT DISTINCT ON (message_id, sent_at) message_id, sent_at, chat_id, event, content
+        FROM matched
+    """)
+    op.execute("""
+        INSERT INTO comm.audit_event (chat_id, event, details, created_at)
+        SELECT chat_id, event, CASE WHEN content IS NOT NULL THEN jsonb_build_object('text', content) END, sent_at
+        FROM legacy_audit_event
+        ORDER BY sent_at
+    """)
+    op.execute("""
+        DELETE FROM comm.message m
+        USING legacy_audit_event l
+        WHERE m.message_id = l.message_id AND m.sent_at = l.sent_at
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # События обратно в историю чатов не переносятся
+    op.execute("DROP TABLE comm.audit_event")
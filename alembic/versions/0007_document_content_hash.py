@@ -0,0 +1,38 @@
+"""Content hash of uploaded documents for deduplicated storage
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # sha256 содержимого файла. Файлы с хэшем лежат в MinIO по ключу из хэша и
+    # общие для всех документов с тем же содержимым: число строк с хэшем и есть
+    # число ссылок на файл. У загруженных раньше документов хэша нет
+    op.execute("ALTER TABLE hr.candidate_document ADD COLUMN content_sha256 char(64)")
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_candidate_document_content_sha256
+            ON hr.candidate_document (content_sha256)
+            WHERE content_sha256 IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS hr.ix_candidate_document_content_sha256")
+    op.execute("ALTER TABLE hr.candidate_document DROP COLUMN content_sha256")
@@ -0,0 +1,39 @@
+"""Previews of uploaded documents for review
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Превью лежит в том же бакете, что и оригинал. preview_error заполняется,
+    # если превью построить нельзя (например, для Excel), чтобы не пробовать снова
+    op.execute("ALTER TABLE hr.candidate_document ADD COLUMN preview_key varchar, ADD COLUMN preview_error text")
+    with op.get_context().autocommit_block():
+        # Очередь воркера превью (service/document_preview_service.py): индекс
+        # содержит только документы, которые еще ждут превью
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_candidate_document_preview_pending
+            ON hr.candidate_document (submitted_at)
+            WHERE s3_key IS NOT NULL AND preview_key IS NULL AND preview_error IS NULL
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS hr.ix_candidate_document_preview_pending")
+    op.execute("ALTER TABLE hr.candidate_document DROP COLUMN preview_key, DROP COLUMN preview_error")
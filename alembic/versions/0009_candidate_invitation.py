@@ -0,0 +1,46 @@
+"""Outbox of invitation emails for imported candidates
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Строка появляется в одной транзакции с кандидатом при импорте из файла и
+    # разбирается воркером service/candidate_invitation_service.py: приглашение
+    # не теряется при перезапуске портала. import_id объединяет строки одного импорта
+    op.execute("""
+        CREATE TABLE hr.candidate_invitation (
+            candidate_uuid uuid PRIMARY KEY REFERENCES hr.candidate (candidate_uuid) ON DELETE CASCADE,
+            import_id uuid NOT NULL,
+            created_at timestamp NOT NULL DEFAULT now(),
+            sent_at timestamp,
+            attempts smallint NOT NULL DEFAULT 0,
+            last_error text
+        )
+    """)
+    op.execute("CREATE INDEX ix_candidate_invitation_import ON hr.candidate_invitation (import_id)")
+    # Очередь воркера: только неотправленные приглашения
+    op.execute("""
+        CREATE INDEX ix_candidate_invitation_pending ON hr.candidate_invitation (created_at)
+        WHERE sent_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE hr.candidate_invitation")
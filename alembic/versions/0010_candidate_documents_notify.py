@@ -0,0 +1,99 @@
+"""NOTIFY the bot when a candidate's document list changes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Бот кэширует список документов по чату (repository/bot_repositoty.py) и сбрасывает
+    # запись по уведомлению с chat_id. Статусы меняют портал HR, сервис заказа и другие
+    # реплики бота, поэтому уведомления шлют триггеры, а не каждый из них.
+    # Кандидаты без чата (например, только что импортированные) уведомлений не дают
+    op.execute("""
+        CREATE FUNCTION hr.notify_candidate_documents() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            changed_chat_id bigint;
+        BEGIN
+            SELECT telegram_chat_id INTO changed_chat_id
+            FROM hr.candidate
+            WHERE candidate_uuid = COALESCE(NEW.candidate_id, OLD.candidate_id);
+            IF changed_chat_id IS NOT NULL THEN
+                PERFORM pg_notify('hr_candidate_documents', changed_chat_id::text);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER candidate_document_added_or_removed
+        AFTER INSERT OR DELETE ON hr.candidate_document
+        FOR EACH ROW EXECUTE FUNCTION hr.notify_candidate_documents()
+    """)
+    # Превью, заметки и файл в кэше не хранятся: их изменения уведомлений не дают
+    op.execute("""
+        CREATE TRIGGER candidate_document_status_changed
+        AFTER UPDATE OF status_id, template_id ON hr.candidate_document
+        FOR EACH ROW
+        WHEN (OLD.status_id IS DISTINCT FROM NEW.status_id OR OLD.template_id IS DISTINCT FROM NEW.template_id)
+        EXECUTE FUNCTION hr.notify_candidate_documents()
+    """)
+
+    # Перепривязка чата к другому кандидату и смена имени тоже меняют запись кэша
+    op.execute("""
+        CREATE FUNCTION hr.notify_candidate_chat() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF OLD.telegram_chat_id IS NOT NULL THEN
+                PERFORM pg_notify('hr_candidate_documents', OLD.telegram_chat_id::text);
+            END IF;
+            IF TG_OP = 'UPDATE' AND NEW.telegram_chat_id IS NOT NULL THEN
+                PERFORM pg_notify('hr_candidate_documents', NEW.telegram_chat_id::text);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER candidate_chat_changed
+        AFTER UPDATE OF telegram_chat_id, first_name, last_name ON hr.candidate
+        FOR EACH ROW
+        WHEN (
+            OLD.telegram_chat_id IS DISTINCT FROM NEW.telegram_chat_id
+            OR OLD.first_name IS DISTINCT FROM NEW.first_name
+            OR OLD.last_name IS DISTINCT FROM NEW.last_name
+        )
+        EXECUTE FUNCTION hr.notify_candidate_chat()
+    """)
+    op.execute("""
+        CREATE TRIGGER candidate_chat_removed
+        AFTER DELETE ON hr.candidate
+        FOR EACH ROW
+        WHEN (OLD.telegram_chat_id IS NOT NULL)
+        EXECUTE FUNCTION hr.notify_candidate_chat()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER candidate_chat_removed ON hr.candidate")
+    op.execute("DROP TRIGGER candidate_chat_changed ON hr.candidate")
+    op.execute("DROP FUNCTION hr.notify_candidate_chat()")
+    op.execute("DROP TRIGGER candidate_document_status_changed ON hr.candidate_document")
+    op.execute("DROP TRIGGER candidate_document_added_or_removed ON hr.candidate_document")
+    op.execute("DROP FUNCTION hr.notify_candidate_documents()")
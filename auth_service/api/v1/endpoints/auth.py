@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Response, Depends, Body
 from depends import auth_service
 from schemas.auth import UserLogin, UserResetEmail
-from service.jwt_service import UserTokenData, get_user
+from service.jwt_service import AuthChecker, UserTokenData, get_user
 from schemas.user import PasswordSwitch
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -19,4 +19,10 @@ async def change_password(password_switch : PasswordSwitch, user : UserTokenData
 @router.post("/reset_password")
 async def reset_passwor(user_email: UserResetEmail):
     result = await auth_service.reset_password(user_email.email)
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/me")
+async def get_me(user: UserTokenData = Depends(AuthChecker())) -> UserTokenData:
+    """Данные из токена: другие сервисы проверяют через него куку AuthToken"""
+    return user
@@ -13,6 +13,11 @@ class ProjectManagementSettings:
     DB_USER: str = os.environ.get("DB_USER")
     DB_PASSWORD: str = os.environ.get("DB_PASSWORD")
     DB_NAME: str = os.environ.get("DB_NAME")
+    # Размер пула соединений SQLAlchemy (по умолчанию как в самой SQLAlchemy)
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    # Стоимость bcrypt для новых хэшей паролей; проверка пароля идет со стоимостью из хэша
+    BCRYPT_ROUNDS: int = int(os.environ.get("BCRYPT_ROUNDS", 12))
 
     @property
     def DATABASE_URL(self) -> str:
@@ -61,4 +66,3 @@ class Settings:
     gemini : GEMINI = field(default_factory=GEMINI)
 
 settings = Settings()
-print(settings.project_management_setting.DATABASE_URL)
@@ -0,0 +1,45 @@
+import asyncio
+
+from prometheus_client import Gauge, Histogram
+
+from common.metrics import LATENCY_BUCKETS, ServiceMetrics, metrics_payload
+
+_metrics = ServiceMetrics("auth", "smtp")
+observe_query = _metrics.observe_query
+track = _metrics.track
+timed = _metrics.timed
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "auth_http_request_seconds",
+    "Время обработки HTTP-запросов",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "auth_event_loop_lag_seconds",
+    "Опоздание event loop относительно запланированного пробуждения (время блокировки)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_CHECK_INTERVAL = 0.05
+
+DB_POOL_CHECKED_OUT = Gauge("auth_db_pool_checked_out", "Соединения, выданные из пула")
+DB_POOL_CAPACITY = Gauge("auth_db_pool_capacity", "Максимум соединений пула (pool_size + max_overflow)")
+
+
+async def monitor_event_loop(interval: float = EVENT_LOOP_CHECK_INTERVAL):
+    """
+    Фоновая задача: просыпается каждые interval секунд и пишет опоздание.
+    Синхронный код в обработчиках (bcrypt, smtplib) виден как рост опоздания
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - started - interval, 0.0))
+
+
+__all__ = [
+    "observe_query", "track", "timed", "metrics_payload", "monitor_event_loop",
+    "HTTP_REQUEST_SECONDS", "EVENT_LOOP_LAG_SECONDS", "DB_POOL_CHECKED_OUT", "DB_POOL_CAPACITY",
+]
@@ -15,7 +15,6 @@ class AuthRepository:
 
     async def get_user_uuid_by_email_or_none(self, email: EmailStr) -> UserUuid | None:
         async with self.db() as session:
-            print("validate user by email")
             query_result = await session.execute(
                 select(User.user_uuid).where(User.email == email)
             )
@@ -24,12 +23,10 @@ class AuthRepository:
 
     async def get_user_uuid_by_login_or_none(self, login: str) -> UserUuid | None:
         async with self.db() as session:
-            print("validate user by login")
             query_result = await session.execute(
                 select(User.user_uuid).where(User.login == login)
             )
             result = query_result.scalar_one_or_none()
-            print(result)
             return result
 
     async def get_password_by_uuid(self, user_uuid: str) -> str:
@@ -40,7 +37,6 @@ class AuthRepository:
             result = (
                 query_result.scalar_one()
             )  
-            print(result)
             return result
 
     async def get_email_by_user_uuid(self, user_uuid: str) -> EmailStr:
@@ -48,9 +44,7 @@ class AuthRepository:
             query_result = await session.execute(
                 select(User.email).where(User.user_uuid == user_uuid)
             )
-            print(user_uuid)
             result = query_result.scalar_one_or_none()
-            print(result)
             return result
 
     async def create_user(
@@ -85,18 +79,14 @@ class AuthRepository:
 
     async def get_user_backend_payload(self, user_uuid):
         async with self.db() as session:
-            print('GET BACKEND PAYLOAD FUNC', user_uuid)
             query_result = await session.execute(
                 select(UserBackendPayload).where(UserBackendPayload.user_uuid == user_uuid)
             )
             result = query_result.scalars().all()
-            for i in result:
-                print('BACKEND PAYLOAD', i.as_dict())
             return result[0].as_dict()
 
     async def get_user_frontend_payload(self, user_uuid):
         async with self.db() as session:
-            print(type(user_uuid))
             query_result = await session.execute(
                 select(
                     UserFrontendPayload.first_name,
@@ -109,7 +99,6 @@ class AuthRepository:
                 ).where(UserFrontendPayload.user_uuid == user_uuid)
             )
             result = [dict(row) for row in query_result.mappings().all()][0]
-            print(result)
             return result
     async def get_user_first_name_by_uuid(self, user_uuid):
         async with self.db() as session: 
@@ -1,11 +1,44 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from core.config import settings
+from core.metrics import DB_POOL_CAPACITY, DB_POOL_CHECKED_OUT, observe_query
 
-print(settings.project_management_setting.DATABASE_URL)
-
-EGNINE = create_async_engine(settings.project_management_setting.DATABASE_URL)
+EGNINE = create_async_engine(
+    settings.project_management_setting.DATABASE_URL,
+    pool_size=settings.project_management_setting.DB_POOL_SIZE,
+    max_overflow=settings.project_management_setting.DB_MAX_OVERFLOW,
+)
+DB_POOL_CAPACITY.set(settings.project_management_setting.DB_POOL_SIZE + settings.project_management_setting.DB_MAX_OVERFLOW)
 
 auth_session = sessionmaker(EGNINE, class_=AsyncSession, expire_on_commit=False)
 
+
+@event.listens_for(EGNINE.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(EGNINE.sync_engine, "after_cursor_execute")
+def _observe_query(conn, cursor, statement, parameters, context, executemany):
+    observe_query(statement, time.perf_counter() - conn.info["query_started_at"].pop())
+
+
+@event.listens_for(EGNINE.sync_engine, "handle_error")
+def _observe_failed_query(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        observe_query(exception_context.statement, time.perf_counter() - started.pop(), failed=True)
+
+
+@event.listens_for(EGNINE.sync_engine, "checkout")
+def _connection_checked_out(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(EGNINE.sync_engine, "checkin")
+def _connection_checked_in(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
@@ -1,9 +1,13 @@
+import logging
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import List, Union
 
 from core.config import settings
+from core.metrics import track
+
+logger = logging.getLogger(__name__)
 
 
 class AuthEmailService:
@@ -102,13 +106,13 @@ class AuthEmailService:
         msg.attach(MIMEText(html_body, 'html'))
 
         try:
-            with smtplib.SMTP(settings.email_settings.EMAIL_SERVER,settings.email_settings.EMAIL_PORT) as server:
+            with track("smtp", "send_message"), smtplib.SMTP(settings.email_settings.EMAIL_SERVER,settings.email_settings.EMAIL_PORT) as server:
                 server.starttls()
                 server.login(settings.email_settings.EMAIL_SERVER, settings.email_settings.EMAIL_PASSWORD)
                 server.send_message(msg)
             return True
         except Exception as e:
-            print(f"Email sending failed: {str(e)}")
+            logger.error(f"Email sending failed: {str(e)}")
             return False
 
     def send_password_reset(self, email: str, new_password: str) -> bool:
@@ -20,10 +20,8 @@ class AuthService:
         
     async def user_exist(self, login_or_email) -> UserUuid | HTTPException:
         if '@' in login_or_email:
-            print('this email')
             user_uuid = await self.auth_repository.get_user_uuid_by_email_or_none(login_or_email)
         else:
-            print('this login')
             user_uuid = await self.auth_repository.get_user_uuid_by_login_or_none(login_or_email)
         if user_uuid is None: 
             raise UserNotFoundException
@@ -39,7 +37,6 @@ class AuthService:
     
     async def login_user(self, login_or_email : str , password: str, response : Response) -> UserUuid | HTTPException:
         user_uuid = await self.user_exist(login_or_email=login_or_email)
-        print('это uuid', type(user_uuid))
         user_password = await self.auth_repository.get_password_by_uuid(user_uuid=user_uuid)
         user_email = await self.get_email_by_user_uuid(user_uuid=user_uuid)
         if validate_password(provided_password=password, stored_hash=user_password):
@@ -91,7 +88,6 @@ class AuthService:
         new_password = generate_new_password()
         email = await self.auth_repository.get_email_by_user_uuid(user_uuid)
         hashed_password = get_password_hash(new_password)
-        print(hashed_password)
         result = await self.auth_repository.update_password(user_uuid=user_uuid, hashed_password=hashed_password)
         if result is not None:
             self.email_service.send_password_reset(email, new_password=new_password)
@@ -108,7 +104,6 @@ class AuthService:
         email = await self.auth_repository.get_email_by_user_uuid(user_uuid)
         first_name = await self.auth_repository.get_user_first_name_by_uuid(user_uuid)
         hashed_password = get_password_hash(new_password)
-        print(hashed_password)
         result = await self.auth_repository.update_password(user_uuid=user_uuid, hashed_password=hashed_password)
         if result is not None:
             self.email_service.send_password_update_notification(email, first_name=first_name)
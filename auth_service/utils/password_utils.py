@@ -1,4 +1,5 @@
 import bcrypt
+from core.config import settings
 import string
 import random
 
@@ -7,7 +8,7 @@ def get_password_hash(password: str) -> str:
     Get password hash.
     bcrypt generates a random salt internally.
     """
-    salt = bcrypt.gensalt()  
+    salt = bcrypt.gensalt(settings.project_management_setting.BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password.decode('utf-8')
 
@@ -0,0 +1,318 @@
+"""
+Нагрузочный тест auth_service.
+
+Запускает сервис через uvicorn (один воркер) против локального Postgres,
+создает тестовых пользователей с паролем заданной стоимости bcrypt и гоняет
+конкурентных клиентов по сценариям:
+
+    login           POST /v1/auth/login
+    token           GET  /v1/auth/me (проверка куки AuthToken через AuthChecker)
+    reset_password  POST /v1/auth/reset_password
+
+По каждому сценарию: запросов в секунду, p50/p95/p99 задержки, доля времени,
+когда event loop сервиса был заблокирован, и загрузка пула соединений
+(по метрикам /metrics, которые опрашиваются во время прогона).
+SMTP в запущенном сервисе отключен, если не передан --send-email.
+
+    python benchmarks/auth_load.py --clients 20 --bcrypt-rounds 12 --save before.json
+    python benchmarks/auth_load.py --clients 20 --bcrypt-rounds 12 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import aiohttp
+import bcrypt
+import psycopg2
+from prometheus_client.parser import text_string_to_metric_families
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIR = ROOT / "auth_service"
+
+SCENARIOS = ("login", "token", "reset_password")
+BENCH_PASSWORD = "Bench-Password1!"
+# Тестовые пользователи отличаются от данных seed_dataset.py по префиксу логина
+LOGIN_PREFIX = "bench_auth_"
+RESET_PREFIX = "bench_reset_"
+
+
+@dataclass
+class ScenarioResult:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+    loop_blocked_seconds: float = 0.0
+    loop_lag_p99: float = 0.0
+    pool_samples: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        requests = len(self.latencies) + self.errors
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "rps": round(requests / self.wall_seconds, 1) if self.wall_seconds else 0.0,
+            "p50_ms": percentile(self.latencies, 50),
+            "p95_ms": percentile(self.latencies, 95),
+            "p99_ms": percentile(self.latencies, 99),
+            "loop_blocked_pct": round(self.loop_blocked_seconds / self.wall_seconds * 100, 1)
+            if self.wall_seconds else 0.0,
+            "loop_lag_p99_ms": round(self.loop_lag_p99 * 1000, 1),
+            "pool_avg_pct": round(sum(self.pool_samples) / len(self.pool_samples) * 100, 1)
+            if self.pool_samples else 0.0,
+            "pool_max_pct": round(max(self.pool_samples) * 100, 1) if self.pool_samples else 0.0,
+        }
+
+
+def percentile(values: list, q: float) -> float:
+    """Перцентиль по ближайшему рангу, в миллисекундах"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return round(ordered[index] * 1000, 1)
+
+
+def get_db_connection():
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=os.environ.get("DB_PORT", "5432"),
+        user=os.environ.get("DB_USER", "user"),
+        password=os.environ.get("DB_PASSWORD", "password"),
+        dbname=os.environ.get("DB_NAME", "database"),
+    )
+
+
+def create_users(count: int, bcrypt_rounds: int):
+    """Пользователи для входа и для сброса пароля; хэш один на всех"""
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt(bcrypt_rounds)).decode("utf-8")
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT min(district_group_id) FROM auth.district_group")
+            district_group_id = cursor.fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO auth."user" (
+                    login, email, password, first_name, last_name, roles, district_group_id, groups, positions
+                ) VALUES (%s, %s, %s, 'Нагрузочный', 'Тест', '{3}', %s, '{1}', '{}')
+                ON CONFLICT (login) DO UPDATE SET password = EXCLUDED.password
+            """, [
+                (f"{prefix}{index:04d}", f"{prefix}{index:04d}@example.com", password_hash, district_group_id)
+                for prefix in (LOGIN_PREFIX, RESET_PREFIX) for index in range(count)
+            ])
+        conn.commit()
+
+
+def delete_users():
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM auth."user" WHERE login LIKE %s OR login LIKE %s',
+                (f"{LOGIN_PREFIX}%", f"{RESET_PREFIX}%"),
+            )
+        conn.commit()
+
+
+def start_service(args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "DB_HOST": os.environ.get("DB_HOST", "localhost"),
+        "DB_PORT": os.environ.get("DB_PORT", "5432"),
+        "DB_USER": os.environ.get("DB_USER", "user"),
+        "DB_PASSWORD": os.environ.get("DB_PASSWORD", "password"),
+        "DB_NAME": os.environ.get("DB_NAME", "database"),
+    }
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    if args.pool_size is not None:
+        env["DB_POOL_SIZE"] = str(args.pool_size)
+    if args.max_overflow is not None:
+        env["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    if not args.send_email:
+        env["EMAIL_SERVER"] = ""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--no-access-log", "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+        env=env,
+    )
+
+
+async def scrape(session: aiohttp.ClientSession, base_url: str) -> dict:
+    """Метрики сервиса: {(имя, метки): значение}"""
+    async with session.get(f"{base_url}/metrics") as response:
+        text = await response.text()
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+async def wait_ready(session: aiohttp.ClientSession, base_url: str, process, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"auth_service завершился с кодом {process.returncode}")
+        try:
+            await scrape(session, base_url)
+            return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("auth_service не ответил на /metrics")
+
+
+def lag_p99(before: dict, after: dict) -> float:
+    """Верхняя граница p99 опоздания event loop по корзинам гистограммы за прогон"""
+    buckets = sorted(
+        (float(labels[0][1]), value - before.get((name, labels), 0.0))
+        for (name, labels), value in after.items()
+        if name == "auth_event_loop_lag_seconds_bucket"
+    )
+    total = buckets[-1][1] if buckets else 0
+    for upper, count in buckets:
+        if total and count >= total * 0.99:
+            return upper
+    return 0.0
+
+
+class LoadRunner:
+    def __init__(self, args, base_url: str):
+        self.args = args
+        self.base_url = base_url
+        self.tokens: list[str] = []
+
+    def request(self, scenario: str, session: aiohttp.ClientSession, index: int):
+        user = f"{index % self.args.users:04d}"
+        if scenario == "login":
+            return session.post(f"{self.base_url}/v1/auth/login",
+                                json={"login_or_email": f"{LOGIN_PREFIX}{user}", "password": BENCH_PASSWORD})
+        if scenario == "token":
+            token = self.tokens[index % len(self.tokens)]
+            return session.get(f"{self.base_url}/v1/auth/me", headers={"Cookie": f"AuthToken={token}"})
+        return session.post(f"{self.base_url}/v1/auth/reset_password",
+                            json={"email": f"{RESET_PREFIX}{user}@example.com"})
+
+    async def collect_tokens(self, session: aiohttp.ClientSession):
+        """Токены для сценария token: по одному входу на пользователя"""
+        for index in range(min(self.args.users, 50)):
+            async with self.request("login", session, index) as response:
+                cookie = response.cookies.get("AuthToken")
+                if response.status == 200 and cookie is not None:
+                    self.tokens.append(cookie.value)
+        if not self.tokens:
+            raise RuntimeError("не удалось получить AuthToken: вход не работает")
+
+    async def run_scenario(self, scenario: str, session: aiohttp.ClientSession) -> ScenarioResult:
+        result = ScenarioResult()
+        deadline = time.perf_counter() + self.args.duration
+        counter = iter(range(sys.maxsize))
+
+        async def client():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    async with self.request(scenario, session, next(counter)) as response:
+                        await response.read()
+                        ok = response.status < 400
+                except aiohttp.ClientError:
+                    ok = False
+                if ok:
+                    result.latencies.append(time.perf_counter() - started)
+                else:
+                    result.errors += 1
+
+        async def sample_pool():
+            while True:
+                metrics = await scrape(session, self.base_url)
+                capacity = metrics.get(("auth_db_pool_capacity", ()), 0)
+                if capacity:
+                    result.pool_samples.append(metrics.get(("auth_db_pool_checked_out", ()), 0) / capacity)
+                await asyncio.sleep(self.args.sample_interval)
+
+        before = await scrape(session, self.base_url)
+        sampler = asyncio.create_task(sample_pool())
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(self.args.clients)))
+        result.wall_seconds = time.perf_counter() - started
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+        after = await scrape(session, self.base_url)
+
+        lag_sum = ("auth_event_loop_lag_seconds_sum", ())
+        result.loop_blocked_seconds = after.get(lag_sum, 0.0) - before.get(lag_sum, 0.0)
+        result.loop_lag_p99 = lag_p99(before, after)
+        return result
+
+    async def run(self) -> dict[str, ScenarioResult]:
+        results = {}
+        # Сэмплер метрик не должен ждать свободного соединения в пуле клиентов
+        connector = aiohttp.TCPConnector(limit=self.args.clients + 1)
+        async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar()) as session:
+            await wait_ready(session, self.base_url, self.args.process)
+            for scenario in self.args.scenarios:
+                if scenario == "token" and not self.tokens:
+                    await self.collect_tokens(session)
+                results[scenario] = await self.run_scenario(scenario, session)
+        return results
+
+
+def print_report(results: dict[str, ScenarioResult], baseline: dict) -> dict:
+    report = {scenario: result.as_dict() for scenario, result in results.items()}
+    print(f"{'scenario':<16} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'loop blk%':>9} {'lag p99':>8} {'pool avg%':>9} {'pool max%':>9} {'delta p95':>10}")
+    for scenario, result in report.items():
+        delta = ""
+        if scenario in baseline:
+            delta = f"{result['p95_ms'] - baseline[scenario]['p95_ms']:+.1f}"
+        print(f"{scenario:<16} {result['requests']:>9} {result['errors']:>7} {result['rps']:>8} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['loop_blocked_pct']:>9} "
+              f"{result['loop_lag_p99_ms']:>8} {result['pool_avg_pct']:>9} {result['pool_max_pct']:>9} {delta:>10}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест auth_service")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=", ".join(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=20, help="одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=15, help="секунд на сценарий")
+    parser.add_argument("--users", type=int, default=100, help="тестовых пользователей")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="стоимость bcrypt хэшей")
+    parser.add_argument("--pool-size", type=int, help="DB_POOL_SIZE сервиса")
+    parser.add_argument("--max-overflow", type=int, help="DB_MAX_OVERFLOW сервиса")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--url", help="уже запущенный сервис вместо запуска uvicorn")
+    parser.add_argument("--sample-interval", type=float, default=0.2, help="период опроса /metrics, с")
+    parser.add_argument("--send-email", action="store_true", help="не отключать SMTP в сервисе")
+    parser.add_argument("--save", help="сохранить результат в JSON")
+    parser.add_argument("--compare", help="сравнить с сохраненным результатом")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    create_users(args.users, args.bcrypt_rounds)
+    args.process = None if args.url else start_service(args)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        results = asyncio.run(LoadRunner(args, base_url).run())
+    finally:
+        if args.process is not None:
+            args.process.terminate()
+            args.process.wait(timeout=10)
+        delete_users()
+
+    report = print_report(results, baseline)
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Нагрузочный тест бота hr_service.
+
+Диспетчер из hr_service/bot.py запускается в режиме polling против локальной
+заглушки Bot API (benchmarks/fake_telegram_api.py). N виртуальных кандидатов
+одновременно проходят путь: /start -> код приглашения -> согласие с политикой ->
+список документов -> выбор документа -> загрузка файла. В отчете по каждому шагу:
+p50/p95/p99 времени обработки апдейта, время от отправки апдейта до конца
+обработки, SQL-запросы на апдейт, ответы с ошибкой и общая пропускная способность.
+
+Нужны Postgres с данными (make seed) и MinIO из docker-compose: бот работает
+с ними по-настоящему. Берутся приглашенные кандидаты без чата, после прогона
+их состояние восстанавливается (файлы в MinIO остаются).
+
+    python benchmarks/bot_load.py --candidates 50 --save before.json
+    python benchmarks/bot_load.py --candidates 50 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+from fake_telegram_api import FakeTelegramApi
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIR = ROOT / "hr_service"
+
+# Чаты виртуальных кандидатов не пересекаются с чатами из seed_dataset.py
+CHAT_ID_BASE = 9_000_000_000
+ERROR_PREFIXES = ("⚠️", "❌")
+DOCS_BUTTON = "📁 Мои документы"
+
+
+class FlowError(Exception):
+    """Бот ответил не так, как ожидает сценарий"""
+
+
+@dataclass
+class UpdateResult:
+    seconds: float
+    queries: int
+    failed: bool
+
+
+@dataclass
+class StepStats:
+    handler_seconds: list = field(default_factory=list)
+    e2e_seconds: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    errors: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "count": len(self.handler_seconds),
+            "errors": self.errors,
+            "p50_ms": percentile(self.handler_seconds, 50),
+            "p95_ms": percentile(self.handler_seconds, 95),
+            "p99_ms": percentile(self.handler_seconds, 99),
+            "e2e_p95_ms": percentile(self.e2e_seconds, 95),
+            "queries": round(sum(self.queries) / len(self.queries), 1) if self.queries else 0.0,
+        }
+
+
+def percentile(values: list, q: float) -> float:
+    """Перцентиль по ближайшему рангу, в миллисекундах"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return round(ordered[index] * 1000, 1)
+
+
+def make_update_probe(waiters: dict):
+    """
+    Outer middleware апдейтов: время обработки и число SQL-запросов.
+    Регистрируется после FSM-мидлвари, поэтому ожидание блокировки чата не учитывается
+    """
+    from aiogram import BaseMiddleware
+    from aiogram.types import TelegramObject
+    from repository.query_trace import count_queries
+
+    class UpdateProbe(BaseMiddleware):
+        async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+        ) -> Any:
+            started = time.perf_counter()
+            failed = False
+            with count_queries() as counter:
+                try:
+                    return await handler(event, data)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    waiter = waiters.pop(event.update_id, None)
+                    if waiter is not None and not waiter.done():
+                        waiter.set_result(UpdateResult(time.perf_counter() - started, counter.queries, failed))
+
+    return UpdateProbe()
+
+
+class VirtualCandidate:
+    """Кандидат, который проходит сценарий через заглушку Bot API"""
+
+    def __init__(self, runner: "LoadRunner", index: int, invitation_code: str):
+        self.runner = runner
+        self.api = runner.api
+        self.chat_id = CHAT_ID_BASE + index
+        self.user = {"id": self.chat_id, "is_bot": False, "first_name": f"Bench{index}"}
+        self.invitation_code = invitation_code
+        self.rng = random.Random(runner.seed + index)
+
+    def message(self, **fields) -> dict:
+        return {"message": self.api.message(self.chat_id, **{"from": self.user}, **fields)}
+
+    def callback(self, data: str) -> dict:
+        return {
+            "callback_query": {
+                "id": str(self.api.next_message_id()),
+                "from": self.user,
+                "chat_instance": str(self.chat_id),
+                "data": data,
+                "message": self.api.message(self.chat_id, text="..."),
+            }
+        }
+
+    def button(self, prefix: str, exclude: set = frozenset()) -> str:
+        buttons = [
+            data for _, data in self.api.last_keyboard(self.chat_id)
+            if data.startswith(prefix) and data not in exclude
+        ]
+        if not buttons:
+            raise FlowError(f"нет кнопки {prefix}")
+        return self.rng.choice(buttons)
+
+    async def step(self, name: str, payload: dict):
+        loop = asyncio.get_running_loop()
+        sent_before = len(self.api.sent[self.chat_id])
+        update_id = self.api.push_update(payload)
+        waiter = loop.create_future()
+        self.runner.waiters[update_id] = waiter
+        started = time.perf_counter()
+        stats = self.runner.steps.setdefault(name, StepStats())
+        try:
+            result = await asyncio.wait_for(waiter, self.runner.step_timeout)
+        except asyncio.TimeoutError:
+            self.runner.waiters.pop(update_id, None)
+            stats.errors += 1
+            raise FlowError(f"{name}: нет ответа за {self.runner.step_timeout} с")
+
+        replies = self.api.sent[self.chat_id][sent_before:]
+        stats.handler_seconds.append(result.seconds)
+        stats.e2e_seconds.append(time.perf_counter() - started)
+        stats.queries.append(result.queries)
+        if result.failed or any(reply["text"].startswith(ERROR_PREFIXES) for reply in replies):
+            stats.errors += 1
+        if self.runner.think_seconds:
+            await asyncio.sleep(self.rng.expovariate(1 / self.runner.think_seconds))
+
+    async def run(self):
+        await self.step("start", self.message(text="/start"))
+        await self.step("invitation_code", self.message(text=self.invitation_code))
+        await self.step("privacy_accept", self.callback(self.button("privacy_accept")))
+        uploaded = set()
+        for upload in range(self.runner.uploads):
+            await self.step("docs", self.message(text=DOCS_BUTTON))
+            # Загруженный документ уже нельзя загрузить заново без запроса новой версии
+            document = self.button("doc_", exclude=uploaded)
+            uploaded.add(document)
+            await self.step("document", self.callback(document))
+            await self.step("upload_button", self.callback(self.button("upload_")))
+            file_id = f"bench-{self.chat_id}-{upload}"
+            await self.step("upload_file", self.message(document={
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_name": "scan.pdf",
+                "mime_type": "application/pdf",
+                "file_size": len(self.api.file_content),
+            }))
+
+
+class LoadRunner:
+    def __init__(self, args):
+        self.api = FakeTelegramApi(file_size=args.file_size)
+        self.waiters: dict = {}
+        self.steps: dict[str, StepStats] = {}
+        self.seed = args.seed
+        self.uploads = args.uploads
+        self.think_seconds = args.think_ms / 1000
+        self.step_timeout = args.step_timeout
+        self.ramp_seconds = args.ramp
+        self.total = 0
+
+    async def run_candidate(self, index: int, invitation_code: str):
+        if self.ramp_seconds:
+            await asyncio.sleep(self.ramp_seconds * index / max(self.total, 1))
+        await VirtualCandidate(self, index, invitation_code).run()
+
+    async def run(self, bot_module, candidates: list[tuple]) -> tuple[float, list]:
+        from aiogram.client.telegram import TelegramAPIServer
+
+        base_url = await self.api.start()
+        bot_module.bot.session.api = TelegramAPIServer.from_base(base_url)
+        bot_module.dp.update.outer_middleware(make_update_probe(self.waiters))
+        polling = asyncio.create_task(
+            bot_module.dp.start_polling(bot_module.bot, handle_signals=False, polling_timeout=1)
+        )
+        try:
+            while not self.api.calls["getUpdates"]:
+                if polling.done():
+                    polling.result()
+                await asyncio.sleep(0.05)
+
+            self.total = len(candidates)
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(self.run_candidate(index, code) for index, (_, code, _) in enumerate(candidates)),
+                return_exceptions=True,
+            )
+            wall_seconds = time.perf_counter() - started
+        finally:
+            if not polling.done():
+                await bot_module.dp.stop_polling()
+            await asyncio.gather(polling, return_exceptions=True)
+            await self.api.stop()
+        return wall_seconds, [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+
+
+def pick_candidates(count: int) -> list[tuple]:
+    """Приглашенные кандидаты, которые еще не заходили в бота"""
+    from repository.database import get_connection
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT candidate_uuid::text, invitation_code, registered_at
+                FROM hr.candidate
+                WHERE status_id = 2 AND telegram_chat_id IS NULL AND NOT agreement_accepted
+                ORDER BY candidate_uuid
+                LIMIT %s
+            """, (count,))
+            return cursor.fetchall()
+
+
+def restore_candidates(candidates: list[tuple]):
+    """Возвращает кандидатов и их чаты в состояние до прогона"""
+    from repository.audit_events import audit_events
+    from repository.database import get_connection
+
+    # События аудита пишутся в фоне: дописываем буфер, чтобы удалить их вместе с чатами
+    audit_events.flush()
+
+    uuids = [candidate_uuid for candidate_uuid, _, _ in candidates]
+    chat_ids = [CHAT_ID_BASE + index for index in range(len(candidates))]
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM hr.document_history
+                WHERE document_uuid IN (
+                    SELECT document_id FROM hr.candidate_document WHERE candidate_id = ANY(%s::uuid[])
+                )
+            """, (uuids,))
+            cursor.execute("DELETE FROM hr.candidate_document WHERE candidate_id = ANY(%s::uuid[])", (uuids,))
+            cursor.execute("DELETE FROM hr.candidate_location WHERE candidate_uuid = ANY(%s::uuid[])", (uuids,))
+            cursor.execute("DELETE FROM comm.message WHERE chat_id = ANY(%s)", (chat_ids,))
+            cursor.execute("DELETE FROM comm.audit_event WHERE chat_id = ANY(%s)", (chat_ids,))
+            cursor.execute("DELETE FROM comm.chat_status WHERE chat_id = ANY(%s)", (chat_ids,))
+            cursor.execute("DELETE FROM comm.telegram_chat WHERE chat_id = ANY(%s)", (chat_ids,))
+            cursor.executemany("""
+                UPDATE hr.candidate
+                SET telegram_chat_id = NULL,
+                    status_id = 2,
+                    registered_at = %s,
+                    agreement_accepted = FALSE,
+                    agreement_accepted_at = NULL
+                WHERE candidate_uuid = %s
+            """, [(registered_at, candidate_uuid) for candidate_uuid, _, registered_at in candidates])
+        conn.commit()
+
+
+def print_report(runner: LoadRunner, wall_seconds: float, failures: list, baseline: dict) -> dict:
+    results = {name: stats.as_dict() for name, stats in runner.steps.items()}
+    updates = sum(result["count"] for result in results.values())
+    api_calls = sum(count for method, count in runner.api.calls.items() if method != "getUpdates")
+
+    print(f"{'step':<16} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'e2e p95':>8} {'queries':>8} {'delta p95':>10}")
+    for name, result in results.items():
+        delta = ""
+        if name in baseline.get("steps", {}):
+            delta = f"{result['p95_ms'] - baseline['steps'][name]['p95_ms']:+.1f}"
+        print(f"{name:<16} {result['count']:>7} {result['errors']:>7} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['p99_ms']:>8} {result['e2e_p95_ms']:>8} {result['queries']:>8} {delta:>10}")
+
+    throughput = updates / wall_seconds if wall_seconds else 0.0
+    print(f"\nапдейтов: {updates} за {wall_seconds:.1f} с, {throughput:.1f} апдейтов/с"
+          + (f" (было {baseline['throughput']:.1f})" if "throughput" in baseline else ""))
+    print(f"вызовов Bot API на апдейт: {api_calls / updates if updates else 0:.1f}")
+    if failures:
+        print(f"сценарий прерван у {len(failures)} кандидатов, например: {failures[0]}")
+    return {"steps": results, "throughput": round(throughput, 1), "failed_flows": len(failures)}
+
+
+def print_top_queries(limit: int):
+    from repository.query_trace import preview_statement, query_tracer
+
+    if query_tracer is None or not limit:
+        return
+    print("\nсамые дорогие запросы (QUERY_TRACE):")
+    for stat in query_tracer.top(limit):
+        result = stat.as_dict()
+        print(f"  {result['total_ms']:>9} мс {result['calls']:>7} раз  {stat.call_site}  "
+              f"{preview_statement(stat.statement)[:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота с заглушкой Telegram Bot API")
+    parser.add_argument("--candidates", type=int, default=20, help="одновременных кандидатов")
+    parser.add_argument("--uploads", type=int, default=1, help="загрузок документов на кандидата")
+    parser.add_argument("--think-ms", type=float, default=0, help="средняя пауза между шагами кандидата")
+    parser.add_argument("--ramp", type=float, default=0, help="за сколько секунд стартуют все кандидаты")
+    parser.add_argument("--step-timeout", type=float, default=30)
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="размер загружаемого файла, байт")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top-queries", type=int, default=5, help="сколько запросов показать при QUERY_TRACE")
+    parser.add_argument("--keep", action="store_true", help="не восстанавливать кандидатов после прогона")
+    parser.add_argument("--save", help="сохранить результат в JSON")
+    parser.add_argument("--compare", help="сравнить с сохраненным результатом")
+    args = parser.parse_args()
+    # Пути из аргументов - относительно текущего каталога, до перехода в hr_service
+    save_path = Path(args.save).resolve() if args.save else None
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCHMARK-TOKEN")
+    os.chdir(SERVICE_DIR)
+    sys.path[:0] = [str(SERVICE_DIR), str(ROOT)]
+    import bot as bot_module
+
+    # Логи хендлеров на каждый апдейт искажают замер
+    logging.getLogger().setLevel(logging.WARNING)
+
+    candidates = pick_candidates(args.candidates)
+    if len(candidates) < args.candidates:
+        sys.exit(f"Приглашенных кандидатов без чата: {len(candidates)}, нужно {args.candidates}. "
+                 f"Заполните базу: make seed")
+
+    runner = LoadRunner(args)
+
+    async def run():
+        try:
+            return await runner.run(bot_module, candidates)
+        finally:
+            await bot_module.dp.fsm.close()
+
+    try:
+        wall_seconds, failures = asyncio.run(run())
+    finally:
+        if not args.keep:
+            restore_candidates(candidates)
+
+    results = print_report(runner, wall_seconds, failures, baseline)
+    print_top_queries(args.top_queries)
+    if save_path:
+        save_path.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
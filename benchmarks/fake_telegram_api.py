@@ -0,0 +1,132 @@
+"""
+Локальная заглушка Telegram Bot API для нагрузочных тестов бота.
+
+Отдает апдейты через getUpdates из очереди, которую наполняет тест,
+принимает ответы бота (sendMessage, editMessageText, sendDocument, ...)
+и сохраняет их по чатам, отдает файлы через getFile и /file/bot<token>/...
+"""
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict, deque
+from typing import Optional
+
+from aiohttp import web
+
+# Методы, которые возвращают Message; остальные отвечают True
+MESSAGE_METHODS = {
+    "sendMessage", "sendDocument", "sendPhoto", "sendLocation",
+    "editMessageText", "editMessageReplyMarkup", "editMessageCaption",
+}
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+
+class FakeTelegramApi:
+    """Заглушка Bot API: очередь апдейтов и журнал ответов бота по чатам"""
+
+    def __init__(self, file_size: int = 256 * 1024):
+        self.file_content = b"%PDF-1.4\n" + b"0" * max(file_size - 9, 0)
+        self.calls: Counter = Counter()
+        self.sent: dict[int, list[dict]] = defaultdict(list)
+        self._updates: deque = deque()
+        self._update_id = 0
+        self._message_id = 0
+        self._has_updates = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle_method)
+        app.router.add_get("/file/bot{token}/{path:.+}", self._handle_file)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def push_update(self, payload: dict) -> int:
+        """Ставит апдейт в очередь getUpdates, возвращает его update_id"""
+        self._update_id += 1
+        self._updates.append({"update_id": self._update_id, **payload})
+        self._has_updates.set()
+        return self._update_id
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def message(self, chat_id: int, **fields) -> dict:
+        return {
+            "message_id": self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            **fields,
+        }
+
+    def last_keyboard(self, chat_id: int) -> list[tuple[str, str]]:
+        """Кнопки (текст, callback_data) последнего ответа бота с инлайн-клавиатурой"""
+        for sent in reversed(self.sent[chat_id]):
+            markup = sent.get("reply_markup")
+            if markup and "inline_keyboard" in markup:
+                return [
+                    (button["text"], button.get("callback_data", ""))
+                    for row in markup["inline_keyboard"] for button in row
+                ]
+        return []
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        # offset подтверждает все апдейты до него
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(self._updates)[:limit]
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        form = await request.post()
+        params = {key: value for key, value in form.items() if isinstance(value, str)}
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if method == "getMe":
+            return self._ok(BOT_USER)
+        if method == "getFile":
+            file_id = params.get("file_id", "file")
+            return self._ok({
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_size": len(self.file_content),
+                "file_path": f"documents/{file_id}.pdf",
+            })
+        if method in MESSAGE_METHODS:
+            chat_id = int(params.get("chat_id", 0))
+            sent = {"method": method, "text": params.get("text", "")}
+            if "reply_markup" in params:
+                sent["reply_markup"] = json.loads(params["reply_markup"])
+            self.sent[chat_id].append(sent)
+            return self._ok(self.message(chat_id, text=sent["text"]))
+        return self._ok(True)
+
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        self.calls["downloadFile"] += 1
+        return web.Response(body=self.file_content, content_type="application/octet-stream")
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
@@ -0,0 +1,119 @@
+"""
+Бенчмарк времени импорта модулей hr_service.
+
+Каждый модуль импортируется в отдельном процессе с `python -X importtime`,
+замер повторяется несколько раз, в отчет попадает медиана и самые тяжелые
+зависимости. Результат можно сохранить в JSON и сравнить с прошлым запуском:
+
+    python benchmarks/import_time.py --save before.json
+    python benchmarks/import_time.py --compare before.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIR = ROOT / "hr_service"
+
+# Холодный старт бота и модули, которые загружает сессия портала при открытии страниц
+DEFAULT_MODULES = [
+    "bot",
+    "repository.bot_repositoty",
+    "service.gemini_service",
+    "frontend_auth.auth",
+    "pgs.Чат",
+    "pgs.Кандидаты",
+    "pgs.Документы",
+    "pgs.Дашборд",
+]
+
+# Заглушки, без которых модули не импортируются вне docker-compose
+BENCH_ENV = {
+    "TELEGRAM_TOKEN": "123456:BENCHMARK-TOKEN",
+    "FSM_STORAGE": "memory",
+    "GEMINI_BACKEND": "stub",
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def measure(module: str) -> dict:
+    """Один запуск: общее время процесса и разбор вывода -X importtime"""
+    env = {**os.environ, **BENCH_ENV, "PYTHONPATH": str(ROOT)}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVICE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(error)
+
+    cumulative_ms = 0.0
+    packages: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = int(match.group(1)), int(match.group(2)), match.group(3)
+        if name == module:
+            cumulative_ms = cumulative_us / 1000
+        # Собственное время модулей суммируется по пакету верхнего уровня (pandas, numpy, google, ...)
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_us / 1000
+
+    return {"wall_ms": wall_ms, "import_ms": cumulative_ms, "packages": packages}
+
+
+def benchmark(module: str, repeat: int) -> dict:
+    runs = [measure(module) for _ in range(repeat)]
+    heaviest = sorted(runs[-1]["packages"].items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 1),
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "heaviest": [(name, round(ms, 1)) for name, ms in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта модулей hr_service")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="сохранить результат в JSON")
+    parser.add_argument("--compare", help="сравнить с сохраненным результатом")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    results = {}
+
+    print(f"{'module':<28} {'import ms':>10} {'process ms':>11} {'delta':>9}  heaviest")
+    for module in args.modules:
+        try:
+            stats = benchmark(module, args.repeat)
+        except RuntimeError as e:
+            print(f"{module:<28} ошибка импорта: {e}")
+            continue
+        results[module] = stats
+
+        delta = ""
+        if module in baseline:
+            delta = f"{stats['import_ms'] - baseline[module]['import_ms']:+.1f}"
+        heaviest = ", ".join(f"{name} {ms}" for name, ms in stats["heaviest"])
+        print(f"{module:<28} {stats['import_ms']:>10} {stats['wall_ms']:>11} {delta:>9}  {heaviest}")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Профилирование страниц Streamlit-приложения hr_service.
+
+Страницы из hr_service/main.py отрисовываются без браузера через
+streamlit.testing.v1.AppTest под пользователем с нужной ролью. Каждая
+страница прогоняется несколько раз в одной сессии, как при повторных
+rerun: первый прогон (импорт модулей, пустой st.cache_data) показывается
+отдельно, по остальным - медиана и p95. В отчете: время отрисовки страницы,
+время всего прогона AppTest, число SQL-запросов, строк и байт, полученных
+из базы за один rerun.
+
+Нужен Postgres с данными (make seed). По --profile последний прогон каждой
+страницы снимается cProfile (.prof для snakeviz/pstats) или pyinstrument
+(HTML с flamegraph).
+
+    python benchmarks/page_profile.py --save before.json
+    python benchmarks/page_profile.py dash chat_open --runs 10 --compare before.json
+    python benchmarks/page_profile.py candidates --profile cprofile --profile-dir profiles
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIR = ROOT / "hr_service"
+
+# Сценарий -> (модуль, функция отрисовки). Как PAGES в main.py, плюс состояния,
+# в которых страница показывает карточку кандидата или открытый чат
+PAGES = {
+    "candidates": ("pgs.Кандидаты", "candidates"),
+    "candidate_details": ("pgs.Кандидаты", "candidates"),
+    "chat": ("pgs.Чат", "chat"),
+    "chat_open": ("pgs.Чат", "chat"),
+    "dash": ("pgs.Дашборд", "dash"),
+    "docs": ("pgs.Документы", "docs"),
+    "employees": ("pgs.Сотрудники", "render_employees_page"),
+    "archive": ("pgs.Архив", "render_archived_candidates_page"),
+}
+ROLES = {"admin": [1], "hr": [3]}
+
+# Скрипт, который AppTest выполняет на каждый rerun. Страница может вызвать
+# st.rerun, тогда скрипт выполняется повторно в рамках того же прогона -
+# результаты суммируются; st.stop и st.rerun бросают исключения, поэтому
+# результат сохраняется в finally
+SCRIPT = '''
+import importlib
+import time
+
+import streamlit as st
+from repository.query_trace import count_queries
+
+module_name, render_name = st.session_state["_bench_page"]
+profiler = st.session_state.get("_bench_profiler")
+result = st.session_state.get("_bench_result") or {
+    "render_seconds": 0.0, "queries": 0, "rows": 0, "bytes": 0, "executions": 0,
+}
+started = time.perf_counter()
+try:
+    with count_queries() as counter:
+        if profiler:
+            profiler[0]()
+        try:
+            getattr(importlib.import_module(module_name), render_name)()
+        finally:
+            if profiler:
+                profiler[1]()
+finally:
+    result["render_seconds"] += time.perf_counter() - started
+    result["queries"] += counter.queries
+    result["rows"] += counter.rows
+    result["bytes"] += counter.bytes
+    result["executions"] += 1
+    st.session_state["_bench_result"] = result
+'''
+
+
+@dataclass
+class PageStats:
+    render_seconds: list = field(default_factory=list)
+    run_seconds: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    rows: list = field(default_factory=list)
+    bytes: list = field(default_factory=list)
+    executions: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        # Первый прогон - холодный, по остальным считаем установившееся значение
+        warm = slice(1, None) if len(self.render_seconds) > 1 else slice(None)
+        return {
+            "runs": len(self.render_seconds),
+            "first_ms": round(self.render_seconds[0] * 1000, 1) if self.render_seconds else 0.0,
+            "p50_ms": percentile_ms(self.render_seconds[warm], 50),
+            "p95_ms": percentile_ms(self.render_seconds[warm], 95),
+            "run_p50_ms": percentile_ms(self.run_seconds[warm], 50),
+            "queries": median(self.queries[warm]),
+            "first_queries": self.queries[0] if self.queries else 0,
+            "rows": median(self.rows[warm]),
+            "kb": round(median(self.bytes[warm]) / 1024, 1),
+            "reruns": max(self.executions, default=0),
+            "errors": len(self.errors),
+        }
+
+
+def percentile_ms(values: list, percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+    return round(ordered[index] * 1000, 1)
+
+
+def median(values: list) -> float:
+    return round(statistics.median(values), 1) if values else 0.0
+
+
+def pick_state(scenario: str) -> dict:
+    """Состояние сессии для сценария: самый тяжелый кандидат или чат из базы"""
+    from repository.database import get_connection
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            if scenario == "candidate_details":
+                cursor.execute("""
+                    SELECT d.candidate_id::text
+                    FROM hr.candidate_document d
+                    GROUP BY d.candidate_id
+                    ORDER BY count(*) DESC
+                    LIMIT 1
+                """)
+                row = cursor.fetchone()
+                return {"selected_candidate": row[0]} if row else {}
+            if scenario == "chat_open":
+                cursor.execute("""
+                    SELECT c.telegram_chat_id, c.first_name || ' ' || c.last_name
+                    FROM comm.message m
+                    JOIN hr.candidate c ON c.telegram_chat_id = m.chat_id
+                    GROUP BY c.telegram_chat_id, c.first_name, c.last_name
+                    ORDER BY count(*) DESC
+                    LIMIT 1
+                """)
+                row = cursor.fetchone()
+                return {"selected_chat": row[0], "candidate_name": row[1]} if row else {}
+    return {}
+
+
+def pick_tutor():
+    """Куратор с наибольшим числом кандидатов - для прогона под ролью hr"""
+    from repository.database import get_connection
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT tutor_uuid::text
+                FROM hr.candidate
+                WHERE tutor_uuid IS NOT NULL
+                GROUP BY tutor_uuid
+                ORDER BY count(*) DESC
+                LIMIT 1
+            """)
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+
+def auth_state(user_uuid: str, roles_ids: list) -> dict:
+    """
+    Сессия уже вошедшего пользователя: check_auth не проверяет токен, пока
+    last_check свежий, а get_current_user_data читает его без проверки подписи
+    """
+    import jwt
+    from frontend_auth.auth import UserTokenData
+
+    payload = {"user_uuid": user_uuid, "roles_ids": roles_ids}
+    return {
+        "token": jwt.encode(payload, "page-profile", algorithm="HS256"),
+        "user": UserTokenData(**payload),
+        "last_check": datetime.now(),
+    }
+
+
+def make_profiler(kind: str):
+    if kind == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        return profiler, (profiler.enable, profiler.disable)
+    from pyinstrument import Profiler
+
+    profiler = Profiler()
+    return profiler, (profiler.start, profiler.stop)
+
+
+def save_profile(kind: str, profiler, directory: Path, scenario: str, top: int):
+    directory.mkdir(parents=True, exist_ok=True)
+    if kind == "cprofile":
+        import pstats
+
+        path = directory / f"{scenario}.prof"
+        profiler.dump_stats(path)
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(top)
+        print(buffer.getvalue())
+    else:
+        path = directory / f"{scenario}.html"
+        path.write_text(profiler.output_html())
+    print(f"профиль {scenario}: {path}")
+
+
+def profile_page(scenario: str, args, user: dict, profile_dir: Path) -> PageStats:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    stats = PageStats()
+    at = AppTest.from_string(SCRIPT, default_timeout=args.timeout)
+    at.session_state["auth"] = auth_state(user["user_uuid"], user["roles_ids"])
+    at.session_state["_bench_page"] = PAGES[scenario]
+    for key, value in pick_state(scenario).items():
+        at.session_state[key] = value
+
+    profiler = None
+    for run in range(args.runs):
+        if args.clear_cache:
+            st.cache_data.clear()
+        if args.profile and run == args.runs - 1:
+            profiler, hooks = make_profiler(args.profile)
+            at.session_state["_bench_profiler"] = hooks
+        at.session_state["_bench_result"] = None
+
+        started = time.perf_counter()
+        at.run()
+        stats.run_seconds.append(time.perf_counter() - started)
+
+        result = at.session_state["_bench_result"] or {}
+        stats.render_seconds.append(result.get("render_seconds", 0.0))
+        stats.queries.append(result.get("queries", 0))
+        stats.rows.append(result.get("rows", 0))
+        stats.bytes.append(result.get("bytes", 0))
+        stats.executions.append(result.get("executions", 0))
+        stats.errors.extend(exception.message for exception in at.exception)
+
+    if profiler is not None:
+        save_profile(args.profile, profiler, profile_dir, scenario, args.profile_top)
+    return stats
+
+
+def print_report(results: dict, baseline: dict) -> dict:
+    print(f"{'page':<18} {'first ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'run ms':>8} {'queries':>8} "
+          f"{'rows':>8} {'KB':>8} {'reruns':>7} {'errors':>7} {'delta p50':>10}")
+    for name, result in results.items():
+        delta = ""
+        if name in baseline.get("pages", {}):
+            delta = f"{result['p50_ms'] - baseline['pages'][name]['p50_ms']:+.1f}"
+        print(f"{name:<18} {result['first_ms']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['run_p50_ms']:>8} {result['queries']:>8} {result['rows']:>8} {result['kb']:>8} "
+              f"{result['reruns']:>7} {result['errors']:>7} {delta:>10}")
+    return {"pages": results}
+
+
+def print_top_queries(limit: int):
+    from repository.query_trace import preview_statement, query_tracer
+
+    if query_tracer is None or not limit:
+        return
+    print("\nсамые дорогие запросы (QUERY_TRACE):")
+    for stat in query_tracer.top(limit):
+        result = stat.as_dict()
+        print(f"  {result['total_ms']:>9} мс {result['calls']:>7} раз  {stat.call_site}  "
+              f"{preview_statement(stat.statement)[:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Профилирование страниц Streamlit без браузера")
+    parser.add_argument("pages", nargs="*", help=f"страницы из {', '.join(PAGES)}; по умолчанию все")
+    parser.add_argument("--runs", type=int, default=5, help="прогонов на страницу, первый - холодный")
+    parser.add_argument("--role", choices=sorted(ROLES), default="admin",
+                        help="hr - пользователь-куратор с наибольшим числом кандидатов")
+    parser.add_argument("--clear-cache", action="store_true", help="сбрасывать st.cache_data перед каждым прогоном")
+    parser.add_argument("--timeout", type=float, default=120, help="таймаут одного прогона AppTest, с")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="профилировать последний прогон")
+    parser.add_argument("--profile-dir", default="profiles", help="куда сохранять профили")
+    parser.add_argument("--profile-top", type=int, default=25, help="строк pstats в выводе для cprofile")
+    parser.add_argument("--top-queries", type=int, default=5, help="сколько запросов показать при QUERY_TRACE")
+    parser.add_argument("--save", help="сохранить результат в JSON")
+    parser.add_argument("--compare", help="сравнить с сохраненным результатом")
+    args = parser.parse_args()
+    unknown = [page for page in args.pages if page not in PAGES]
+    if unknown:
+        parser.error(f"неизвестные страницы: {', '.join(unknown)}; доступны: {', '.join(PAGES)}")
+    if args.runs < 1:
+        parser.error("--runs должен быть не меньше 1")
+    # Пути из аргументов - относительно текущего каталога, до перехода в hr_service
+    save_path = Path(args.save).resolve() if args.save else None
+    profile_dir = Path(args.profile_dir).resolve()
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCHMARK-TOKEN")
+    os.environ.setdefault("GEMINI_BACKEND", "stub")
+    os.chdir(SERVICE_DIR)
+    sys.path[:0] = [str(SERVICE_DIR), str(ROOT)]
+    logging.getLogger().setLevel(logging.WARNING)
+
+    user = {"user_uuid": str(uuid.uuid4()), "roles_ids": ROLES[args.role]}
+    if args.role == "hr":
+        user["user_uuid"] = pick_tutor()
+        if not user["user_uuid"]:
+            sys.exit("В базе нет кандидатов с куратором. Заполните базу: make seed")
+
+    results = {}
+    errors = {}
+    for scenario in args.pages or list(PAGES):
+        stats = profile_page(scenario, args, user, profile_dir)
+        results[scenario] = stats.as_dict()
+        if stats.errors:
+            errors[scenario] = stats.errors[0]
+
+    report = print_report(results, baseline)
+    for scenario, message in errors.items():
+        print(f"{scenario}: ошибка на странице: {message}")
+    print_top_queries(args.top_queries)
+    if save_path:
+        save_path.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+
+Создает схему миграциями alembic (alembic upgrade head) и заполняет
+таблицы данными с правдоподобными распределениями: статусы кандидатов
+и документов согласованы между собой, история документов идет по реальным
+переходам статусов, число сообщений на чат распределено с тяжелым хвостом,
+сообщения пишутся в порядке отправки, как в проде.
+Данные загружаются через COPY, одинаковый --seed дает одинаковый набор.
+
+    python benchmarks/seed_dataset.py --truncate
+    python benchmarks/seed_dataset.py --candidates 1000 --messages 10000 --truncate
+
+Подключение берется из DB_HOST/DB_PORT/DB_USER/DB_PASSWORD/DB_NAME,
+как у alembic. У всех сотрудников один пароль (--password).
+"""
+import argparse
+import heapq
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Таблицы, которые заполняет генератор; TRUNCATE ... CASCADE чистит и зависимые
+SEEDED_TABLES = [
+    "comm.audit_event",
+    "comm.message",
+    "comm.chat_status",
+    "comm.telegram_chat",
+    "hr.candidate_summary",
+    "hr.candidate_location",
+    "hr.document_history",
+    "hr.candidate_document",
+    "hr.document_template",
+    "hr.candidate_archive",
+    "hr.candidate",
+    "hr.candidate_status",
+    "hr.document_status",
+    "auth.user_location",
+    'auth."user"',
+    "auth.work_type",
+    "auth.position",
+    "auth.position_list",
+    "auth.division",
+    "auth.district_group",
+    "auth.district",
+    "auth.management",
+    "auth.department",
+    "auth.role",
+    'auth."group"',
+    "auth.action",
+    "auth.service_table",
+    "auth.service",
+]
+
+# Значения совпадают с DOCUMENT_STATUSES и CANDIDATE_STATUSES из hr_service/core/config.py
+DOCUMENT_STATUSES = {
+    1: "Не загружен",
+    2: "Заказан",
+    3: "Ожидает проверки",
+    4: "Проверен",
+    5: "Требуется новый вариант",
+}
+CANDIDATE_STATUSES = {
+    2: ("Приглашен", False),
+    3: ("Зарегистрирован", False),
+    5: ("Документы на проверке", False),
+    7: ("Принят", True),
+    8: ("Отклонен", True),
+}
+CANDIDATE_STATUS_WEIGHTS = {2: 0.12, 3: 0.23, 5: 0.30, 7: 0.25, 8: 0.10}
+
+# Распределение статусов документа в зависимости от статуса кандидата
+DOCUMENT_STATUS_WEIGHTS = {
+    3: {1: 0.55, 2: 0.10, 3: 0.30, 5: 0.05},
+    5: {1: 0.05, 2: 0.05, 3: 0.55, 4: 0.25, 5: 0.10},
+    7: {4: 1.0},
+    8: {1: 0.30, 3: 0.20, 4: 0.30, 5: 0.20},
+}
+
+TEMPLATES = [
+    ("Паспорт", "Скан паспорта", True, 1, "Загрузите скан паспорта"),
+    ("ИНН", "Скан ИНН", True, 1, "Загрузите скан ИНН"),
+    ("СНИЛС", "Скан СНИЛС", True, 1, "Загрузите скан СНИЛС"),
+    ("Выписка банка", "Выписка с банковского счета в Excel", True, 1, "Загрузите выписку с банковского счета"),
+    ("Трудовая книжка", "Скан или электронная трудовая книжка", True, 3, "Загрузите все заполненные страницы"),
+    ("Фото 3x4", "Цветная фотография", False, 1, "Загрузите фотографию на светлом фоне"),
+    ("Диплом", "Документ об образовании", False, 5, "Загрузите диплом с приложением"),
+    ("Медицинская справка", "Справка по форме 086/у", False, 7, "Загрузите справку"),
+]
+
+CONTENT_TYPES = [
+    ("application/pdf", "pdf", 0.55),
+    ("image/jpeg", "jpg", 0.30),
+    ("image/png", "png", 0.10),
+    ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", 0.05),
+]
+
+WORK_TYPES = [
+    (1, "Удалённо", "8:00-17:00", None, None, None),
+    (2, "Удалённо", "9:00-18:00", None, None, None),
+    (3, "Офис", "8:00-17:00", "Москва-Сити", 55.749473, 37.537052),
+    (4, "Офис", "9:00-18:00", "Москва-Сити", 55.749473, 37.537052),
+    (5, "Гибрид", "8:00-17:00", "пн, пт - офис", None, None),
+    (6, "Гибрид", "9:00-18:00", "пн, пт - офис", None, None),
+]
+
+ROLES = [(1, "admin"), (2, "hr_admin"), (3, "hr_user"), (4, "hr_candidate")]
+
+MALE_FIRST_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артем", "Илья",
+                    "Кирилл", "Михаил", "Никита", "Иван", "Егор", "Роман", "Павел", "Владимир"]
+FEMALE_FIRST_NAMES = ["Анна", "Мария", "Елена", "Ольга", "Наталья", "Екатерина", "Татьяна", "Ирина",
+                      "Светлана", "Юлия", "Анастасия", "Дарья", "Полина", "Виктория", "Ксения", "Алина"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+              "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров",
+              "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин"]
+MIDDLE_NAMES = ["Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", "Игоревич",
+                "Владимирович", "Павлович", "Михайлович", "Николаевич"]
+
+CANDIDATE_PHRASES = [
+    "Здравствуйте!", "Добрый день.", "Подскажите, пожалуйста, какие документы еще нужны?",
+    "Загрузил паспорт, проверьте, пожалуйста.", "Не получается отправить файл.",
+    "Спасибо!", "Когда будет готов ответ?", "Выписку заказал в банке, пришлю завтра.",
+    "Можно прислать фото вместо скана?", "Какой адрес офиса?", "Хорошо, понял.",
+    "Отправил исправленный вариант.", "Во сколько нужно подойти?", "Ок",
+]
+ADMIN_PHRASES = [
+    "Добрый день! Документ проверен.", "Пожалуйста, загрузите скан лучшего качества.",
+    "Нужны все страницы паспорта с пропиской.", "Спасибо, приняли.",
+    "Ждем выписку до конца недели.", "Напомню, что осталось загрузить СНИЛС.",
+    "Офис находится в Москва-Сити, башня Федерация.", "Ваш куратор свяжется с вами сегодня.",
+    "Да, фото подойдет, если все данные читаются.", "Приглашаем на оформление в понедельник к 10:00.",
+]
+
+MOSCOW = (55.7558, 37.6173)
+
+
+class CopyStream:
+    """Файлоподобный объект для copy_expert: кодирует строки генератора по мере чтения"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = bytearray()
+        self.count = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += ("\t".join(map(copy_value, row)) + "\n").encode("utf-8")
+            self.count += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+
+def copy_value(value) -> str:
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (list, tuple)):
+        return "{" + ",".join(str(item) for item in value) + "}"
+    text = value.isoformat(sep=" ") if isinstance(value, datetime) else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(conn, table: str, columns: list[str], rows) -> int:
+    """Загружает строки в таблицу через COPY и печатает скорость"""
+    stream = CopyStream(rows)
+    started = time.perf_counter()
+    with conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 16)
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    rate = stream.count / elapsed if elapsed else 0
+    print(f"{table:<24} {stream.count:>10} строк {elapsed:>8.1f} с {rate:>10.0f} строк/с")
+    return stream.count
+
+
+def weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def make_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def person(rng: random.Random) -> tuple[str, str, str, bool]:
+    """Имя, отчество, фамилия и пол (True - мужской)"""
+    male = rng.random() < 0.5
+    first_name = rng.choice(MALE_FIRST_NAMES if male else FEMALE_FIRST_NAMES)
+    middle_name = rng.choice(MIDDLE_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    if not male:
+        middle_name = middle_name[:-4] + "овна" if middle_name.endswith("ович") else middle_name[:-4] + "евна"
+        last_name += "а"
+    return first_name, middle_name, last_name, male
+
+
+def random_point(rng: random.Random, center: tuple[float, float], spread_km: float) -> tuple[float, float]:
+    """Точка вокруг центра: большинство рядом, хвост на десятки километров"""
+    distance = rng.expovariate(1 / spread_km)
+    angle = rng.uniform(0, 2 * math.pi)
+    latitude = center[0] + distance / 111.0 * math.cos(angle)
+    longitude = center[1] + distance / (111.0 * math.cos(math.radians(center[0]))) * math.sin(angle)
+    return round(latitude, 6), round(longitude, 6)
+
+
+def create_schema(run_migrations: bool):
+    """Схему целиком создают миграции, начиная с базовой ревизии 0000"""
+    if run_migrations:
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, check=True)
+
+
+def ensure_empty(conn, truncate: bool):
+    with conn.cursor() as cursor:
+        if truncate:
+            # С --skip-migrations части таблиц может не быть
+            cursor.execute(
+                "SELECT table_name FROM unnest(%s::text[]) AS table_name WHERE to_regclass(table_name) IS NOT NULL",
+                (SEEDED_TABLES,),
+            )
+            tables = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+            conn.commit()
+            return
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM hr.candidate) OR EXISTS (SELECT 1 FROM auth.\"user\")")
+        if cursor.fetchone()[0]:
+            sys.exit("В базе уже есть данные: запустите с --truncate, чтобы перезаписать их")
+
+
+def reset_sequences(conn):
+    """После COPY с явными id сдвигает последовательности за максимальный id"""
+    with conn.cursor() as cursor:
+        for table, column in [
+            ("auth.service", "service_id"), ("auth.service_table", "service_table_id"),
+            ("auth.action", "action_id"), ('auth."group"', "group_id"), ("auth.department", "department_id"),
+            ("auth.management", "management_id"), ("auth.district", "district_id"),
+            ("auth.district_group", "district_group_id"), ("auth.division", "division_id"),
+            ("auth.position_list", "position_list_id"), ("auth.position", "position_id"),
+            ("auth.work_type", "work_type_id"), ("hr.document_template", "template_id"),
+        ]:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE((SELECT max({column}) FROM {table}), 1))",
+                (table, column),
+            )
+    conn.commit()
+
+
+def seed_reference(conn, templates: int):
+    """Справочники auth и hr"""
+    copy_rows(conn, "auth.service", ["service_id", "service"], [(1, "hr")])
+    copy_rows(conn, "auth.service_table", ["service_table_id", "service_id", "service_table"],
+              [(1, 1, "candidate"), (2, 1, "candidate_document"), (3, 1, "message")])
+    copy_rows(conn, "auth.action", ["action_id", "action"], [(1, "read"), (2, "write"), (3, "delete")])
+    copy_rows(conn, 'auth."group"', ["group_id", '"group"', "service_table_id", "actions"],
+              [(1, "Кандидаты", 1, [1, 2]), (2, "Документы", 2, [1, 2, 3]), (3, "Чаты", 3, [1, 2])])
+    copy_rows(conn, "auth.role", ["role_id", "service_id", "role"], [(role_id, 1, role) for role_id, role in ROLES])
+    copy_rows(conn, "auth.department", ["department_id", "department"],
+              [(1, "Управление персоналом"), (2, "Продажи"), (3, "Логистика")])
+    copy_rows(conn, "auth.management", ["management_id", "management", "department_id"],
+              [(1, "Подбор", 1), (2, "Оформление", 1), (3, "Розница", 2), (4, "Опт", 2), (5, "Склад", 3),
+               (6, "Доставка", 3)])
+    districts = ["ЦАО", "САО", "СВАО", "ВАО", "ЮВАО", "ЮАО", "ЮЗАО", "ЗАО", "СЗАО", "ЗелАО"]
+    copy_rows(conn, "auth.district", ["district_id", "district"], list(enumerate(districts, start=1)))
+    copy_rows(conn, "auth.district_group", ["district_group_id", "description", "districts_ids"],
+              [(1, "Центр и север", [1, 2, 3, 9]), (2, "Восток и юг", [4, 5, 6]), (3, "Запад", [7, 8, 10])])
+    copy_rows(conn, "auth.division", ["division_id", "division", "management_id", "district_group_id"],
+              [(1, "Подбор: центр", 1, 1), (2, "Подбор: восток", 1, 2), (3, "Подбор: запад", 1, 3),
+               (4, "Оформление", 2, 1), (5, "Розница: центр", 3, 1), (6, "Склад: восток", 5, 2)])
+    copy_rows(conn, "auth.position_list", ["position_list_id", "position"],
+              [(1, "Руководитель"), (2, "Ведущий рекрутер"), (3, "Рекрутер"), (4, "Специалист по кадрам"),
+               (5, "Стажер")])
+    copy_rows(conn, "auth.position",
+              ["position_id", "position_list_id", "management_id", "division_id", "obey_id", "position_rank"],
+              [(1, 1, 1, None, None, 1), (2, 2, 1, 1, 1, 2), (3, 3, 1, 1, 2, 3), (4, 3, 1, 2, 2, 3),
+               (5, 3, 1, 3, 2, 3), (6, 1, 2, 4, None, 1), (7, 4, 2, 4, 6, 2), (8, 5, 1, 1, 3, 4),
+               (9, 3, 3, 5, 1, 3), (10, 4, 5, 6, 6, 3)])
+    copy_rows(conn, "auth.work_type", ["work_type_id", "work_type", "work_range", "notes", "latitude", "longtitude"],
+              WORK_TYPES)
+
+    copy_rows(conn, "hr.candidate_status", ["status_id", "name", "is_final"],
+              [(status_id, name, is_final) for status_id, (name, is_final) in CANDIDATE_STATUSES.items()])
+    copy_rows(conn, "hr.document_status", ["document_status_id", "status"], DOCUMENT_STATUSES.items())
+    copy_rows(conn, "hr.document_template",
+              ["template_id", "name", "description", "markdown_instructions", "instructions", "is_required",
+               "processing_days", "order_position"],
+              [(index, name, description, f"**{name}**\n\n{instructions}", instructions, is_required, days, index)
+               for index, (name, description, is_required, days, instructions)
+               in enumerate(TEMPLATES[:templates], start=1)])
+    with conn.cursor() as cursor:
+        # Процессы с кэшем шаблонов перечитают их (см. repository/template_registry.py)
+        cursor.execute("SELECT to_regclass('hr.document_template_version') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("UPDATE hr.document_template_version SET version = version + 1")
+    conn.commit()
+
+
+def seed_users(conn, rng: random.Random, count: int, password: str, bcrypt_rounds: int, anchor: datetime) -> list[str]:
+    """Сотрудники: первый - администратор с логином admin, остальные hr_user/hr_admin"""
+    import bcrypt
+
+    # Хэш один на всех: bcrypt на каждого пользователя занял бы минуты
+    password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(bcrypt_rounds)).decode("utf-8")
+    users = []
+    locations = []
+    for index in range(count):
+        user_uuid = make_uuid(rng)
+        first_name, middle_name, last_name, _ = person(rng)
+        if index == 0:
+            login, roles, positions = "admin", [1, 2], [1]
+        else:
+            login = f"user{index:05d}"
+            roles = [2] if rng.random() < 0.1 else [3]
+            positions = [rng.randint(2, 10)]
+        work_type_id = rng.choice(WORK_TYPES)[0]
+        created_at = anchor - timedelta(days=rng.uniform(30, 1500))
+        users.append((
+            user_uuid, login, f"{login}@example.com", password_hash, first_name, middle_name, last_name,
+            created_at, roles, rng.randint(1, 3), [1, 2, 3] if 1 in roles else rng.sample([1, 2, 3], 2),
+            positions, work_type_id,
+        ))
+        if work_type_id not in (3, 4):
+            latitude, longitude = random_point(rng, MOSCOW, 12)
+            locations.append((user_uuid, latitude, longitude, anchor - timedelta(hours=rng.uniform(0, 72))))
+
+    copy_rows(conn, 'auth."user"',
+              ["user_uuid", "login", "email", "password", "first_name", "middle_name", "last_name", "created_at",
+               "roles", "district_group_id", "groups", "positions", "work_type_id"],
+              users)
+    copy_rows(conn, "auth.user_location", ["user_uuid", "latitude", "longitude", "updated_at"], locations)
+    # Кураторы кандидатов - рядовые HR
+    return [user[0] for user in users[1:]] or [users[0][0]]
+
+
+def seed_candidates(conn, rng: random.Random, count: int, tutors: list[str], days: int, anchor: datetime) -> list[tuple]:
+    """
+    Кандидаты. Возвращает (uuid, status_id, registered_at, chat_id) для генерации
+    документов и переписки: приглашенные еще не заходили в бота и чата не имеют
+    """
+    chat_ids = rng.sample(range(100_000_000, 7_000_000_000), count)
+    codes = set()
+    candidates = []
+    rows = []
+    for index in range(count):
+        candidate_uuid = make_uuid(rng)
+        status_id = weighted(rng, CANDIDATE_STATUS_WEIGHTS)
+        # Приглашения идут неравномерно: свежих кандидатов больше, чем старых
+        registered_at = anchor - timedelta(days=days * rng.random() ** 1.5, seconds=rng.randint(0, 86399))
+        chat_id = None if status_id == 2 else chat_ids[index]
+        first_name, middle_name, last_name, male = person(rng)
+        code = f"{rng.getrandbits(40):010X}"
+        while code in codes:
+            code = f"{rng.getrandbits(40):010X}"
+        codes.add(code)
+        accepted_at = registered_at + timedelta(minutes=rng.expovariate(1 / 30)) if chat_id else None
+        rows.append((
+            candidate_uuid, first_name, middle_name if rng.random() < 0.8 else None, last_name,
+            f"candidate{index:07d}@example.com", male, rng.choice(tutors),
+            "Рекомендация сотрудника" if rng.random() < 0.1 else None, code, chat_id, status_id, registered_at,
+            chat_id is not None, accepted_at,
+        ))
+        candidates.append((candidate_uuid, status_id, registered_at, chat_id))
+
+    copy_rows(conn, "hr.candidate",
+              ["candidate_uuid", "first_name", "middle_name", "last_name", "email", "sex", "tutor_uuid", "notes",
+               "invitation_code", "telegram_chat_id", "status_id", "registered_at", "agreement_accepted",
+               "agreement_accepted_at"],
+              rows)
+    return candidates
+
+
+def seed_archive(conn, rng: random.Random, count: int, anchor: datetime):
+    rows = []
+    for index in range(count):
+        first_name, _, last_name, _ = person(rng)
+        rows.append((
+            make_uuid(rng), first_name, last_name, f"archived{index:07d}@example.com", rng.choice([7, 8]),
+            anchor - timedelta(days=rng.uniform(0, 730)), "Перенесен в архив" if rng.random() < 0.3 else None,
+        ))
+    copy_rows(conn, "hr.candidate_archive",
+              ["candidate_uuid", "first_name", "last_name", "email", "status_id", "archived_at", "notes"], rows)
+
+
+def document_rows(rng: random.Random, candidates: list[tuple], templates: int, anchor: datetime, history: list):
+    """
+    Документы кандидатов. Переходы статусов складываются в history, чтобы
+    загрузить document_history отдельным COPY после документов
+    """
+    content_types = [(content_type, extension) for content_type, extension, _ in CONTENT_TYPES]
+    content_weights = [weight for _, _, weight in CONTENT_TYPES]
+    for candidate_uuid, status_id, registered_at, chat_id in candidates:
+        # Документы создаются при первом входе в бота
+        if chat_id is None:
+            continue
+        created_at = registered_at + timedelta(minutes=rng.uniform(1, 120))
+        for template_id in range(1, templates + 1):
+            document_id = make_uuid(rng)
+            document_status = weighted(rng, DOCUMENT_STATUS_WEIGHTS[status_id])
+            s3_bucket = s3_key = content_type = file_size = submitted_at = approved_at = rejection = None
+            moment = created_at
+            if document_status == 2:
+                moment = min(moment + timedelta(days=rng.expovariate(1 / 2)), anchor)
+                history.append((document_id, 2, moment))
+            if document_status in (3, 4, 5):
+                content_type, extension = rng.choices(content_types, weights=content_weights)[0]
+                s3_bucket = "candidates"
+                s3_key = f"{candidate_uuid}/{TEMPLATES[template_id - 1][0].replace(' ', '_')}.{extension}"
+                # Размер файла: логнормальное распределение с медианой около 800 КБ
+                file_size = int(rng.lognormvariate(13.6, 0.9))
+                moment = min(moment + timedelta(days=rng.expovariate(1 / 3)), anchor)
+                submitted_at = moment
+                history.append((document_id, 3, moment))
+            if document_status in (4, 5):
+                moment = min(moment + timedelta(hours=rng.expovariate(1 / 20)), anchor)
+                history.append((document_id, document_status, moment))
+                if document_status == 4:
+                    approved_at = moment
+                else:
+                    rejection = rng.choice(["Плохое качество скана", "Не все страницы", "Истек срок действия"])
+            updated_at = moment
+            yield (
+                document_id, candidate_uuid, template_id, document_status, s3_bucket, s3_key, content_type,
+                file_size, submitted_at, approved_at, rejection, document_status == 2, created_at, updated_at,
+            )
+
+
+def seed_documents(conn, rng: random.Random, candidates: list[tuple], templates: int, anchor: datetime):
+    history = []
+    copy_rows(conn, "hr.candidate_document",
+              ["document_id", "candidate_id", "template_id", "status_id", "s3_bucket", "s3_key", "content_type",
+               "file_size", "submitted_at", "approved_at", "rejection_reason", "is_ordered", "created_at",
+               "updated_at"],
+              document_rows(rng, candidates, templates, anchor, history))
+    history.sort(key=lambda row: row[2])
+    copy_rows(conn, "hr.document_history", ["document_uuid", "status_id", "created_at"], history)
+
+
+def seed_locations(conn, rng: random.Random, candidates: list[tuple], share: float, anchor: datetime):
+    rows = []
+    for candidate_uuid, _, registered_at, chat_id in candidates:
+        if chat_id is None or rng.random() >= share:
+            continue
+        latitude, longitude = random_point(rng, MOSCOW, 15)
+        created_at = registered_at + timedelta(days=rng.uniform(0, 5))
+        rows.append((candidate_uuid, latitude, longitude, round(rng.uniform(5, 150), 1), created_at,
+                     min(created_at + timedelta(days=rng.expovariate(1 / 10)), anchor)))
+    copy_rows(conn, "hr.candidate_location",
+              ["candidate_uuid", "latitude", "longitude", "accuracy", "created_at", "updated_at"], rows)
+
+
+def chat_messages(rng: random.Random, chat_id: int, count: int, started_at: datetime, anchor: datetime):
+    """Сообщения одного чата по времени: диалог затухает после регистрации"""
+    span = max((anchor - started_at).total_seconds(), 60.0)
+    offsets = sorted(span * rng.random() ** 2 for _ in range(count))
+    for offset in offsets:
+        is_from_admin = rng.random() < 0.35
+        phrases = ADMIN_PHRASES if is_from_admin else CANDIDATE_PHRASES
+        content = " ".join(rng.choice(phrases) for _ in range(1 + int(rng.expovariate(1.5))))
+        yield started_at + timedelta(seconds=offset), chat_id, content, is_from_admin
+
+
+def seed_messages(conn, rng: random.Random, candidates: list[tuple], total: int, anchor: datetime):
+    chats = [(chat_id, registered_at) for _, _, registered_at, chat_id in candidates if chat_id is not None]
+    if not chats:
+        return
+
+    copy_rows(conn, "comm.telegram_chat", ["chat_id", "candidate_uuid", "chat_type", "created_at", "updated_at"],
+              [(chat_id, candidate_uuid, "private", registered_at, registered_at)
+               for candidate_uuid, _, registered_at, chat_id in candidates if chat_id is not None])
+
+    # comm.message разбита на партиции по месяцам: создаем их на весь период набора
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT comm.create_message_partitions(%s, %s)",
+                       (min(registered_at for _, registered_at in chats), anchor))
+    conn.commit()
+
+    # Тяжелый хвост: большинство чатов короткие, немногие - очень длинные
+    weights = [rng.paretovariate(1.3) for _ in chats]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(len(chats)), min(total - sum(counts), len(chats))):
+        counts[index] += 1
+
+    # Сообщения пишутся в порядке отправки, как их вставляет бот
+    streams = [
+        chat_messages(rng, chat_id, count, registered_at, anchor)
+        for (chat_id, registered_at), count in zip(chats, counts) if count
+    ]
+    last_read = {}
+
+    def rows():
+        for sent_at, chat_id, content, is_from_admin in heapq.merge(*streams, key=lambda row: row[0]):
+            if is_from_admin:
+                last_read[chat_id] = sent_at
+            yield chat_id, content, "admin" if is_from_admin else "candidate", sent_at, is_from_admin
+
+    copy_rows(conn, "comm.message", ["chat_id", "content", "sender_type", "sent_at", "is_from_admin"], rows())
+    # Админ прочитал чат в момент своего последнего ответа: после него остаются непрочитанные
+    copy_rows(conn, "comm.chat_status", ["chat_id", "last_read"], last_read.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические данные для нагрузочного тестирования")
+    parser.add_argument("--candidates", type=int, default=100_000)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--templates", type=int, default=4, choices=range(1, len(TEMPLATES) + 1),
+                        help="число шаблонов документов, документов на кандидата столько же")
+    parser.add_argument("--locations", type=float, default=0.6, help="доля кандидатов с геолокацией")
+    parser.add_argument("--archived", type=int, default=5_000, help="записей в hr.candidate_archive")
+    parser.add_argument("--days", type=int, default=365, help="за сколько дней распределены регистрации")
+    parser.add_argument("--anchor", type=datetime.fromisoformat, default=datetime(2026, 10, 1),
+                        help="момент 'сейчас' для генерации, от него отсчитываются даты")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="Password1!", help="пароль всех сотрудников")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед загрузкой")
+    parser.add_argument("--skip-migrations", action="store_true", help="не запускать alembic upgrade head: схема уже создана")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=os.environ.get("DB_PORT", "5432"),
+        user=os.environ.get("DB_USER", "user"),
+        password=os.environ.get("DB_PASSWORD", "password"),
+        dbname=os.environ.get("DB_NAME", "database"),
+    )
+    started = time.perf_counter()
+    try:
+        create_schema(not args.skip_migrations)
+        ensure_empty(conn, args.truncate)
+        with conn.cursor() as cursor:
+            # Загрузка целиком повторяема, терять последние транзакции при сбое не страшно
+            cursor.execute("SET synchronous_commit = off")
+
+        seed_reference(conn, args.templates)
+        tutors = seed_users(conn, rng, max(args.users, 1), args.password, args.bcrypt_rounds, args.anchor)
+        candidates = seed_candidates(conn, rng, args.candidates, tutors, args.days, args.anchor)
+        seed_archive(conn, rng, args.archived, args.anchor)
+        seed_documents(conn, rng, candidates, args.templates, args.anchor)
+        seed_locations(conn, rng, candidates, args.locations, args.anchor)
+        seed_messages(conn, rng, candidates, args.messages, args.anchor)
+        reset_sequences(conn)
+
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+    print(f"Готово за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "CREATE", "ALTER", "DROP", "TRUNCATE"}
+
+
+def sql_operation(statement) -> str:
+    """Тип запроса по первому слову (метка с ограниченным числом значений)"""
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    if not isinstance(statement, str):
+        return "OTHER"
+    words = statement.lstrip(" \t\r\n(").split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+class ServiceMetrics:
+    """
+    Общие для сервисов метрики SQL-запросов и вызовов внешних сервисов.
+    Имена метрик начинаются с prefix сервиса (hr_, auth_), поэтому в одном
+    Prometheus они не пересекаются
+    """
+
+    def __init__(self, prefix: str, external_services: str):
+        self.db_query_seconds = Histogram(
+            f"{prefix}_db_query_seconds", "Время выполнения SQL-запросов", ["operation"], buckets=LATENCY_BUCKETS
+        )
+        self.db_query_errors = Counter(f"{prefix}_db_query_errors_total", "Ошибки SQL-запросов", ["operation"])
+        self.external_call_seconds = Histogram(
+            f"{prefix}_external_call_seconds",
+            f"Время вызовов внешних сервисов ({external_services})",
+            ["service", "operation"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.external_call_errors = Counter(
+            f"{prefix}_external_call_errors_total", "Ошибки вызовов внешних сервисов", ["service", "operation"]
+        )
+
+    def observe_query(self, statement, seconds: float, failed: bool = False):
+        operation = sql_operation(statement)
+        self.db_query_seconds.labels(operation).observe(seconds)
+        if failed:
+            self.db_query_errors.labels(operation).inc()
+
+    @contextmanager
+    def track(self, service: str, operation: str):
+        """Замеряет время вызова внешнего сервиса и считает ошибки"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.external_call_errors.labels(service, operation).inc()
+            raise
+        finally:
+            self.external_call_seconds.labels(service, operation).observe(time.perf_counter() - started)
+
+    def timed(self, service: str, operation: str):
+        """Декоратор для track, работает с обычными и async функциями"""
+
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.track(service, operation):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.track(service, operation):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    """Метрики процесса в текстовом формате Prometheus и их content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
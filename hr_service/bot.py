@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command
@@ -15,12 +16,20 @@ from aiogram.types import (
 )
 from datetime import datetime
 from repository.database import get_connection, get_minio_client
+from repository.fsm_storage import get_fsm_storage, get_events_isolation
+from repository.template_registry import template_registry
+from repository.document_storage import store_document
+from repository.schema_version import check_schema_revision
+from repository.audit_events import AuditEvent, audit_events, record_event
 from core.config import settings
 import os
 import tempfile
-import io
 from service.bot_service import get_status_text, is_excel_file
-from repository.bot_repositoty import update_document_status, save_location, save_message, create_required_documents, is_user_authorized, get_candidate_uuid_by_chat_id
+from service.webhook_service import run_webhook
+from service.update_scheduler import ChatUpdateScheduler
+from service.bot_metrics import HandlerMetricsMiddleware, TelegramApiMetricsMiddleware
+from prometheus_client import start_http_server
+from repository.bot_repositoty import update_document_status, save_location, save_message, create_required_documents, is_user_authorized, get_candidate_uuid_by_chat_id, get_candidate_documents_by_chat_id, invalidate_chat_documents, listen_document_changes
 from urllib.parse import quote
 logging.basicConfig(
     level=logging.INFO,
@@ -28,53 +37,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-print(settings.bot.DOCUMENTS_URL)
+logger.info(f"DOCUMENTS_URL: {settings.bot.DOCUMENTS_URL}")
 def get_auth_keyboard():
     """Возвращает клавиатуру с кнопкой авторизации"""
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔑 Авторизоваться", callback_data="require_auth")]
     ])
 
-async def update_document_in_db(document_id: str, bucket: str, key: str, content_type: str, file_size: int) -> bool:
-    """Обновляет информацию о документе в базе данных"""
+async def update_document_in_db(document_id: str, file, extension: str, content_type: str) -> bool:
+    """Сохраняет файл документа в MinIO (без повторной записи одинаковых файлов) и в базе данных"""
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE hr.candidate_document
-                    SET 
-                        s3_bucket = %s,
-                        s3_key = %s,
-                        content_type = %s,
-                        file_size = %s,
-                        submitted_at = NOW(),
-                        updated_at = NOW()
-                    WHERE document_id = %s
-                    RETURNING 1
-                """, (bucket, key, content_type, file_size, document_id))
-                return bool(cursor.fetchone())
+        # Хэширование, загрузка в MinIO и транзакция синхронные: в потоке, чтобы
+        # большой файл не останавливал обработку апдейтов других чатов
+        return bool(await asyncio.to_thread(store_document, document_id, file, extension, content_type))
     except Exception as e:
-        logger.error(f"Error updating document in DB: {e}")
-        return False
-
-async def upload_to_minio(bucket: str, key: str, file_bytes: bytes, content_type: str) -> bool:
-    """Загружает файл в MinIO"""
-    try:
-        minio_client = get_minio_client()
-        
-        if not minio_client.bucket_exists(bucket):
-            minio_client.make_bucket(bucket)
-        
-        minio_client.put_object(
-            bucket,
-            key,
-            io.BytesIO(file_bytes),
-            length=len(file_bytes),
-            content_type=content_type
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Error uploading to MinIO: {e}")
+        logger.error(f"Error storing document: {e}")
         return False
     
 def generate_doc_link(doc_name: str, base_url: str = settings.bot.DOCUMENTS_URL) -> str:
@@ -104,7 +81,16 @@ class AuthState(StatesGroup):
 
 # Инициализация бота
 bot = Bot(token=settings.bot.TELEGRAM_TOKEN)
-dp = Dispatcher()
+fsm_storage = get_fsm_storage()
+update_scheduler = ChatUpdateScheduler(
+    get_events_isolation(fsm_storage),
+    concurrency=settings.bot.UPDATE_CONCURRENCY,
+    wait_warning_seconds=settings.bot.UPDATE_WAIT_WARNING_SECONDS
+)
+dp = Dispatcher(storage=fsm_storage, events_isolation=update_scheduler)
+dp.message.middleware(HandlerMetricsMiddleware())
+dp.callback_query.middleware(HandlerMetricsMiddleware())
+bot.session.middleware(TelegramApiMetricsMiddleware())
 
 
 @dp.callback_query(F.data == "require_auth")
@@ -149,14 +135,14 @@ async def show_main_menu(message: Message, first_name: str = "", last_name: str
         f"{greeting}Выберите действие:",
         reply_markup=await get_main_keyboard()
     )
-    await save_message(message.chat.id, "Пользователю показано главное меню", True)
+    record_event(message.chat.id, AuditEvent.MAIN_MENU_SHOWN)
 
 # Обработчики команд
 @dp.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
     """Обработчик команды /start"""
     await save_message(message.chat.id, message.text, False)
-    await save_message(message.chat.id, f"Пользователь {message.from_user.full_name} запустил бота", True)
+    record_event(message.chat.id, AuditEvent.BOT_STARTED)
     
     # Проверяем, авторизован ли пользователь
     if await is_user_authorized(message.chat.id):
@@ -177,7 +163,7 @@ async def process_invitation_code(message: Message, state: FSMContext):
     
     code = message.text.strip().upper()
     chat_id = message.chat.id
-    await save_message(chat_id, f"Пользователь ввел код: {code}", True)
+    record_event(chat_id, AuditEvent.INVITATION_CODE_ENTERED, code=code)
 
     try:
         with get_connection() as conn:
@@ -238,6 +224,7 @@ async def process_invitation_code(message: Message, state: FSMContext):
                 ))
                 
                 conn.commit()
+                invalidate_chat_documents(chat_id)
                 
                 if agreement_accepted:
                     await create_required_documents(candidate_uuid)
@@ -264,11 +251,7 @@ async def process_invitation_code(message: Message, state: FSMContext):
                     await state.set_state(AuthState.waiting_for_privacy_accept)
                     await state.update_data(candidate_uuid=candidate_uuid)
                 
-                await save_message(
-                    chat_id,
-                    f"Пользователь {first_name} {last_name} авторизовался",
-                    True
-                )
+                record_event(chat_id, AuditEvent.AUTHORIZED)
     except Exception as e:
         logger.error(f"Error during invitation code processing: {e}")
         await message.answer("⚠️ Произошла ошибка.")
@@ -306,11 +289,7 @@ async def accept_privacy(callback: types.CallbackQuery, state: FSMContext):
                     f"✅ Спасибо, {first_name}! Вы приняли условия политики конфиденциальности."
                 )
                 
-                await save_message(
-                    chat_id,
-                    f"Пользователь {first_name} {last_name} принял политику конфиденциальности",
-                    True
-                )
+                record_event(chat_id, AuditEvent.PRIVACY_ACCEPTED)
                 
                 await show_main_menu(callback.message, first_name, last_name)
                 await state.clear()
@@ -327,7 +306,7 @@ async def decline_privacy(callback: types.CallbackQuery, state: FSMContext):
         "Для использования бота необходимо принять условия."
     )
     await state.clear()
-    await save_message(callback.message.chat.id, "Пользователь отказался от политики конфиденциальности", True)
+    record_event(callback.message.chat.id, AuditEvent.PRIVACY_DECLINED)
 
 # Обработчики документов с callback-кнопками
 @dp.message(Command("docs"))
@@ -336,74 +315,45 @@ async def cmd_docs(message: Message, state: FSMContext):
     """Обработчик команды /docs и кнопки документов"""
     await save_message(message.chat.id, message.text, False)
     chat_id = message.chat.id
-    await save_message(chat_id, "Пользователь запросил документы", True)
+    record_event(chat_id, AuditEvent.DOCUMENTS_REQUESTED)
     
     if not await is_user_authorized(chat_id):
         await message.answer("🔐 Для доступа к системе сначала авторизуйтесь.")
         return
     
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT c.candidate_uuid, c.first_name, c.last_name 
-                    FROM hr.candidate c
-                    WHERE c.telegram_chat_id = %s
-                """, (chat_id,))
-                
-                candidate = cursor.fetchone()
-                if not candidate:
-                    await message.answer("⚠️ Ваш профиль не найден.")
-                    return
-                
-                candidate_uuid, first_name, last_name = candidate
-                
-                cursor.execute("""
-                    SELECT d.document_id, t.name, d.status_id, t.template_id
-                    FROM hr.candidate_document d
-                    JOIN hr.document_template t ON d.template_id = t.template_id
-                    WHERE d.candidate_id = %s
-                    ORDER BY t.order_position
-                """, (candidate_uuid,))
-                
-                documents = cursor.fetchall()
-                
-                if not documents:
-                    await create_required_documents(candidate_uuid)
-                    cursor.execute("""
-                        SELECT d.document_id, t.name, d.status_id, t.template_id
-                        FROM hr.candidate_document d
-                        JOIN hr.document_template t ON d.template_id = t.template_id
-                        WHERE d.candidate_id = %s
-                        ORDER BY t.order_position
-                    """, (candidate_uuid,))
-                    documents = cursor.fetchall()
-                
-                # Создаем инлайн-клавиатуру с callback-кнопками
-                keyboard = []
-                for doc in documents:
-                    doc_id, doc_name, status_id, _ = doc
-                    status_text = get_status_text(status_id)
-                    keyboard.append([
-                        InlineKeyboardButton(
-                            text=f"{doc_name} - {status_text}",
-                            callback_data=f"doc_{doc_id}"
-                        )
-                    ])
-                
-                keyboard.append([InlineKeyboardButton(
-                    text="↩️ Назад в меню",
-                    callback_data="back_to_menu"
-                )])
-                
-                docs_kb = InlineKeyboardMarkup(inline_keyboard=keyboard)
-                
-                docs_info = {doc[1]: {"id": doc[0], "template_id": doc[3], "status_id": doc[2]} for doc in documents}
-                await state.update_data(docs_info=docs_info)
-                
-                response = f"📂 {first_name}, ваши документы:\n\n"
-                await message.answer(response, reply_markup=docs_kb)
-                await save_message(chat_id, "Пользователю отображен список документов", True)
+        candidate, documents = await get_candidate_documents_by_chat_id(chat_id)
+        if not candidate:
+            await message.answer("⚠️ Ваш профиль не найден.")
+            return
+        
+        candidate_uuid, first_name, last_name = candidate
+        
+        # Создаем инлайн-клавиатуру с callback-кнопками
+        keyboard = []
+        for doc in documents:
+            doc_id, doc_name, status_id, _ = doc
+            status_text = get_status_text(status_id)
+            keyboard.append([
+                InlineKeyboardButton(
+                    text=f"{doc_name} - {status_text}",
+                    callback_data=f"doc_{doc_id}"
+                )
+            ])
+        
+        keyboard.append([InlineKeyboardButton(
+            text="↩️ Назад в меню",
+            callback_data="back_to_menu"
+        )])
+        
+        docs_kb = InlineKeyboardMarkup(inline_keyboard=keyboard)
+        
+        docs_info = {doc[1]: {"id": doc[0], "template_id": doc[3], "status_id": doc[2]} for doc in documents}
+        await state.update_data(docs_info=docs_info)
+        
+        response = f"📂 {first_name}, ваши документы:\n\n"
+        await message.answer(response, reply_markup=docs_kb)
+        record_event(chat_id, AuditEvent.DOCUMENTS_LIST_SHOWN)
     except Exception as e:
         logger.error(f"Error displaying documents: {e}")
         await message.answer("⚠️ Произошла ошибка при получении документов.")
@@ -418,9 +368,8 @@ async def handle_document_callback(callback: types.CallbackQuery, state: FSMCont
         with get_connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute("""
-                    SELECT t.name, d.status_id, d.template_id, d.s3_bucket, d.s3_key
+                    SELECT d.status_id, d.template_id, d.s3_bucket, d.s3_key
                     FROM hr.candidate_document d
-                    JOIN hr.document_template t ON d.template_id = t.template_id
                     WHERE d.document_id = %s
                 """, (document_id,))
                 
@@ -429,7 +378,8 @@ async def handle_document_callback(callback: types.CallbackQuery, state: FSMCont
                     await callback.answer("Документ не найден")
                     return
                 
-                doc_name, status_id, template_id, s3_bucket, s3_key = doc_info
+                status_id, template_id, s3_bucket, s3_key = doc_info
+                doc_name = template_registry.name(template_id)
                 doc_link = generate_doc_link(doc_name)
                 
                 # Формируем клавиатуру с действиями
@@ -574,11 +524,7 @@ async def handle_download_callback(callback: types.CallbackQuery, state: FSMCont
                         caption=f"📄 {doc_name}"
                     )
                     
-                    await save_message(
-                        callback.message.chat.id,
-                        f"Пользователь скачал документ: {doc_name}",
-                        True
-                    )
+                    record_event(callback.message.chat.id, AuditEvent.DOCUMENT_DOWNLOADED, document=doc_name)
                     
                 except Exception as e:
                     logger.error(f"Error downloading file from MinIO: {e}")
@@ -676,50 +622,22 @@ async def handle_bank_statement(message: Message, state: FSMContext):
         await bot.download_file(file.file_path, file_path)
         
         # Проверка файла
-        with open(file_path, 'rb') as f:
-            file_bytes = f.read()
-        
-        if len(file_bytes) == 0:
+        if os.path.getsize(file_path) == 0:
             await message.answer("❌ Загруженный файл пуст.")
             os.remove(file_path)
             return
         
-        # Получаем название документа из шаблона
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT t.name
-                    FROM hr.document_template t
-                    JOIN hr.candidate_document d ON d.template_id = t.template_id
-                    WHERE d.document_id = %s
-                """, (selected_doc['id'],))
-                template_name = cursor.fetchone()[0]
-        
-        # Подготовка данных для MinIO
         file_extension = document.file_name.split('.')[-1] if '.' in document.file_name else 'xlsx'
-        bucket_name = "candidates"
-        # Используем название документа из шаблона вместо document_id
-        s3_key = f"{candidate_uuid}/{template_name.replace(' ', '_')}.{file_extension}"
         content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         
-        # Загрузка в MinIO
-        if not await upload_to_minio(bucket_name, s3_key, file_bytes, content_type):
+        # Загрузка в MinIO и обновление базы данных
+        with open(file_path, 'rb') as f:
+            stored = await update_document_in_db(selected_doc['id'], f, file_extension, content_type)
+        if not stored:
             await message.answer("⚠️ Ошибка при загрузке файла в хранилище.")
             os.remove(file_path)
             return
         
-        # Обновление базы данных
-        if not await update_document_in_db(
-            selected_doc['id'],
-            bucket_name,
-            s3_key,
-            content_type,
-            len(file_bytes)
-        ):
-            await message.answer("⚠️ Файл загружен, но не удалось обновить базу данных.")
-            os.remove(file_path)
-            return
-        
         # Обновление статуса
         if await update_document_status(selected_doc['id'], 3, chat_id, doc_name):
             await message.answer(f"✅ Файл '{doc_name}' успешно загружен!")
@@ -762,48 +680,20 @@ async def handle_document_upload(message: Message, state: FSMContext):
     try:
         # Получаем файл
         file = await bot.get_file(document.file_id)
-        file_bytes = await bot.download_file(file.file_path)
-        
-        if isinstance(file_bytes, io.BytesIO):
-            file_bytes = file_bytes.getvalue()
+        file_data = await bot.download_file(file.file_path)
         
         # Проверки
-        if len(file_bytes) == 0:
+        if file_data.getbuffer().nbytes == 0:
             await message.answer("❌ Загруженный файл пуст.")
             return
         
-        # Получаем название документа из шаблона
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT t.name
-                    FROM hr.document_template t
-                    JOIN hr.candidate_document d ON d.template_id = t.template_id
-                    WHERE d.document_id = %s
-                """, (selected_doc['id'],))
-                template_name = cursor.fetchone()[0]
-        
-        # Подготовка данных для MinIO
         file_extension = document.file_name.split('.')[-1] if '.' in document.file_name else 'bin'
-        bucket_name = "candidates"
-        # Используем название документа из шаблона вместо document_id
-        s3_key = f"{candidate_uuid}/{template_name.replace(' ', '_')}.{file_extension}"
         content_type = document.mime_type or "application/octet-stream"
         
-        # Загрузка в MinIO
-        if not await upload_to_minio(bucket_name, s3_key, file_bytes, content_type):
-            await message.answer("⚠️ Ошибка при загрузке файла в хранилище.")
-            return
-        
-        # Обновление базы данных
-        if not await update_document_in_db(
-            selected_doc['id'],
-            bucket_name,
-            s3_key,
-            content_type,
-            len(file_bytes)
-        ):
-            await message.answer("⚠️ Документ загружен, но не удалось обновить базу данных.")
+        # Загрузка в MinIO и обновление базы данных
+        file_data.seek(0)
+        if not await update_document_in_db(selected_doc['id'], file_data, file_extension, content_type):
+            await message.answer("⚠️ Ошибка при загрузке документа в хранилище.")
             return
         
         # Обновление статуса
@@ -837,7 +727,7 @@ async def request_location(message: Message, state: FSMContext):
         reply_markup=location_kb
     )
     await state.set_state(AuthState.waiting_for_location)
-    await save_message(message.chat.id, "Пользователь запросил отправку геолокации", True)
+    record_event(message.chat.id, AuditEvent.LOCATION_REQUESTED)
 
 @dp.message(AuthState.waiting_for_location, F.location)
 async def handle_location(message: Message, state: FSMContext):
@@ -865,11 +755,7 @@ async def handle_location(message: Message, state: FSMContext):
                 "✅ Ваша геолокация успешно сохранена!",
                 reply_markup=await get_main_keyboard()
             )
-            await save_message(
-                chat_id,
-                f"Пользователь отправил геолокацию: {location.latitude}, {location.longitude}",
-                True
-            )
+            record_event(chat_id, AuditEvent.LOCATION_SAVED, latitude=location.latitude, longitude=location.longitude)
         else:
             await message.answer(
                 "⚠️ Не удалось сохранить вашу геолокацию.",
@@ -925,7 +811,7 @@ async def show_my_location(message: Message):
                 )
                 
                 await message.answer(response, parse_mode="HTML")
-                await save_message(chat_id, "Пользователь запросил сохраненную геолокацию", True)
+                record_event(chat_id, AuditEvent.LOCATION_VIEWED)
                 
     except Exception as e:
         logger.error(f"Error fetching location: {e}")
@@ -973,7 +859,7 @@ async def my_profile(message: Message):
                 )
                 
                 await message.answer(response, reply_markup=profile_kb, parse_mode="HTML")
-                await save_message(chat_id, "Пользователь просмотрел профиль", True)
+                record_event(chat_id, AuditEvent.PROFILE_VIEWED)
                 
     except Exception as e:
         logger.error(f"Error displaying profile: {e}")
@@ -984,7 +870,7 @@ async def support(message: Message):
     """Обработчик кнопки поддержки"""
     await save_message(message.chat.id, message.text, False)
     chat_id = message.chat.id
-    await save_message(chat_id, "Пользователь обратился в поддержку", True)
+    record_event(chat_id, AuditEvent.SUPPORT_OPENED)
     
     support_kb = ReplyKeyboardMarkup(
         keyboard=[
@@ -1001,7 +887,7 @@ async def support(message: Message):
     )
 
     await message.answer(response, reply_markup=support_kb, parse_mode="HTML")
-    await save_message(chat_id, "Показано меню поддержки", True)
+    record_event(chat_id, AuditEvent.SUPPORT_MENU_SHOWN)
 
 @dp.message(F.text == "✉️ Написать")
 async def start_support_message(message: Message, state: FSMContext):
@@ -1009,7 +895,7 @@ async def start_support_message(message: Message, state: FSMContext):
     await save_message(message.chat.id, message.text, False)
     await message.answer("Пожалуйста, напишите ваше сообщение для поддержки:", reply_markup=ReplyKeyboardRemove())
     await state.set_state(AuthState.waiting_for_support_message)
-    await save_message(message.chat.id, "Пользователь начал писать сообщение в поддержку", True)
+    record_event(message.chat.id, AuditEvent.SUPPORT_MESSAGE_STARTED)
 
 @dp.message(AuthState.waiting_for_support_message)
 async def handle_support_message(message: Message, state: FSMContext):
@@ -1021,7 +907,7 @@ async def handle_support_message(message: Message, state: FSMContext):
     await message.answer("✅ Ваше сообщение отправлено в поддержку. Мы ответим вам в ближайшее время.", 
                         reply_markup=await get_main_keyboard())
     await state.clear()
-    await save_message(message.chat.id, f"Пользователь отправил сообщение в поддержку: {message.text}", True)
+    record_event(message.chat.id, AuditEvent.SUPPORT_MESSAGE_SENT)
 
 @dp.message(F.text == "↩️ Назад в меню")
 async def back_to_menu(message: Message, state: FSMContext):
@@ -1029,7 +915,7 @@ async def back_to_menu(message: Message, state: FSMContext):
     await save_message(message.chat.id, message.text, False)
     await state.clear()
     await show_main_menu(message)
-    await save_message(message.chat.id, "Пользователь вернулся в меню", True)
+    record_event(message.chat.id, AuditEvent.RETURNED_TO_MENU)
 
 @dp.message()
 async def handle_unprocessed_messages(message: Message, state: FSMContext):
@@ -1050,8 +936,21 @@ async def handle_unprocessed_messages(message: Message, state: FSMContext):
     await message.answer("Извините, я не понял вашего сообщения. Пожалуйста, используйте кнопки меню.")
 
 async def main():
-    await dp.start_polling(bot)
+    check_schema_revision()
+    document_listener = asyncio.create_task(listen_document_changes())
+    try:
+        if settings.bot.BOT_MODE == "webhook":
+            await run_webhook(dp, bot, update_scheduler)
+        else:
+            if settings.bot.METRICS_PORT:
+                start_http_server(settings.bot.METRICS_PORT)
+            # getUpdates не работает, пока установлен вебхук
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        document_listener.cancel()
+        await dp.fsm.close()
+        audit_events.flush()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
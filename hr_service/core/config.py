@@ -23,6 +23,13 @@ class ProjectManagementSettings:
     URL : str = os.environ.get('USER_URL')
     MAIN_APP_URL : str = os.environ.get('MAIN_APP_URL')
     AUTH_API_URL : str = os.environ.get('AUTH_API_URL')
+    # Статистика запросов по месту вызова и журнал запросов дольше SLOW_QUERY_MS
+    QUERY_TRACE : bool = os.environ.get('QUERY_TRACE', 'true').lower() == 'true'
+    SLOW_QUERY_MS : float = float(os.environ.get('SLOW_QUERY_MS', 200))
+    # Как часто проверять версию шаблонов документов в БД (секунды)
+    TEMPLATE_VERSION_CHECK_INTERVAL : float = float(os.environ.get('TEMPLATE_VERSION_CHECK_INTERVAL', 5))
+    # Проверять при старте, что миграции alembic применены (см. repository/schema_version.py)
+    SCHEMA_CHECK : bool = os.environ.get('SCHEMA_CHECK', 'true').lower() == 'true'
 
 @dataclass
 class EmailSetting:
@@ -35,22 +42,143 @@ class EmailSetting:
 @dataclass
 class RedisSetting:
     REDIS_HOST : str = os.environ.get("REDIS_HOST")
+    REDIS_PORT : int = int(os.environ.get("REDIS_PORT", 6379))
+    REDIS_DB : int = int(os.environ.get("REDIS_DB", 0))
+    REDIS_PASSWORD : str = os.environ.get("REDIS_PASSWORD")
 
 @dataclass
 class MinioSetting: 
     MINIO_USER : str = os.environ.get('MINIO_USER')
     MINIO_PASSWORD : str = os.environ.get('MINIO_PASSWORD')
     MINIO_ENDPOINT : str = os.environ.get('MINIO_ENDPOINT')
+    # Адрес MinIO, доступный из браузера, для подписанных ссылок на скачивание
+    MINIO_PUBLIC_ENDPOINT : str = os.environ.get('MINIO_PUBLIC_ENDPOINT', os.environ.get('MINIO_ENDPOINT'))
 
 
 @dataclass
 class TelegramBotSetting: 
     TELEGRAM_TOKEN : str = os.environ.get('TELEGRAM_TOKEN')
     DOCUMENTS_URL : str = os.environ.get('DOCUMENTS_LINK', 'http://80.74.24.255:8502')
+    # Хранилище FSM: "redis" для нескольких реплик бота, "memory" для локального запуска и тестов
+    FSM_STORAGE : str = os.environ.get('FSM_STORAGE', 'redis' if os.environ.get('REDIS_HOST') else 'memory')
+    FSM_STATE_TTL : int = int(os.environ.get('FSM_STATE_TTL', 60 * 60 * 24))
+    FSM_DATA_TTL : int = int(os.environ.get('FSM_DATA_TTL', 60 * 60 * 24))
+    # Режим получения апдейтов: "polling" или "webhook"
+    BOT_MODE : str = os.environ.get('BOT_MODE', 'polling')
+    WEBHOOK_BASE_URL : str = os.environ.get('WEBHOOK_BASE_URL')
+    WEBHOOK_PATH : str = os.environ.get('WEBHOOK_PATH', '/webhook')
+    # Обязателен в режиме вебхука: Telegram присылает его в X-Telegram-Bot-Api-Secret-Token
+    WEBHOOK_SECRET : str = os.environ.get('WEBHOOK_SECRET')
+    # Токен служебных эндпоинтов сервера вебхука (/stats, /metrics, /queries): Authorization: Bearer <токен>.
+    # Пока он не задан, эндпоинты не отвечают
+    ADMIN_TOKEN : str = os.environ.get('BOT_ADMIN_TOKEN')
+    WEBHOOK_HOST : str = os.environ.get('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT : int = int(os.environ.get('WEBHOOK_PORT', 8080))
+    WEBHOOK_MAX_CONNECTIONS : int = int(os.environ.get('WEBHOOK_MAX_CONNECTIONS', 40))
+    UPDATE_WORKERS : int = int(os.environ.get('UPDATE_WORKERS', 8))
+    UPDATE_QUEUE_SIZE : int = int(os.environ.get('UPDATE_QUEUE_SIZE', 1000))
+    UPDATE_QUEUE_PUT_TIMEOUT : float = float(os.environ.get('UPDATE_QUEUE_PUT_TIMEOUT', 2.0))
+    # Сколько апдейтов разных чатов обрабатывается одновременно
+    UPDATE_CONCURRENCY : int = int(os.environ.get('UPDATE_CONCURRENCY', 16))
+    UPDATE_WAIT_WARNING_SECONDS : float = float(os.environ.get('UPDATE_WAIT_WARNING_SECONDS', 5.0))
+    # Кэш списка документов по чату; сбрасывается по NOTIFY от триггеров (миграция 0010), TTL - страховка
+    DOCUMENTS_CACHE_TTL : float = float(os.environ.get('DOCUMENTS_CACHE_TTL', 60))
+    DOCUMENTS_CACHE_SIZE : int = int(os.environ.get('DOCUMENTS_CACHE_SIZE', 10000))
+    # Порт /metrics для режима polling (в режиме вебхука метрики отдает сервер вебхука), 0 - выключено.
+    # Авторизации на нем нет, поэтому по умолчанию он слушает только внутреннюю сеть контейнера
+    METRICS_PORT : int = int(os.environ.get('METRICS_PORT', 9100))
+
+@dataclass
+class BackfillSetting:
+    """Фоновое создание документов кандидатам после добавления шаблона"""
+    BATCH_SIZE : int = int(os.environ.get('BACKFILL_BATCH_SIZE', 500))
+    PAUSE_SECONDS : float = float(os.environ.get('BACKFILL_PAUSE_SECONDS', 0.2))
+    # В рабочие часы пачки меньше, а паузы длиннее, чтобы не мешать работе HR и бота
+    BUSINESS_HOURS : str = os.environ.get('BACKFILL_BUSINESS_HOURS', '9-19')
+    BUSINESS_HOURS_BATCH_SIZE : int = int(os.environ.get('BACKFILL_BUSINESS_HOURS_BATCH_SIZE', 100))
+    BUSINESS_HOURS_PAUSE_SECONDS : float = float(os.environ.get('BACKFILL_BUSINESS_HOURS_PAUSE_SECONDS', 2.0))
+    LOCK_TIMEOUT : str = os.environ.get('BACKFILL_LOCK_TIMEOUT', '2s')
+    MAX_RETRIES : int = int(os.environ.get('BACKFILL_MAX_RETRIES', 5))
+
+@dataclass
+class SummarySetting:
+    """Фоновая генерация AI-анализа кандидатов"""
+    INTERVAL_SECONDS : float = float(os.environ.get('SUMMARY_INTERVAL_SECONDS', 900))
+    CONCURRENCY : int = int(os.environ.get('SUMMARY_CONCURRENCY', 4))
+    REQUESTS_PER_MINUTE : float = float(os.environ.get('SUMMARY_REQUESTS_PER_MINUTE', 30))
+
+@dataclass
+class MessageRetentionSetting:
+    """Партиции comm.message по месяцам и выгрузка старых партиций в Parquet"""
+    # Сколько полных месяцев до текущего хранится в Postgres; старше - уходят в архив
+    RETENTION_MONTHS : int = int(os.environ.get('MESSAGE_RETENTION_MONTHS', 12))
+    # На сколько месяцев вперед создавать партиции
+    PARTITIONS_AHEAD_MONTHS : int = int(os.environ.get('MESSAGE_PARTITIONS_AHEAD_MONTHS', 3))
+    ARCHIVE_BUCKET : str = os.environ.get('MESSAGE_ARCHIVE_BUCKET', 'message-archive')
+    # Строк в одной группе строк Parquet при выгрузке
+    BATCH_SIZE : int = int(os.environ.get('MESSAGE_ARCHIVE_BATCH_SIZE', 50000))
+    LOCK_TIMEOUT : str = os.environ.get('MESSAGE_ARCHIVE_LOCK_TIMEOUT', '2s')
+    INTERVAL_SECONDS : float = float(os.environ.get('MESSAGE_RETENTION_INTERVAL_SECONDS', 6 * 60 * 60))
+
+@dataclass
+class AuditSetting:
+    """Журнал событий бота comm.audit_event, отдельный от истории чатов"""
+    BATCH_SIZE : int = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+    FLUSH_INTERVAL : float = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+    # Сколько событий держать в памяти, пока база недоступна
+    MAX_BUFFER : int = int(os.environ.get('AUDIT_MAX_BUFFER', 10000))
+
+@dataclass
+class CandidateImportSetting:
+    """Массовый импорт кандидатов из CSV/XLSX и рассылка приглашений"""
+    MAX_ROWS : int = int(os.environ.get('CANDIDATE_IMPORT_MAX_ROWS', 5000))
+    # Писем на одну SMTP-сессию и пауза между сессиями, чтобы не упереться в лимиты почтового сервера
+    INVITE_BATCH_SIZE : int = int(os.environ.get('CANDIDATE_IMPORT_INVITE_BATCH_SIZE', 50))
+    INVITE_PAUSE_SECONDS : float = float(os.environ.get('CANDIDATE_IMPORT_INVITE_PAUSE_SECONDS', 1.0))
+    # Попыток отправки на приглашение, после них - только ручной повтор со страницы кандидатов
+    INVITE_MAX_ATTEMPTS : int = int(os.environ.get('CANDIDATE_IMPORT_INVITE_MAX_ATTEMPTS', 3))
+    # Новые приглашения приходят через NOTIFY, опрос по таймеру - для повторов и пропущенных уведомлений
+    INVITE_INTERVAL_SECONDS : float = float(os.environ.get('CANDIDATE_IMPORT_INVITE_INTERVAL_SECONDS', 60))
+
+@dataclass
+class DocumentExportSetting:
+    """Выгрузка документов кандидатов ZIP-архивом"""
+    BUCKET : str = os.environ.get('DOCUMENT_EXPORT_BUCKET', 'exports')
+    # Сколько файлов процесс читает из MinIO одновременно во всех выгрузках
+    MAX_CONCURRENT_READS : int = int(os.environ.get('DOCUMENT_EXPORT_MAX_CONCURRENT_READS', 4))
+    CHUNK_SIZE : int = int(os.environ.get('DOCUMENT_EXPORT_CHUNK_SIZE', 1024 * 1024))
+    # Размер части multipart-загрузки архива: столько памяти держит одна выгрузка
+    PART_SIZE : int = int(os.environ.get('DOCUMENT_EXPORT_PART_SIZE', 16 * 1024 * 1024))
+    URL_EXPIRES_SECONDS : int = int(os.environ.get('DOCUMENT_EXPORT_URL_EXPIRES_SECONDS', 3600))
+    # Архивы удаляет сам MinIO по правилу жизненного цикла бакета
+    RETENTION_DAYS : int = int(os.environ.get('DOCUMENT_EXPORT_RETENTION_DAYS', 1))
+
+@dataclass
+class PreviewSetting:
+    """Фоновое построение превью загруженных документов"""
+    # Процессов, которые растрируют PDF и уменьшают изображения
+    WORKERS : int = int(os.environ.get('PREVIEW_WORKERS', 2))
+    BATCH_SIZE : int = int(os.environ.get('PREVIEW_BATCH_SIZE', 100))
+    # Длинная сторона превью в пикселях и качество JPEG
+    MAX_SIZE : int = int(os.environ.get('PREVIEW_MAX_SIZE', 800))
+    JPEG_QUALITY : int = int(os.environ.get('PREVIEW_JPEG_QUALITY', 80))
+    # Файлы больше этого размера не скачиваются для превью
+    MAX_SOURCE_BYTES : int = int(os.environ.get('PREVIEW_MAX_SOURCE_BYTES', 50 * 1024 * 1024))
+    # Новые файлы приходят через NOTIFY, опрос по таймеру - на случай пропущенных уведомлений
+    INTERVAL_SECONDS : float = float(os.environ.get('PREVIEW_INTERVAL_SECONDS', 60))
 
 @dataclass
 class GEMINI: 
     GEMINI_TOKEN : str = os.environ.get('GEMINI_TOKEN')
+    # google - реальный API, stub - локальная заглушка для тестов и разработки без ключа
+    GEMINI_BACKEND : str = os.environ.get('GEMINI_BACKEND', 'google')
+    # Кэш ответов по хэшу нормализованного промпта
+    GEMINI_CACHE_TTL : float = float(os.environ.get('GEMINI_CACHE_TTL', 3600))
+    GEMINI_CACHE_SIZE : int = int(os.environ.get('GEMINI_CACHE_SIZE', 512))
+    # Сколько ждать ответа, который уже запрошен другим пользователем
+    GEMINI_TIMEOUT : float = float(os.environ.get('GEMINI_TIMEOUT', 60))
+    # Бюджет времени на потоковую генерацию ответа в чате
+    GEMINI_STREAM_TIMEOUT : float = float(os.environ.get('GEMINI_STREAM_TIMEOUT', 30))
 
 @dataclass
 class Settings:
@@ -60,10 +188,15 @@ class Settings:
     minio : MinioSetting = field(default_factory=MinioSetting)
     bot : TelegramBotSetting = field(default_factory=TelegramBotSetting)
     gemini : GEMINI = field(default_factory=GEMINI)
+    backfill : BackfillSetting = field(default_factory=BackfillSetting)
+    summary : SummarySetting = field(default_factory=SummarySetting)
+    message_retention : MessageRetentionSetting = field(default_factory=MessageRetentionSetting)
+    audit : AuditSetting = field(default_factory=AuditSetting)
+    candidate_import : CandidateImportSetting = field(default_factory=CandidateImportSetting)
+    document_export : DocumentExportSetting = field(default_factory=DocumentExportSetting)
+    preview : PreviewSetting = field(default_factory=PreviewSetting)
 
 settings = Settings()
-print(settings.project_management_setting.DATABASE_URL)
-print(settings.project_management_setting.AUTH_API_URL)
 
 POLLING_INTERVAL = 20
 MESSAGE_PREVIEW_LENGTH = 20  
@@ -92,4 +225,12 @@ DOCUMENT_STATUSES = {
     5: ("Требуется новый вариант", "🔄")
 }
 
+CANDIDATE_STATUSES = {
+    2: ("Приглашен", "✉️"),
+    3: ("Зарегистрирован", "📝"),
+    5: ("Документы на проверке", "🔍"),
+    7: ("Принят", "✅"),
+    8: ("Отклонен", "❌")
+}
+
 CHATS_PER_PAGE = 5
\ No newline at end of file
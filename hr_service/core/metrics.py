@@ -0,0 +1,25 @@
+from prometheus_client import Counter, Histogram
+
+from common.metrics import LATENCY_BUCKETS, ServiceMetrics, metrics_payload
+
+_metrics = ServiceMetrics("hr", "minio, smtp, telegram, gemini")
+observe_query = _metrics.observe_query
+track = _metrics.track
+timed = _metrics.timed
+
+BOT_HANDLER_SECONDS = Histogram(
+    "hr_bot_handler_seconds", "Время обработки апдейта хендлером бота", ["handler"], buckets=LATENCY_BUCKETS
+)
+BOT_HANDLER_ERRORS = Counter("hr_bot_handler_errors_total", "Исключения в хендлерах бота", ["handler"])
+
+AUDIT_EVENTS_DROPPED = Counter(
+    "hr_audit_events_dropped_total", "События аудита, отброшенные из-за переполнения буфера"
+)
+DOCUMENT_UPLOADS_DEDUPLICATED = Counter(
+    "hr_document_uploads_deduplicated_total", "Загрузки документов, файл которых уже был в MinIO"
+)
+
+__all__ = [
+    "observe_query", "track", "timed", "metrics_payload",
+    "BOT_HANDLER_SECONDS", "BOT_HANDLER_ERRORS", "AUDIT_EVENTS_DROPPED", "DOCUMENT_UPLOADS_DEDUPLICATED",
+]
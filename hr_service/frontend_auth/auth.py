@@ -11,7 +11,6 @@ from core.config import settings
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 SECRET_KEY = os.getenv("SECRET_KEY")
 BASE_API_URL = settings.project_management_setting.AUTH_API_URL
-print(BASE_API_URL)
 class UserTokenData:
     """Модель данных пользователя из токена"""
     def __init__(self, **kwargs):
@@ -1,11 +1,18 @@
 import streamlit as st
 from frontend_auth.auth import check_auth, login, ADMIN_ROLE, HR_ROLE, logout
-from pgs.Дашборд import dash
-from pgs.Документы import docs 
-from pgs.Кандидаты import candidates 
-from pgs.Чат import chat
-from pgs.Архив import render_archived_candidates_page
-from pgs.Сотрудники import render_employees_page
+from repository.schema_version import check_schema_revision
+import importlib
+
+# Страница -> (модуль, функция отрисовки). Модуль импортируется только при открытии страницы,
+# чтобы сессия пользователя чата не загружала pandas, plotly и pydeck из дашборда
+PAGES = {
+    "📊 Дашборд": ("pgs.Дашборд", "dash"),
+    "📄 Документы": ("pgs.Документы", "docs"),
+    "📄 Чат": ("pgs.Чат", "chat"),
+    "📁 Архив": ("pgs.Архив", "render_archived_candidates_page"),
+    "📋 Сотрудники": ("pgs.Сотрудники", "render_employees_page"),
+    "👥 Кандидаты": ("pgs.Кандидаты", "candidates"),
+}
 # Должно быть ПЕРВОЙ и ЕДИНСТВЕННОЙ командой set_page_config во всем приложении
 st.set_page_config(
     layout="wide",
@@ -14,6 +21,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Схема проверяется один раз на процесс; при ошибке cache_resource ничего не кэширует,
+# и проверка повторится на следующем rerun
+@st.cache_resource(show_spinner=False)
+def ensure_schema():
+    check_schema_revision()
+
+
+try:
+    ensure_schema()
+except RuntimeError as error:
+    st.error(str(error))
+    st.stop()
+
 # 1. Проверка авторизации
 if not check_auth():
     login()
@@ -46,15 +66,5 @@ with st.sidebar:
     if st.button("Выйти из системы"):
         logout()
 # 4. Динамическая загрузка страниц (без импорта в начале файла!)
-if page == "📊 Дашборд":
-    dash()
-elif page == "📄 Документы":
-    docs()
-elif page == '📄 Чат':
-    chat()
-elif page == '📁 Архив':
-    render_archived_candidates_page()
-elif page == '📋 Сотрудники':
-    render_employees_page()
-else:
-    candidates()
\ No newline at end of file
+module_name, render_name = PAGES.get(page, PAGES["👥 Кандидаты"])
+getattr(importlib.import_module(module_name), render_name)()
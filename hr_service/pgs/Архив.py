@@ -5,6 +5,7 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 import smtplib
+from core.metrics import track
 from core.config import settings
 import logging
 from io import BytesIO
@@ -26,7 +27,7 @@ def send_email_with_attachment(to_email: str, subject: str, message: str, attach
             part['Content-Disposition'] = f'attachment; filename="{filename}"'
             msg.attach(part)
 
-        with smtplib.SMTP(
+        with track("smtp", "send_message"), smtplib.SMTP(
             settings.email_settings.EMAIL_SERVER, 
             settings.email_settings.EMAIL_PORT
         ) as server:
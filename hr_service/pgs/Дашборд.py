@@ -13,6 +13,7 @@ from repository.dashboard_repository import (
     get_document_processing_times
 )
 from frontend_auth.auth import check_auth, login, admin_required
+from repository.query_trace import explain_slowest, query_tracer
 
 # Конфигурация кэширования
 @st.cache_data(ttl=3600, show_spinner="Загружаем данные о локациях...")
@@ -395,6 +396,31 @@ def render_documents_tab():
     except Exception as e:
         st.error(f"Ошибка при загрузке документов: {str(e)}")
 
+def render_queries_tab():
+    """Статистика SQL-запросов этого процесса портала и планы самых медленных"""
+    st.header("🐢 SQL-запросы")
+    if query_tracer is None:
+        st.info("Трассировка запросов выключена (QUERY_TRACE=false)")
+        return
+
+    st.caption(f"Запросы дольше {query_tracer.slow_threshold * 1000:.0f} мс пишутся в лог")
+    stats = [stat.as_dict() for stat in query_tracer.top(50)]
+    if stats:
+        st.dataframe(pd.DataFrame(stats), hide_index=True, use_container_width=True)
+    else:
+        st.info("Запросов пока не было")
+
+    cols = st.columns([1, 1, 3])
+    explain_limit = cols[0].number_input("Сколько запросов", min_value=1, max_value=10, value=3)
+    if cols[1].button("EXPLAIN самых медленных"):
+        with st.spinner("Выполняем EXPLAIN (ANALYZE, BUFFERS)..."):
+            for stat, plan in explain_slowest(int(explain_limit)):
+                st.markdown(f"**{stat.call_site}** - max {stat.max_seconds * 1000:.1f} мс")
+                st.code(plan)
+    if cols[2].button("Сбросить статистику"):
+        query_tracer.reset()
+        st.rerun()
+
 def dash():
     if not check_auth():
         login()
@@ -405,10 +431,11 @@ def dash():
     
     date_range, work_type_filter = setup_sidebar_filters()
     
-    tab1, tab2, tab3 = st.tabs([
+    tab1, tab2, tab3, tab4 = st.tabs([
         "📍 Локации", 
         "📊 Аналитика",
-        "📄 Документы"
+        "📄 Документы",
+        "🐢 Запросы"
     ])
     
     with tab1:
@@ -420,5 +447,8 @@ def dash():
     with tab3:
         render_documents_tab()
 
+    with tab4:
+        render_queries_tab()
+
 if __name__ == "__main__":
     dash()
\ No newline at end of file
@@ -1,68 +1,18 @@
 import streamlit as st
 from typing import List, Optional
-from pydantic import BaseModel, Field
 from repository.database import get_connection
+from repository.template_registry import Template, bump_template_version, template_registry
 from urllib.parse import quote, unquote
 from frontend_auth.auth import admin_required, auth_required
-# --- Pydantic модели ---
-class Template(BaseModel):
-    template_id: int
-    name: str
-    description: str = Field(default="")
-    markdown_instructions: str = Field(default="")
-    is_required: bool = True
-    processing_days: int = 1
-    order_position: int = 1
-
+from service.document_backfill_service import start_backfill_in_background, get_backfill_progress
 # --- Операции с БД ---
 def get_all_templates() -> List[Template]:
     """Получить все шаблоны документов"""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT 
-                    template_id, 
-                    name, 
-                    COALESCE(description, '') as description,
-                    COALESCE(markdown_instructions, '') as markdown_instructions,
-                    is_required, 
-                    processing_days, 
-                    order_position 
-                FROM hr.document_template 
-                ORDER BY order_position
-            """)
-            return [Template.model_validate(dict(zip(
-                ['template_id', 'name', 'description', 'markdown_instructions',
-                 'is_required', 'processing_days', 'order_position'], row)))
-                for row in cur.fetchall()]
-    finally:
-        conn.close()
+    return template_registry.all()
 
 def get_template_by_id(template_id: int) -> Optional[Template]:
     """Получить шаблон по ID"""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT 
-                    template_id, 
-                    name, 
-                    COALESCE(description, '') as description,
-                    COALESCE(markdown_instructions, '') as markdown_instructions,
-                    is_required, 
-                    processing_days, 
-                    order_position 
-                FROM hr.document_template 
-                WHERE template_id = %s
-            """, (template_id,))
-            if row := cur.fetchone():
-                return Template.model_validate(dict(zip(
-                    ['template_id', 'name', 'description', 'markdown_instructions',
-                     'is_required', 'processing_days', 'order_position'], row)))
-            return None
-    finally:
-        conn.close()
+    return template_registry.get(template_id)
 
 @admin_required
 def add_template(template: Template) -> int:
@@ -84,10 +34,13 @@ def add_template(template: Template) -> int:
                 template.processing_days,
                 template.order_position
             ))
-            return cur.fetchone()[0]
+            template_id = cur.fetchone()[0]
+            bump_template_version(cur)
+            return template_id
     finally:
         conn.commit()
         conn.close()
+        template_registry.invalidate()
 
 def update_template(template: Template) -> bool:
     """Обновить существующий шаблон"""
@@ -113,10 +66,14 @@ def update_template(template: Template) -> bool:
                 template.order_position,
                 template.template_id
             ))
-            return cur.rowcount > 0
+            updated = cur.rowcount > 0
+            if updated:
+                bump_template_version(cur)
+            return updated
     finally:
         conn.commit()
         conn.close()
+        template_registry.invalidate()
 
 # --- Компоненты интерфейса ---
 def render_template_view(template: Template, edit_mode: bool = False):
@@ -233,11 +190,31 @@ def render_add_template_form():
                             order_position=len(get_all_templates()) + 1
                         )
                         template_id = add_template(new_template)
+                        # Существующим кандидатам документ создается фоном, а не при следующем заходе в бота
+                        start_backfill_in_background()
                         st.success(f"Шаблон '{name}' успешно сохранён (ID: {template_id})")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Ошибка при сохранении: {str(e)}")
 
+def render_backfill_status():
+    """Прогресс создания документов кандидатам после добавления шаблона"""
+    progress = get_backfill_progress()
+    if progress.is_running:
+        st.sidebar.progress(
+            progress.fraction,
+            text=f"Создание документов кандидатам: {progress.processed_candidates}/{progress.total_candidates}"
+        )
+        if st.sidebar.button("🔄 Обновить прогресс"):
+            st.rerun()
+    elif progress.error:
+        st.sidebar.warning(f"Создание документов кандидатам: {progress.error}")
+    elif progress.finished_at:
+        st.sidebar.caption(
+            f"Документы кандидатам созданы ({progress.created_documents} шт.) "
+            f"в {progress.finished_at.strftime('%H:%M')}"
+        )
+
 @admin_required
 def docs():
     
@@ -281,6 +258,7 @@ def docs():
         edit_mode = col2.checkbox("Редактировать", False)
         
         render_add_template_form()
+        render_backfill_status()
         
         if not templates:
             st.info("В системе пока нет шаблонов документов. Добавьте первый шаблон.")
@@ -1,13 +1,25 @@
 import streamlit as st
 import pandas as pd
-import textwrap
 import logging
-import google.generativeai as genai
 from repository.database import get_connection, get_minio_client
 from frontend_auth.auth import check_auth, get_current_user_data, login
 from service.email_service import send_email, send_telegram_notification, send_invitation_email
 from repository.strml_repository import add_candidate_to_db
-from core.config import GEMINI_API_KEY
+from service.document_export_service import export_documents_zip
+from service.candidate_import_service import (
+    get_invitation_progress,
+    import_candidates,
+    read_candidates_file,
+    retry_invitations,
+    validate_candidates,
+)
+from service.candidate_summary_service import (
+    build_candidate_analysis_prompt,
+    generate_candidate_summary,
+    get_candidate_summary,
+    summary_input_hash,
+)
+from core.config import CANDIDATE_STATUSES
 
 # --- Конфигурация приложения ---
 logging.basicConfig(level=logging.INFO)
@@ -23,14 +35,6 @@ DOCUMENT_STATUSES = {
     5: ("Отправьте заново", "🔄", "#FF9800")
 }
 
-CANDIDATE_STATUSES = {
-    2: ("Приглашен", "✉️"),
-    3: ("Зарегистрирован", "📝"),
-    5: ("Документы на проверке", "🔍"),
-    7: ("Принят", "✅"),
-    8: ("Отклонен", "❌")
-}
-
 FINAL_STATUSES = [7, 8]  # Статусы, после которых изменения невозможны
 
 ALLOWED_DOCUMENT_STATUS_CHANGES = {
@@ -48,10 +52,6 @@ STATUS_DESCRIPTIONS = {
 
 CANDIDATE_ANALYSIS_PROMPT = "Вы - HR-эксперт. Кратко проанализируйте кандидата."
 
-# --- Инициализация AI ---
-genai.configure(api_key=GEMINI_API_KEY)
-ai_model = genai.GenerativeModel("gemini-1.5-flash")
-
 # --- Функции базы данных ---
 def get_candidate_statuses():
     with get_connection() as conn:
@@ -123,7 +123,8 @@ def get_candidate_documents(candidate_uuid):
             cursor.execute("""
                 SELECT 
                     d.document_id, t.name as document_type, d.s3_bucket, d.s3_key,
-                    d.file_size, d.content_type, d.submitted_at, d.status_id, d.notes as document_notes
+                    d.file_size, d.content_type, d.submitted_at, d.status_id, d.notes as document_notes,
+                    d.preview_key
                 FROM hr.candidate_document d
                 JOIN hr.document_template t ON d.template_id = t.template_id
                 WHERE d.candidate_id = %s
@@ -240,10 +241,48 @@ def download_from_minio(bucket, key):
         st.error(f"Ошибка загрузки: {str(e)}")
         return None
 
+@st.cache_data(ttl=3600, max_entries=500, show_spinner=False)
+def read_document_preview(bucket, key):
+    """
+    Превью неизменно для своего ключа (он строится из хэша файла), поэтому кэшируется.
+    Ошибка чтения пробрасывается: st.cache_data не кэширует исключения, и при
+    следующем показе превью прочитается заново
+    """
+    response = get_minio_client().get_object(bucket, key)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+def get_document_preview(bucket, key):
+    try:
+        return read_document_preview(bucket, key)
+    except Exception as e:
+        logger.error(f"Ошибка загрузки превью {bucket}/{key}: {e}")
+        return None
+
+def show_documents_export(candidate_uuids, title, key):
+    """Кнопка выгрузки документов кандидатов одним ZIP-архивом"""
+    if st.button("📦 Скачать все документы (ZIP)", key=f"export_{key}", use_container_width=True):
+        try:
+            with st.spinner("Собираем архив..."):
+                url = export_documents_zip(list(candidate_uuids), title)
+            st.session_state[f'export_url_{key}'] = url
+            if url is None:
+                st.info("Загруженных документов нет")
+        except Exception as e:
+            st.error(f"Ошибка выгрузки: {str(e)}")
+
+    url = st.session_state.get(f'export_url_{key}')
+    if url:
+        st.link_button("⬇️ Скачать архив", url, use_container_width=True)
+
 # --- AI Функции ---
 def generate_compact_analysis(candidate, documents):
     """
     Генерирует краткий аналитический отчет о кандидате с использованием AI
+    и сохраняет его, чтобы страница показывала готовый анализ без ожидания
     
     Args:
         candidate (dict): Данные кандидата
@@ -253,58 +292,29 @@ def generate_compact_analysis(candidate, documents):
         str: Сформированный анализ кандидата
     """
     try:
-        # Получаем статус кандидата
-        status_info = CANDIDATE_STATUSES.get(candidate['status_id'], ("Неизвестно", "❓"))
-        status_name = status_info[0]
-        status_icon = status_info[1]
-        
-        # Анализируем документы
-        docs_summary = {
-            "completed": len(documents[documents['status_id'] == 4]),
-            "pending_review": len(documents[documents['status_id'] == 3]),
-            "needs_resubmit": len(documents[documents['status_id'] == 5]),
-            "ordered": len(documents[documents['status_id'] == 2]),
-            "missing": len(documents[documents['status_id'] == 1])
-        }
-        
-        # Формируем детальный промпт для AI
-        prompt = f"""
-        Ты - HR-аналитик в крупной компании. Проанализируй кандидата и предоставь краткий отчет.
-        
-        ### Основная информация:
-        - Кандидат: {candidate['first_name']} {candidate['last_name']}
-        - Текущий статус: {status_icon} {status_name}
-        - Контакты: {candidate.get('email', 'нет email')} | {candidate.get('phone', 'нет телефона')}
-        - Куратор: {candidate.get('tutor_first_name', '')} {candidate.get('tutor_last_name', '')}
-        - Заметки: {textwrap.shorten(candidate.get('notes', 'нет заметок'), width=150, placeholder='...')}
-        
-        ### Статистика документов:
-        - ✅ Проверено и одобрено: {docs_summary['completed']}
-        - 🔍 Ожидают проверки: {docs_summary['pending_review']}
-        - 🔄 Требуют перезагрузки: {docs_summary['needs_resubmit']}
-        - 🛒 Заказаны: {docs_summary['ordered']}
-        - ❌ Отсутствуют: {docs_summary['missing']}
-        - 📋 Всего документов: {len(documents)}
-        
-        ### Задание:
-        1. Оцените текущий прогресс кандидата по документам
-        2. Выделите потенциальные проблемы или задержки
-        3. Дайте рекомендации по дальнейшим действиям
-        4. Будь кратким (3-5 предложений) и конкретным
-        5. Используй профессиональный, но дружелюбный тон
-        
-        Формат вывода:
-        [Анализ прогресса] [Проблемы] [Рекомендации]
-        """
-        
-        # Получаем ответ от AI
-        response = ai_model.generate_content(prompt)
-        return response.text
-    
+        return generate_candidate_summary(candidate, documents['status_id'].tolist())
     except Exception as e:
         logger.error(f"Ошибка AI анализа: {str(e)}")
         return "Не удалось сгенерировать анализ. Пожалуйста, проверьте данные кандидата вручную."
 
+def show_candidate_analysis(candidate, documents):
+    """Показывает сохраненный AI анализ; пересчет выполняет фоновая задача или кнопка"""
+    stored = get_candidate_summary(candidate['candidate_uuid'])
+    prompt = build_candidate_analysis_prompt(candidate, documents['status_id'].tolist())
+
+    if stored:
+        st.markdown(stored['summary'])
+        st.caption(f"Сформирован {stored['generated_at'].strftime('%d.%m.%Y %H:%M')}")
+        if stored['input_hash'] != summary_input_hash(prompt):
+            st.caption("Данные кандидата изменились, анализ будет обновлен в фоне")
+    else:
+        st.info("Анализ еще не сформирован")
+
+    if st.button("🔄 Обновить анализ", key=f"refresh_analysis_{candidate['candidate_uuid']}"):
+        with st.spinner("Анализируем данные кандидата..."):
+            generate_compact_analysis(candidate, documents)
+        st.rerun()
+
 # --- Компоненты интерфейса ---
 def show_status_badge(status_id):
     status = DOCUMENT_STATUSES.get(status_id, ("Неизвестно", "❓", "#9E9E9E"))
@@ -367,6 +377,12 @@ def show_document_card(doc, is_admin=False):
             st.markdown(f"**{doc['document_type']}**")
             st.caption(f"🗓️ {doc.get('submitted_at', 'нет даты')} | 📦 {doc.get('file_size', 'нет данных')}")
             
+            # Превью строит воркер после загрузки: оригинал для просмотра не скачивается
+            if doc['status_id'] not in [1, 2] and doc.get('preview_key'):
+                preview = get_document_preview(doc['s3_bucket'], doc['preview_key'])
+                if preview:
+                    st.image(preview, width=300)
+            
             # Заметки документа
             doc_notes = st.text_area(
                 "Заметки",
@@ -392,7 +408,8 @@ def show_document_card(doc, is_admin=False):
                             st.download_button(
                                 "Скачать сейчас",
                                 file_data,
-                                doc['s3_key'].split('/')[-1],
+                                # Ключ файла - хэш содержимого, поэтому имя берем из типа документа
+                                f"{doc['document_type']}.{doc['s3_key'].rsplit('.', 1)[-1]}",
                                 doc['content_type'],
                                 key=f"dl_btn_{doc['document_id']}"
                             )
@@ -480,9 +497,7 @@ def show_candidate_details_view(candidate_uuid):
     
     # AI анализ кандидата
     with st.expander("🔍 AI Анализ кандидата", expanded=False):
-        with st.spinner("Анализируем данные кандидата..."):
-            analysis = generate_compact_analysis(candidate, documents)
-            st.markdown(analysis)
+        show_candidate_analysis(candidate, documents)
     
     # Документы кандидата
     st.markdown("## 📄 Документы кандидата")
@@ -521,16 +536,89 @@ def show_candidate_details_view(candidate_uuid):
     
     # Список документов
     st.markdown("### Список документов")
+    show_documents_export(
+        [candidate['candidate_uuid']],
+        f"{candidate['last_name']} {candidate['first_name']}",
+        key=candidate['candidate_uuid']
+    )
     for _, doc in documents.iterrows():
         show_document_card(doc, is_admin)
 
+# --- Импорт кандидатов из файла ---
+def render_invitation_status(import_id: str):
+    """Прогресс рассылки приглашений импорта (письма отправляет отдельный воркер)"""
+    progress = get_invitation_progress(import_id)
+    if progress.is_running:
+        st.progress(
+            progress.fraction,
+            text=f"Рассылка приглашений: {progress.sent + progress.failed}/{progress.total}"
+        )
+        if st.button("🔄 Обновить прогресс", key="refresh_invitations"):
+            st.rerun()
+    elif progress.total:
+        finished = f" в {progress.last_sent_at.strftime('%H:%M')}" if progress.last_sent_at else ""
+        st.caption(f"Приглашения отправлены: {progress.sent} из {progress.total}{finished}")
+    if progress.failed:
+        st.warning(f"Не удалось отправить {progress.failed} приглашений")
+        if st.button("Повторить отправку", key="retry_invitations"):
+            retry_invitations(import_id)
+            st.rerun()
+
+def show_import_form():
+    st.subheader("Импорт кандидатов из файла")
+    st.caption("CSV или XLSX с колонками: Имя, Фамилия, Email, Пол (М/Ж), Заметки (необязательно)")
+
+    uploaded_file = st.file_uploader("Файл с кандидатами", type=["csv", "xlsx"])
+    if uploaded_file is not None:
+        try:
+            candidates, errors = validate_candidates(
+                read_candidates_file(uploaded_file.name, uploaded_file.getvalue())
+            )
+        except Exception as e:
+            st.error(f"Не удалось прочитать файл: {str(e)}")
+            candidates, errors = [], []
+
+        st.write(f"Готово к импорту: {len(candidates)}, с ошибками: {len(errors)}")
+        if errors:
+            st.dataframe(
+                pd.DataFrame(errors, columns=["Строка", "Ошибка"]),
+                hide_index=True,
+                use_container_width=True
+            )
+
+        if candidates and st.button(f"Импортировать {len(candidates)} кандидатов", type="primary"):
+            try:
+                user_data = get_current_user_data()
+                import_id, created, documents = import_candidates(candidates, user_data['user_uuid'])
+                # Прогресс читается из базы, поэтому переживает перезапуск портала
+                st.session_state['invitation_import_id'] = import_id
+                st.success(f"Добавлено кандидатов: {created}, документов: {documents}")
+            except Exception as e:
+                st.error(f"Ошибка: {str(e)}")
+
+    if import_id := st.session_state.get('invitation_import_id'):
+        render_invitation_status(import_id)
+
+    if st.button("Закрыть", key="close_import_form"):
+        st.session_state['show_import_form'] = False
+        st.rerun()
+
 # --- Главная страница (список кандидатов) ---
 def show_candidates_list():
     st.title("👥 Список кандидатов")
     
     # Добавление нового кандидата
-    if st.button("➕ Добавить кандидата", use_container_width=True):
-        st.session_state['show_add_form'] = True
+    cols = st.columns(2)
+    with cols[0]:
+        if st.button("➕ Добавить кандидата", use_container_width=True):
+            st.session_state['show_add_form'] = True
+    with cols[1]:
+        if st.button("📥 Импорт из файла", use_container_width=True):
+            st.session_state['show_import_form'] = True
+
+    if st.session_state.get('show_import_form', False):
+        show_import_form()
+        return
     
     if st.session_state.get('show_add_form', False):
         with st.form("add_form"):
@@ -603,6 +691,9 @@ def show_candidates_list():
         st.info("Кандидаты не найдены")
         return
     
+    # Архив документов всех кандидатов из списка с учетом фильтров
+    show_documents_export(candidates['candidate_uuid'], "Кандидаты", key="candidates_list")
+    
     # Отображение списка кандидатов
     for _, candidate in candidates.iterrows():
         with st.container(border=True):
@@ -4,11 +4,12 @@ from datetime import datetime
 import logging
 from frontend_auth.auth import check_auth, login, logout, get_current_user_data, hide_pages, ADMIN_ROLE
 from core.config import MESSAGE_PREVIEW_LENGTH
-from service.gemini_service import generate_expert_response
+from service.gemini_service import start_expert_response_stream
 from repository.strml_repository import get_all_chats, save_message
 from service.bot_service import send_telegram_message
 from typing import Optional
 from repository.database import get_connection
+from repository.audit_events import AUDIT_EVENT_TITLES, get_audit_events
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -68,6 +69,70 @@ def display_chat_messages(messages, candidate_name):
             st.session_state.messages_offset += MESSAGES_PER_LOAD
             st.rerun()
 
+def display_audit_events(chat_id: int):
+    """Журнал действий кандидата в боте (comm.audit_event), новые первыми"""
+    try:
+        events = get_audit_events(chat_id)
+    except Exception as e:
+        logger.error(f"Error getting audit events: {e}")
+        st.error("Не удалось загрузить действия в боте")
+        return
+    if not events:
+        st.info("Действий в боте пока нет")
+        return
+
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Время": created_at.strftime("%d.%m %H:%M"),
+                "Действие": AUDIT_EVENT_TITLES.get(event, event.name),
+                "Подробности": ", ".join(str(value) for value in details.values()) if details else "",
+            }
+            for event, details, created_at in events
+        ]),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+def cancel_ai_job():
+    """Отменяет генерацию ответа, если она еще идет"""
+    job = st.session_state.get("ai_job")
+    if job is not None:
+        job.cancel()
+    st.session_state.ai_job = None
+
+def render_ai_job():
+    """
+    Показывает ответ AI по мере генерации. Генерация идет в фоне, поэтому
+    нажатие любой кнопки прерывает только отрисовку, а не запрос к модели.
+    """
+    job = st.session_state.get("ai_job")
+    if job is None:
+        if metrics := st.session_state.get("ai_metrics"):
+            st.caption(
+                f"Первый фрагмент: {metrics['time_to_first_token_ms'] or '-'} мс, "
+                f"всего: {metrics['total_ms'] or '-'} мс"
+            )
+        return
+
+    if job.is_running and st.button("⏹ Остановить генерацию"):
+        job.cancel()
+
+    with st.chat_message("assistant", avatar="🤖"):
+        st.write_stream(job.iter_text())
+
+    if job.status == "error":
+        st.error("Извините, возникла ошибка при генерации ответа.")
+    elif job.status in ("cancelled", "timeout"):
+        st.toast("Генерация остановлена, в поле ответа - полученная часть")
+
+    if job.text:
+        st.session_state.generated_response = job.text
+    st.session_state.ai_metrics = job.metrics()
+    st.session_state.ai_job = None
+    if job.text:
+        st.rerun()
+
 def initialize_session_state():
     """Инициализирует состояние сессии"""
     defaults = {
@@ -76,7 +141,9 @@ def initialize_session_state():
         'last_update': datetime.now(),
         'show_ai_assistant': False,
         'messages_offset': 0,
-        'needs_rerun': False
+        'needs_rerun': False,
+        'ai_job': None,
+        'ai_metrics': None
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -96,12 +163,7 @@ def chat():
         hide_pages(["1_📊_Дашборд", "2_📄_Документы"])
     # Проверяем роли
     is_admin = ADMIN_ROLE_ID in user_data.get('roles_ids')
-    print(user_data)
-    print(user_data.get('roles_ids'))
     tutor_id = user_data.get('user_uuid') if not is_admin else None
-    print(is_admin)
-    print(tutor_id)
-    print(st.session_state)
 
     initialize_session_state()
 
@@ -124,6 +186,7 @@ def chat():
             for _, candidate in chats_df.iterrows():
                 btn_key = f"chat_{candidate['telegram_chat_id']}"
                 if st.button(f"{candidate['first_name']} {candidate['last_name']}", key=btn_key, use_container_width=True):
+                    cancel_ai_job()
                     st.session_state.update({
                         'selected_chat': candidate["telegram_chat_id"],
                         'candidate_name': f"{candidate['first_name']} {candidate['last_name']}",
@@ -163,6 +226,10 @@ def chat():
                 )
                 display_chat_messages(messages, st.session_state.candidate_name.split()[0])
 
+        # Служебные события бота хранятся отдельно от переписки и грузятся только по запросу
+        if st.toggle("🗂 Действия в боте", key="show_audit_events"):
+            display_audit_events(st.session_state.selected_chat)
+
         # Блок AI ассистента
         if st.session_state.show_ai_assistant:
             last_candidate_message = next((msg[0] for msg in reversed(messages) if not msg[2]), None)
@@ -173,9 +240,12 @@ def chat():
                     st.info(last_candidate_message)
                     
                     if st.button("🎯 Сгенерировать ответ"):
-                        with st.spinner("Генерация ответа..."):
-                            expert_response = generate_expert_response(last_candidate_message, messages)
-                            st.session_state.generated_response = expert_response
+                        cancel_ai_job()
+                        st.session_state.pop("generated_response", None)
+                        st.session_state.ai_metrics = None
+                        st.session_state.ai_job = start_expert_response_stream(last_candidate_message, messages)
+
+                    render_ai_job()
                     
                     if "generated_response" in st.session_state:
                         response = st.text_area("Ответ:", value=st.session_state.generated_response, height=200)
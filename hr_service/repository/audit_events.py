@@ -0,0 +1,160 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from typing import Optional
+
+from psycopg2.extras import Json, execute_values
+
+from core.config import settings
+from core.metrics import AUDIT_EVENTS_DROPPED
+from repository.database import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class AuditEvent(IntEnum):
+    """Коды событий бота в comm.audit_event; значения хранятся в базе, их нельзя менять"""
+    MAIN_MENU_SHOWN = 1
+    BOT_STARTED = 2
+    INVITATION_CODE_ENTERED = 3
+    AUTHORIZED = 4
+    PRIVACY_ACCEPTED = 5
+    PRIVACY_DECLINED = 6
+    DOCUMENTS_REQUESTED = 7
+    DOCUMENTS_LIST_SHOWN = 8
+    DOCUMENT_DOWNLOADED = 9
+    DOCUMENT_STATUS_CHANGED = 10
+    LOCATION_REQUESTED = 11
+    LOCATION_SAVED = 12
+    LOCATION_VIEWED = 13
+    PROFILE_VIEWED = 14
+    SUPPORT_OPENED = 15
+    SUPPORT_MENU_SHOWN = 16
+    SUPPORT_MESSAGE_STARTED = 17
+    SUPPORT_MESSAGE_SENT = 18
+    RETURNED_TO_MENU = 19
+
+
+# Подписи событий для журнала в чате HR
+AUDIT_EVENT_TITLES = {
+    AuditEvent.MAIN_MENU_SHOWN: "Показано главное меню",
+    AuditEvent.BOT_STARTED: "Запустил бота",
+    AuditEvent.INVITATION_CODE_ENTERED: "Ввел код приглашения",
+    AuditEvent.AUTHORIZED: "Авторизовался",
+    AuditEvent.PRIVACY_ACCEPTED: "Принял политику конфиденциальности",
+    AuditEvent.PRIVACY_DECLINED: "Отказался от политики конфиденциальности",
+    AuditEvent.DOCUMENTS_REQUESTED: "Запросил документы",
+    AuditEvent.DOCUMENTS_LIST_SHOWN: "Показан список документов",
+    AuditEvent.DOCUMENT_DOWNLOADED: "Скачал документ",
+    AuditEvent.DOCUMENT_STATUS_CHANGED: "Изменен статус документа",
+    AuditEvent.LOCATION_REQUESTED: "Запрошена геолокация",
+    AuditEvent.LOCATION_SAVED: "Отправил геолокацию",
+    AuditEvent.LOCATION_VIEWED: "Посмотрел сохраненную геолокацию",
+    AuditEvent.PROFILE_VIEWED: "Посмотрел профиль",
+    AuditEvent.SUPPORT_OPENED: "Обратился в поддержку",
+    AuditEvent.SUPPORT_MENU_SHOWN: "Показано меню поддержки",
+    AuditEvent.SUPPORT_MESSAGE_STARTED: "Начал писать в поддержку",
+    AuditEvent.SUPPORT_MESSAGE_SENT: "Отправил сообщение в поддержку",
+    AuditEvent.RETURNED_TO_MENU: "Вернулся в меню",
+}
+
+
+class AuditEventSink:
+    """
+    Буфер событий аудита. record() только добавляет событие в очередь и не ходит
+    в базу; фоновый поток пишет пачками раз в FLUSH_INTERVAL или сразу, как только
+    набралось BATCH_SIZE событий. Если база недоступна, события копятся до
+    MAX_BUFFER, дальше самые старые отбрасываются
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, chat_id: int, event: AuditEvent, **details):
+        row = (int(chat_id), int(event), Json(details) if details else None, datetime.now())
+        with self._lock:
+            self._append([row])
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-events", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _append(self, rows: list, front: bool = False):
+        if front:
+            self._buffer.extendleft(reversed(rows))
+        else:
+            self._buffer.extend(rows)
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            for _ in range(overflow):
+                self._buffer.popleft()
+            AUDIT_EVENTS_DROPPED.inc(overflow)
+            logger.warning(f"Буфер событий аудита переполнен, отброшено {overflow}")
+
+    def flush(self) -> int:
+        """Пишет накопленные события одним запросом, возвращает их число"""
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        if not rows:
+            return 0
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_values(
+                        cursor,
+                        "INSERT INTO comm.audit_event (chat_id, event, details, created_at) VALUES %s",
+                        rows,
+                        page_size=self.batch_size,
+                    )
+                conn.commit()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Ошибка записи событий аудита: {e}")
+            with self._lock:
+                self._append(rows, front=True)
+            return 0
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+audit_events = AuditEventSink(
+    batch_size=settings.audit.BATCH_SIZE,
+    flush_interval=settings.audit.FLUSH_INTERVAL,
+    max_buffer=settings.audit.MAX_BUFFER,
+)
+# Поток-писатель фоновый: оставшиеся события дописываем при выходе из процесса
+atexit.register(audit_events.flush)
+
+
+def record_event(chat_id: int, event: AuditEvent, **details):
+    """Записывает событие бота в журнал аудита (в фоне, пачками)"""
+    audit_events.record(chat_id, event, **details)
+
+
+def get_audit_events(chat_id: int, limit: int = 100) -> list[tuple]:
+    """Последние события чата: (событие, подробности, время), новые первыми"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT event, details, created_at
+                FROM comm.audit_event
+                WHERE chat_id = %s
+                ORDER BY created_at DESC
+                LIMIT %s
+            """, (chat_id, limit))
+            return [(AuditEvent(event), details, created_at) for event, details, created_at in cursor.fetchall()]
@@ -1,17 +1,69 @@
 from repository.database import get_connection
 import logging
 
+import psycopg2.extensions
+
 import asyncio
 
 from aiogram import Bot
 from core.config import settings, DOCUMENT_STATUSES
+from core.metrics import track
 
-import pandas as pd
 from datetime import datetime
+from utils.ttl_cache import TTLCache
+from repository.template_registry import bump_template_version, template_registry
+from repository.audit_events import AuditEvent, record_event
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# chat_id -> ((candidate_uuid, first_name, last_name), [(document_id, name, status_id, template_id), ...]).
+# Запись сбрасывается по NOTIFY от триггеров hr.candidate_document и hr.candidate (миграция 0010),
+# кто бы ни менял статус: портал HR, сервис заказа или другая реплика бота
+chat_documents_cache = TTLCache(maxsize=settings.bot.DOCUMENTS_CACHE_SIZE, ttl=settings.bot.DOCUMENTS_CACHE_TTL)
+DOCUMENTS_CHANNEL = "hr_candidate_documents"
+LISTEN_RETRY_SECONDS = 5
+
+def invalidate_chat_documents(chat_id: int):
+    """Сбрасывает кэш кандидата и документов чата"""
+    chat_documents_cache.invalidate(int(chat_id))
+
+async def listen_document_changes():
+    """
+    Фоновая задача бота: слушает DOCUMENTS_CHANNEL и сбрасывает записи кэша
+    по chat_id из уведомлений. При обрыве соединения переподключается и очищает
+    кэш целиком: уведомления за это время потеряны
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        conn = None
+        try:
+            conn = get_connection()
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {DOCUMENTS_CHANNEL}")
+            chat_documents_cache.clear()
+
+            readable = asyncio.Event()
+            loop.add_reader(conn.fileno(), readable.set)
+            try:
+                while True:
+                    await readable.wait()
+                    readable.clear()
+                    conn.poll()
+                    while conn.notifies:
+                        invalidate_chat_documents(conn.notifies.pop().payload)
+            finally:
+                loop.remove_reader(conn.fileno())
+        except Exception as e:
+            logger.error(f"Error listening for document changes: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+        # Пока слушателя нет, кэш не используется дольше TTL: сбрасываем и его
+        chat_documents_cache.clear()
+        await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
 def update_candidate(telegram_chat_id, code):
     with get_connection() as connection:
         with connection.cursor() as cursor:
@@ -98,68 +150,100 @@ async def get_candidate_uuid_by_chat_id(chat_id: int):
         logger.error(f"Error getting candidate UUID: {e}")
         return None
 
-async def create_required_documents(candidate_uuid: str):
-    """Создает записи для требуемых документов кандидата"""
+def _fetch_candidate_documents(cursor, chat_id: int):
+    """Кандидат и его документы за один запрос, названия и порядок шаблонов - из реестра"""
+    cursor.execute("""
+        SELECT c.candidate_uuid, c.first_name, c.last_name,
+               d.document_id, d.status_id, d.template_id
+        FROM hr.candidate c
+        LEFT JOIN hr.candidate_document d ON d.candidate_id = c.candidate_uuid
+        WHERE c.telegram_chat_id = %s
+    """, (chat_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None, []
+    candidate = (str(rows[0][0]), rows[0][1], rows[0][2])
+    documents = [
+        (document_id, template_registry.name(template_id), status_id, template_id)
+        for _, _, _, document_id, status_id, template_id in rows
+        if document_id is not None
+    ]
+    documents.sort(key=lambda doc: template_registry.order(doc[3]))
+    return candidate, documents
+
+async def get_candidate_documents_by_chat_id(chat_id: int):
+    """
+    Возвращает (candidate_uuid, first_name, last_name) и список документов кандидата
+    (document_id, name, status_id, template_id) с учетом кэша.
+    Если документов еще нет, создает обязательные.
+    """
+    cached = chat_documents_cache.get(chat_id)
+    if cached is not None:
+        return cached
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            candidate, documents = _fetch_candidate_documents(cursor, chat_id)
+            if candidate is None:
+                return None, []
+
+            if not documents:
+                await create_required_documents(candidate[0])
+                candidate, documents = _fetch_candidate_documents(cursor, chat_id)
+
+    chat_documents_cache.set(chat_id, (candidate, documents))
+    return candidate, documents
+
+async def create_required_documents(candidate_uuid: str) -> int:
+    """Создает записи для требуемых документов кандидата, возвращает количество созданных"""
     try:
         with get_connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) FROM hr.document_template")
-                count = cursor.fetchone()[0]
-                
-                if count == 0:
-                    # Если нет шаблонов, создаем базовые
-                    cursor.execute("""
-                        INSERT INTO hr.document_template (name, description, is_required, processing_days, order_position, instructions)
-                        VALUES 
+                # Если нет шаблонов, создаем базовые
+                cursor.execute("""
+                    INSERT INTO hr.document_template (name, description, is_required, processing_days, order_position, instructions)
+                    SELECT name, description, is_required, processing_days, order_position, instructions
+                    FROM (VALUES
                         ('Паспорт', 'Скан паспорта', TRUE, 1, 1, 'Загрузите скан паспорта'),
                         ('ИНН', 'Скан ИНН', TRUE, 1, 2, 'Загрузите скан ИНН'),
                         ('СНИЛС', 'Скан СНИЛС', TRUE, 1, 3, 'Загрузите скан СНИЛС'),
                         ('Выписка банка', 'Выписка с банковского счета в Excel', TRUE, 1, 4, 'Загрузите выписку с банковского счета')
-                    """)
-                
-                # Получаем все шаблоны документов
-                cursor.execute("""
-                    SELECT template_id FROM hr.document_template
-                    ORDER BY order_position
+                    ) AS defaults (name, description, is_required, processing_days, order_position, instructions)
+                    WHERE NOT EXISTS (SELECT 1 FROM hr.document_template)
                 """)
+                seeded = cursor.rowcount > 0
+                if seeded:
+                    bump_template_version(cursor)
                 
-                templates = cursor.fetchall()
-                
-                # Проверяем, есть ли уже документы у кандидата
+                # Недостающие документы одним запросом, уникальный ключ (candidate_id, template_id)
                 cursor.execute("""
-                    SELECT template_id FROM hr.candidate_document
-                    WHERE candidate_id = %s
+                    INSERT INTO hr.candidate_document (
+                        document_id,
+                        candidate_id,
+                        template_id,
+                        status_id,
+                        created_at,
+                        updated_at
+                    )
+                    SELECT gen_random_uuid(), %s, t.template_id, 1, NOW(), NOW() -- Статус "Не загружен"
+                    FROM hr.document_template t
+                    ON CONFLICT (candidate_id, template_id) DO NOTHING
                 """, (candidate_uuid,))
-                
-                existing_templates = [row[0] for row in cursor.fetchall()]
-                
-                for template in templates:
-                    template_id = template[0]
-                    if template_id not in existing_templates:
-                        cursor.execute("""
-                            INSERT INTO hr.candidate_document (
-                                document_id,
-                                candidate_id,
-                                template_id,
-                                status_id,
-                                created_at,
-                                updated_at
-                            ) VALUES (
-                                gen_random_uuid(),
-                                %s,
-                                %s,
-                                1, -- Статус "Не загружен"
-                                NOW(),
-                                NOW()
-                            )
-                        """, (candidate_uuid, template_id))
+                created = cursor.rowcount
                 
                 conn.commit()
+                if seeded:
+                    template_registry.invalidate()
+                return created
     except Exception as e:
         logger.error(f"Error creating required documents: {e}")
+        return 0
 
 async def process_bank_statement(file_path, candidate_uuid):
     """Обработка банковской выписки из Excel файла"""
+    # pandas нужен только здесь, поэтому не замедляет холодный старт бота
+    import pandas as pd
+
     try:
         # Загружаем Excel файл
         df = pd.read_excel(file_path)
@@ -250,7 +334,8 @@ def send_telegram_message(chat_id: int, text: str):
     async def async_send():
         bot = Bot(token=settings.bot.TELEGRAM_TOKEN)
         try:
-            await bot.send_message(chat_id=int(chat_id), text=text)
+            with track("telegram", "SendMessage"):
+                await bot.send_message(chat_id=int(chat_id), text=text)
             logger.info(f"Сообщение отправлено в чат {chat_id}")
         except Exception as e:
             logger.error(f"Ошибка при отправке сообщения: {e}")
@@ -271,7 +356,7 @@ def get_status_text(status_id: int) -> str:
     return f"{status[1]} {status[0]}"
 
 async def update_document_status(document_id: int, new_status: int, chat_id: int, doc_name: str):
-    """Обновляет статус документа и сохраняет сообщение"""
+    """Обновляет статус документа и пишет событие в журнал аудита"""
     try:
         with get_connection() as conn:
             with conn.cursor() as cursor:
@@ -280,7 +365,7 @@ async def update_document_status(document_id: int, new_status: int, chat_id: int
                     SET status_id = %s,
                         updated_at = NOW()
                     WHERE document_id = %s
-                    RETURNING document_id, status_id
+                    RETURNING document_id, status_id, candidate_id
                 """, (new_status, document_id))
                 
                 updated_doc = cursor.fetchone()
@@ -292,20 +377,13 @@ async def update_document_status(document_id: int, new_status: int, chat_id: int
                     """, (updated_doc[0], updated_doc[1]))
                     
                     conn.commit()
+                    # Уведомление триггера придет следом, а ответ кандидату нужен уже с новым статусом
+                    invalidate_chat_documents(chat_id)
                     
                     # Сохраняем информативное сообщение
-                    action = {
-                        1: "сброшен в 'Не загружен'",
-                        2: "отмечен как заказанный",
-                        3: "отправлен на проверку",
-                        4: "отмечен как проверенный",
-                        5: "запрошена повторная загрузка"
-                    }.get(new_status, "изменен")
-                    
-                    await save_message(
-                        chat_id,
-                        f"Документ '{doc_name}' {action}",
-                        True
+                    record_event(
+                        chat_id, AuditEvent.DOCUMENT_STATUS_CHANGED,
+                        document=doc_name, status_id=new_status,
                     )
                     return True
         return False
@@ -1,22 +1,155 @@
+import threading
+import time
+
 import psycopg2
+import psycopg2.extensions
 from core.config import settings
+from core.metrics import observe_query, track
+from repository.query_trace import note_query, note_rows, query_tracer
 from minio import Minio
 from minio.error import S3Error
-from core.config import settings 
+from core.config import settings
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """
+    Курсор, который пишет время каждого запроса в метрики, а при включенной
+    трассировке - в статистику по месту вызова и журнал медленных запросов
+    """
+
+    def _statement_text(self, query) -> str:
+        if isinstance(query, bytes):
+            # execute_values передает готовый запрос с подставленными значениями:
+            # отрезаем их, чтобы не писать данные в лог и группировать такие запросы вместе
+            text = query.decode("utf-8", "replace")
+            head, separator, _ = text.partition(" VALUES ")
+            return f"{head} VALUES ..." if separator else text
+        if isinstance(query, str):
+            return query
+        return query.as_string(self)  # psycopg2.sql.Composed
+
+    def _observe(self, query, params, seconds: float, failed: bool):
+        observe_query(query, seconds, failed)
+        note_query()
+        if query_tracer is not None:
+            query_tracer.record(self._statement_text(query), params, seconds, self.rowcount, failed)
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._observe(query, vars, time.perf_counter() - started, failed)
+
+    def executemany(self, query, vars_list):
+        # Для EXPLAIN сохраняем первый набор параметров, если это не одноразовый генератор
+        sample = vars_list[0] if isinstance(vars_list, (list, tuple)) and vars_list else None
+        started = time.perf_counter()
+        failed = False
+        try:
+            return super().executemany(query, vars_list)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._observe(query, sample, time.perf_counter() - started, failed)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            note_rows((row,))
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        note_rows(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        note_rows(rows)
+        return rows
+
+    def __iter__(self):
+        # Итерация по курсору в C не вызывает переопределенные fetch*; пачки по itersize,
+        # как у встроенной итерации, чтобы именованный курсор не ходил в базу за каждой строкой
+        while True:
+            rows = self.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+
 def get_connection():
-        return psycopg2.connect(host=settings.project_management_setting.DB_HOST,  
+        return psycopg2.connect(host=settings.project_management_setting.DB_HOST,
         port="5432",
         user="user",
         password="password",
-        database="database")
+        database="database",
+        cursor_factory=InstrumentedCursor)
+
+
+class InstrumentedMinio:
+    """Обертка над клиентом MinIO: время и ошибки каждого вызова попадают в метрики"""
+
+    def __init__(self, client: Minio):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            with track("minio", name):
+                return attr(*args, **kwargs)
+
+        return call
+
 
 def get_minio_client():
     """
     Создает и возвращает клиент MinIO с настройками из конфига
     """
-    return Minio(
+    return InstrumentedMinio(Minio(
         endpoint=settings.minio.MINIO_ENDPOINT,  # Обычно "localhost:9000"
         access_key='minioadmin',  # Логин (по умолчанию "minioadmin")
         secret_key='minioadmin',  # Пароль (по умолчанию "minioadmin")
         secure=False,
+    ))
+
+
+def get_public_minio_client():
+    """
+    Клиент MinIO с адресом, доступным из браузера: только для подписанных ссылок.
+    Регион задан явно, чтобы подпись ссылки не требовала запроса к MinIO
+    """
+    return Minio(
+        endpoint=settings.minio.MINIO_PUBLIC_ENDPOINT,
+        access_key='minioadmin',
+        secret_key='minioadmin',
+        secure=False,
+        region='us-east-1',
     )
+
+
+# Бакеты, существование которых уже проверено этим процессом: бакеты не удаляются,
+# поэтому bucket_exists достаточно сделать один раз, а не перед каждой загрузкой
+_known_buckets: set = set()
+_known_buckets_lock = threading.Lock()
+
+
+def ensure_bucket(minio_client, bucket: str):
+    """Создает бакет, если его нет; повторные вызовы для того же бакета не ходят в MinIO"""
+    if bucket in _known_buckets:
+        return
+    with _known_buckets_lock:
+        if bucket in _known_buckets:
+            return
+        if not minio_client.bucket_exists(bucket):
+            minio_client.make_bucket(bucket)
+        _known_buckets.add(bucket)
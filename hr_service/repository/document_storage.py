@@ -0,0 +1,178 @@
+import hashlib
+import logging
+from typing import BinaryIO, Optional
+
+from core.metrics import DOCUMENT_UPLOADS_DEDUPLICATED
+from repository.database import ensure_bucket, get_connection, get_minio_client
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_BUCKET = "candidates"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Канал, по которому воркер превью узнает о новых файлах (service/document_preview_service.py)
+PREVIEW_CHANNEL = "hr_document_preview"
+
+
+def hash_content(file: BinaryIO) -> tuple[str, int]:
+    """sha256 и размер файла, читая его кусками; поток возвращается в начало"""
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def content_key(content_sha256: str, extension: str) -> str:
+    """Ключ файла по содержимому: повторная загрузка того же файла дает тот же ключ"""
+    return f"sha256/{content_sha256[:2]}/{content_sha256}.{extension}"
+
+
+def preview_key(document_id: str, content_sha256: Optional[str]) -> str:
+    """Ключ превью рядом с оригиналом: у одинаковых файлов превью тоже общее"""
+    if content_sha256:
+        return f"previews/sha256/{content_sha256[:2]}/{content_sha256}.jpg"
+    return f"previews/{document_id}.jpg"
+
+
+def _lock_content(cursor, content_sha256: str):
+    # Загрузка и освобождение файла с одним хэшем не должны идти одновременно:
+    # иначе файл удалят в тот момент, когда на него появилась новая ссылка
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (content_sha256,))
+
+
+def _find_content(cursor, content_sha256: str) -> Optional[tuple]:
+    """(бакет, ключ) файла с таким хэшем, на который уже ссылается документ"""
+    cursor.execute("""
+        SELECT s3_bucket, s3_key
+        FROM hr.candidate_document
+        WHERE content_sha256 = %s
+        LIMIT 1
+    """, (content_sha256,))
+    return cursor.fetchone()
+
+
+def store_document(document_id: str, file: BinaryIO, extension: str, content_type: str) -> Optional[str]:
+    """
+    Сохраняет загруженный файл документа. Файл хэшируется при чтении; если такой
+    же файл уже лежит в MinIO (у этого или другого документа), запись в MinIO
+    пропускается и документ ссылается на существующий объект. Старый файл
+    документа удаляется, когда на него не осталось ссылок.
+
+    Загрузка в MinIO идет до транзакции: блокировка по хэшу держится только на
+    поиск и UPDATE, а не на время передачи файла. Если параллельно тот же файл
+    загрузил другой документ, наш объект по тому же ключу просто перезапишет его
+    тем же содержимым; объект без ссылок под ключом по содержимому безвреден.
+    :return: candidate_id документа или None, если документ не найден
+    """
+    content_sha256, size = hash_content(file)
+    minio_client = get_minio_client()
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            existing = _find_content(cursor, content_sha256)
+    uploaded = None
+
+    while True:
+        if existing is None and uploaded is None:
+            uploaded = DOCUMENTS_BUCKET, content_key(content_sha256, extension)
+            ensure_bucket(minio_client, DOCUMENTS_BUCKET)
+            file.seek(0)
+            minio_client.put_object(*uploaded, file, length=size, content_type=content_type)
+
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                _lock_content(cursor, content_sha256)
+                existing = _find_content(cursor, content_sha256)
+                if existing is None and uploaded is None:
+                    # Файл удалили после проверки (release_content): загружаем и повторяем
+                    conn.rollback()
+                    continue
+
+                if existing:
+                    bucket, key = existing
+                    if uploaded is None:
+                        DOCUMENT_UPLOADS_DEDUPLICATED.inc()
+                        logger.info(f"Документ {document_id}: файл уже есть в {bucket}/{key}, загрузка пропущена")
+                else:
+                    bucket, key = uploaded
+                    try:
+                        # release_content удаляет файлы без ссылок под той же блокировкой:
+                        # если он успел удалить только что загруженный объект, грузим заново
+                        minio_client.stat_object(bucket, key)
+                    except Exception:
+                        conn.rollback()
+                        uploaded = None
+                        continue
+
+                cursor.execute("""
+                    WITH previous AS (
+                        SELECT document_id, s3_bucket, s3_key, content_sha256
+                        FROM hr.candidate_document
+                        WHERE document_id = %s
+                        FOR UPDATE
+                    )
+                    UPDATE hr.candidate_document d
+                    SET
+                        s3_bucket = %s,
+                        s3_key = %s,
+                        content_type = %s,
+                        file_size = %s,
+                        content_sha256 = %s,
+                        preview_key = NULL,
+                        preview_error = NULL,
+                        submitted_at = NOW(),
+                        updated_at = NOW()
+                    FROM previous
+                    WHERE d.document_id = previous.document_id
+                    RETURNING d.candidate_id, previous.s3_bucket, previous.s3_key, previous.content_sha256
+                """, (document_id, bucket, key, content_type, size, content_sha256))
+                updated = cursor.fetchone()
+                cursor.execute(f"NOTIFY {PREVIEW_CHANNEL}")
+            conn.commit()
+        break
+
+    if updated is None:
+        return None
+    candidate_id, previous_bucket, previous_key, previous_sha256 = updated
+    if previous_sha256:
+        if previous_sha256 != content_sha256:
+            release_content(previous_bucket, previous_key, previous_sha256)
+    elif previous_key and (previous_bucket, previous_key) != (bucket, key):
+        # Файл, загруженный до хэширования, лежит по ключу документа и больше ни с кем не общий
+        remove_objects(previous_bucket, [previous_key, preview_key(document_id, None)])
+    return candidate_id
+
+
+def remove_objects(bucket: str, keys: list):
+    minio_client = get_minio_client()
+    for key in keys:
+        try:
+            minio_client.remove_object(bucket, key)
+        except Exception as e:
+            logger.error(f"Ошибка удаления файла {bucket}/{key}: {e}")
+
+
+def release_content(bucket: str, key: str, content_sha256: str) -> bool:
+    """Удаляет файл и его превью из MinIO, если ни один документ больше на них не ссылается"""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                _lock_content(cursor, content_sha256)
+                cursor.execute(
+                    "SELECT EXISTS (SELECT 1 FROM hr.candidate_document WHERE content_sha256 = %s)",
+                    (content_sha256,),
+                )
+                if cursor.fetchone()[0]:
+                    return False
+                minio_client = get_minio_client()
+                minio_client.remove_object(bucket, key)
+                minio_client.remove_object(bucket, preview_key(None, content_sha256))
+            conn.commit()
+        logger.info(f"Удален файл без ссылок {bucket}/{key}")
+        return True
+    except Exception as e:
+        # Не удаленный файл занимает место, но ничего не ломает
+        logger.error(f"Ошибка удаления файла {bucket}/{key}: {e}")
+        return False
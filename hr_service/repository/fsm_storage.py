@@ -0,0 +1,63 @@
+import json
+import logging
+from functools import partial
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FSM_KEY_PREFIX = "hr_fsm"
+
+# Компактная сериализация данных состояния: без пробелов и без \u-экранирования кириллицы
+compact_json_dumps = partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+
+
+def get_fsm_storage() -> BaseStorage:
+    """
+    Возвращает хранилище FSM в зависимости от настроек.
+
+    - redis: состояние и данные (AuthState, docs_info, selected_doc) переживают
+      перезапуск и доступны всем репликам бота за балансировщиком вебхуков
+    - memory: локальная замена для разработки и тестов, живет в одном процессе
+    """
+    backend = (settings.bot.FSM_STORAGE or "memory").lower()
+
+    if backend == "memory":
+        logger.info("FSM storage: memory")
+        return MemoryStorage()
+
+    if backend == "redis":
+        from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+        from redis.asyncio import Redis
+
+        redis = Redis(
+            host=settings.redis.REDIS_HOST,
+            port=settings.redis.REDIS_PORT,
+            db=settings.redis.REDIS_DB,
+            password=settings.redis.REDIS_PASSWORD,
+        )
+        logger.info(f"FSM storage: redis {settings.redis.REDIS_HOST}:{settings.redis.REDIS_PORT}")
+        return RedisStorage(
+            redis=redis,
+            key_builder=DefaultKeyBuilder(prefix=FSM_KEY_PREFIX, with_bot_id=True),
+            state_ttl=settings.bot.FSM_STATE_TTL,
+            data_ttl=settings.bot.FSM_DATA_TTL,
+            json_dumps=compact_json_dumps,
+            json_loads=json.loads,
+        )
+
+    raise ValueError(f"Неизвестное хранилище FSM: {backend}")
+
+
+def get_events_isolation(storage: BaseStorage) -> BaseEventIsolation:
+    """
+    Возвращает блокировку апдейтов по чату, согласованную с хранилищем FSM:
+    для Redis блокировка общая для всех реплик бота, иначе - в пределах процесса
+    """
+    create_isolation = getattr(storage, "create_isolation", None)
+    if create_isolation is not None:
+        return create_isolation()
+    return SimpleEventIsolation()
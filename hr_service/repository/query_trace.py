@@ -0,0 +1,224 @@
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import psycopg2.extensions
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Кадры этих файлов пропускаются при поиске места вызова запроса
+_SKIP_FILES = {"database.py", "query_trace.py", "extras.py", "contextlib.py"}
+EXPLAIN_OPERATIONS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+READ_OPERATIONS = ("SELECT", "WITH")
+STATEMENT_PREVIEW_LENGTH = 300
+
+
+@dataclass
+class QueryCounter:
+    queries: int = 0
+    rows: int = 0
+    # Приблизительный объем полученных данных: размер значений в текстовом виде
+    bytes: int = 0
+
+
+# Счетчик запросов текущего контекста (см. count_queries)
+_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@dataclass
+class QueryStat:
+    call_site: str
+    statement: str
+    calls: int = 0
+    errors: int = 0
+    rows: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # Параметры самого медленного выполнения: нужны только для EXPLAIN, в лог не пишутся
+    slowest_params: Any = field(default=None, repr=False)
+
+    def as_dict(self) -> dict:
+        return {
+            "call_site": self.call_site,
+            "statement": preview_statement(self.statement),
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+def find_call_site() -> str:
+    """Первый кадр стека за пределами обертки курсора и psycopg2: 'файл:строка функция'"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if os.path.basename(filename) not in _SKIP_FILES and f"{os.sep}psycopg2{os.sep}" not in filename:
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def preview_statement(statement: str) -> str:
+    """Запрос в одну строку, обрезанный для лога"""
+    text = " ".join(statement.split())
+    if len(text) > STATEMENT_PREVIEW_LENGTH:
+        return text[:STATEMENT_PREVIEW_LENGTH] + "..."
+    return text
+
+
+def redact_params(params) -> str:
+    """Параметры запроса без значений: в лог попадают только их типы"""
+    if params is None:
+        return "-"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in params.items()) + "}"
+    if isinstance(params, (list, tuple)):
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in params) + ")"
+    return f"<{type(params).__name__}>"
+
+
+class QueryTracer:
+    """
+    Статистика запросов по месту вызова в памяти процесса и журнал медленных запросов.
+    Хранит не больше max_entries различных запросов, вытесняя давно не выполнявшиеся.
+    """
+
+    def __init__(self, slow_threshold_ms: float, max_entries: int = 500):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.max_entries = max_entries
+        self._stats: OrderedDict[tuple[str, str], QueryStat] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, params, seconds: float, rows: int, failed: bool = False):
+        call_site = find_call_site()
+        key = (call_site, statement)
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = QueryStat(call_site=call_site, statement=statement)
+                self._stats[key] = stat
+                while len(self._stats) > self.max_entries:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(key)
+            stat.calls += 1
+            stat.errors += int(failed)
+            stat.rows += max(rows, 0)
+            stat.total_seconds += seconds
+            if seconds >= stat.max_seconds:
+                stat.max_seconds = seconds
+                stat.slowest_params = params
+
+        if seconds >= self.slow_threshold:
+            logger.warning(
+                f"Медленный запрос {seconds * 1000:.1f} мс, строк: {rows}, {call_site}: "
+                f"{preview_statement(statement)} | параметры: {redact_params(params)}"
+            )
+
+    def top(self, limit: int = 20, order_by: str = "total_seconds") -> list[QueryStat]:
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda stat: getattr(stat, order_by), reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+@contextmanager
+def count_queries():
+    """
+    Считает запросы и полученные строки внутри блока в текущей задаче asyncio
+    или потоке, включая потоки, запущенные через asyncio.to_thread
+    """
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+def note_query():
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.queries += 1
+
+
+def _value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value))
+
+
+def note_rows(rows):
+    """Учитывает полученные строки; без активного count_queries ничего не считает"""
+    counter = _query_counter.get()
+    if counter is None:
+        return
+    counter.rows += len(rows)
+    counter.bytes += sum(_value_size(value) for row in rows for value in row)
+
+
+def explain(statement: str, params=None) -> str:
+    """
+    План запроса. Чтение выполняется по-настоящему (EXPLAIN ANALYZE, BUFFERS) в
+    транзакции только для чтения; для записи - только оценка плана без выполнения:
+    даже откатанная запись берет блокировки и сдвигает последовательности
+    """
+    from repository.database import get_connection
+
+    operation = statement.lstrip(" \t\r\n(").split(None, 1)[0].upper() if statement.strip() else ""
+    if operation not in EXPLAIN_OPERATIONS:
+        return f"EXPLAIN не поддерживается для {operation or 'пустого запроса'}"
+
+    conn = get_connection()
+    try:
+        # Обычный курсор, чтобы сам EXPLAIN не попадал в статистику
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            if operation in READ_OPERATIONS:
+                # WITH может изменять данные: такой запрос read-only транзакция отклонит
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", params)
+            else:
+                cursor.execute(f"EXPLAIN {statement}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def explain_slowest(limit: int = 3) -> list[tuple[QueryStat, str]]:
+    """Планы выполнения самых медленных запросов с параметрами их худшего выполнения"""
+    if query_tracer is None:
+        return []
+    result = []
+    for stat in query_tracer.top(limit, order_by="max_seconds"):
+        try:
+            plan = explain(stat.statement, stat.slowest_params)
+        except Exception as e:
+            plan = f"Ошибка EXPLAIN: {e}"
+        result.append((stat, plan))
+    return result
+
+
+query_tracer: Optional[QueryTracer] = (
+    QueryTracer(settings.project_management_setting.SLOW_QUERY_MS)
+    if settings.project_management_setting.QUERY_TRACE
+    else None
+)
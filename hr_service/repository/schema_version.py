@@ -0,0 +1,38 @@
+import logging
+
+from core.config import settings
+from repository.database import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Ревизия alembic, без которой сервис не стартует: запросы рассчитаны на ее таблицы и индексы.
+# Ревизии нумеруются по порядку с ведущими нулями, поэтому сравниваются как строки
+REQUIRED_SCHEMA_REVISION = "0010"
+
+
+def get_schema_revision():
+    """Текущая ревизия alembic в базе или None, если миграции не применялись"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.alembic_version') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                return None
+            cursor.execute("SELECT version_num FROM alembic_version")
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+
+def check_schema_revision():
+    """
+    Проверяет при старте, что миграции применены. Бросает RuntimeError,
+    если база отстает от REQUIRED_SCHEMA_REVISION; SCHEMA_CHECK=false отключает проверку
+    """
+    if not settings.project_management_setting.SCHEMA_CHECK:
+        return
+    revision = get_schema_revision()
+    if revision is None or revision < REQUIRED_SCHEMA_REVISION:
+        raise RuntimeError(
+            f"Схема БД на ревизии {revision or 'без миграций'}, нужна {REQUIRED_SCHEMA_REVISION}: "
+            f"выполните make migrate (alembic upgrade head)"
+        )
+    logger.info(f"Схема БД на ревизии {revision}")
@@ -1,12 +1,15 @@
-from repository.database import get_connection, get_minio_client
+from psycopg2.extras import execute_values
+from repository.database import get_connection
 from datetime import datetime
 import logging
-import io
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Канал, по которому воркер приглашений узнает о новом импорте (service/candidate_invitation_service.py)
+INVITATION_CHANNEL = "hr_candidate_invitation"
+
 
 def save_message(chat_id: int, text: str, is_from_admin: bool = False):
     """Сохраняет сообщение в базу данных с проверкой существования чата"""
@@ -82,16 +85,8 @@ def add_candidate_to_db(first_name: str, last_name: str, email: str, sex: bool,
                 )
 
                 candidate_uuid, invitation_code = cursor.fetchone()
-
-                # Создание папки в MinIO
-                minio_client = get_minio_client()
-                bucket_name = "candidates"
-                folder_name = f"{candidate_uuid}/"
-
-                if not minio_client.bucket_exists(bucket_name):
-                    minio_client.make_bucket(bucket_name)
-
-                minio_client.put_object(bucket_name, folder_name, io.BytesIO(b""), 0)
+                # Папку в MinIO не создаем: префикс "{candidate_uuid}/" появляется
+                # с первым загруженным файлом, бакет создается при загрузке
 
                 connection.commit()
                 logger.info(f"Добавлен кандидат {candidate_uuid}")
@@ -103,6 +98,94 @@ def add_candidate_to_db(first_name: str, last_name: str, email: str, sex: bool,
                 raise Exception(f"Ошибка при добавлении кандидата: {str(e)}")
 
 
+def find_existing_candidate_emails(emails: list) -> set:
+    """Email из списка, которые уже есть у кандидатов (в нижнем регистре)"""
+    if not emails:
+        return set()
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT lower(email) FROM hr.candidate WHERE lower(email) = ANY(%s)",
+                ([email.lower() for email in emails],),
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+
+def add_candidates_bulk(candidates: list, tutor_id, import_id: str) -> tuple:
+    """
+    Добавляет кандидатов одной транзакцией, создает им обязательные документы и
+    ставит приглашения в очередь hr.candidate_invitation с меткой import_id.
+    :param candidates: [{first_name, last_name, email, sex, notes}, ...]
+    :return: ([(candidate_uuid, invitation_code, email), ...], количество созданных документов)
+    """
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            try:
+                created = execute_values(
+                    cursor,
+                    """
+                    INSERT INTO hr.candidate (
+                        first_name, last_name, email, sex, tutor_uuid, notes
+                    ) VALUES %s
+                    RETURNING candidate_uuid::text, invitation_code, email
+                    """,
+                    [
+                        (c["first_name"], c["last_name"], c["email"], c["sex"], tutor_id, c["notes"])
+                        for c in candidates
+                    ],
+                    page_size=500,
+                    fetch=True,
+                )
+                candidate_uuids = [candidate_uuid for candidate_uuid, _, _ in created]
+                documents = create_required_documents_bulk(candidate_uuids, connection=connection)
+                cursor.execute("""
+                    INSERT INTO hr.candidate_invitation (candidate_uuid, import_id)
+                    SELECT unnest(%s::uuid[]), %s
+                """, (candidate_uuids, import_id))
+                cursor.execute(f"NOTIFY {INVITATION_CHANNEL}")
+                connection.commit()
+                logger.info(f"Импортировано кандидатов: {len(created)}, документов: {documents}")
+                return created, documents
+
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Ошибка при импорте кандидатов: {str(e)}")
+                raise Exception(f"Ошибка при импорте кандидатов: {str(e)}")
+
+
+def create_required_documents_bulk(candidate_uuids: list, connection=None) -> int:
+    """
+    Создает недостающие обязательные документы сразу для многих кандидатов.
+    Если передано соединение, работает в его транзакции и не делает commit.
+    :return: количество созданных документов
+    """
+    if not candidate_uuids:
+        return 0
+
+    query = """
+        INSERT INTO hr.candidate_document (
+            document_id, candidate_id, template_id, status_id, created_at, updated_at
+        )
+        SELECT gen_random_uuid(), c.candidate_uuid, t.template_id, 1, NOW(), NOW()
+        FROM unnest(%s::uuid[]) AS c(candidate_uuid)
+        CROSS JOIN hr.document_template t
+        ON CONFLICT (candidate_id, template_id) DO NOTHING
+    """
+    params = ([str(candidate_uuid) for candidate_uuid in candidate_uuids],)
+
+    if connection is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            created = cursor.rowcount
+            conn.commit()
+            return created
+
+
 def get_all_chats(tutor_id, role, offset: int = 0, limit: int = 20):
     """Получает список всех чатов с последним сообщением с пагинацией"""
     try:
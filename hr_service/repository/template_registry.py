@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+from core.config import settings
+from repository.database import get_connection
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Template(BaseModel):
+    template_id: int
+    name: str
+    description: str = Field(default="")
+    markdown_instructions: str = Field(default="")
+    is_required: bool = True
+    processing_days: int = 1
+    order_position: int = 1
+
+
+TEMPLATE_FIELDS = ['template_id', 'name', 'description', 'markdown_instructions',
+                   'is_required', 'processing_days', 'order_position']
+
+
+def bump_template_version(cursor):
+    """Увеличивает версию шаблонов в текущей транзакции (после INSERT/UPDATE hr.document_template)"""
+    cursor.execute("UPDATE hr.document_template_version SET version = version + 1")
+
+
+class TemplateRegistry:
+    """
+    Шаблоны документов в памяти процесса.
+
+    Шаблоны меняются редко, поэтому загружаются один раз и перечитываются только
+    когда меняется счетчик hr.document_template_version. Сам счетчик сверяется
+    не чаще одного раза в check_interval секунд. Отсутствующие ID запоминаются до
+    смены версии, чтобы промахи не ходили в базу на каждом обращении.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._templates: List[Template] = []
+        self._by_id: dict[int, Template] = {}
+        self._missing: set[int] = set()
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._version is not None and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            if not force and self._version is not None and now - self._checked_at < self.check_interval:
+                return
+            conn = None
+            try:
+                conn = get_connection()
+                with conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT version FROM hr.document_template_version")
+                        row = cursor.fetchone()
+                        version = row[0] if row else 0
+                        if version != self._version:
+                            cursor.execute("""
+                                SELECT
+                                    template_id,
+                                    name,
+                                    COALESCE(description, '') as description,
+                                    COALESCE(markdown_instructions, '') as markdown_instructions,
+                                    is_required,
+                                    processing_days,
+                                    order_position
+                                FROM hr.document_template
+                                ORDER BY order_position, template_id
+                            """)
+                            templates = [Template.model_validate(dict(zip(TEMPLATE_FIELDS, row)))
+                                         for row in cursor.fetchall()]
+                            self._templates = templates
+                            self._by_id = {template.template_id: template for template in templates}
+                            self._missing = set()
+                            self._version = version
+                            logger.info(f"Шаблоны документов загружены: версия {version}, {len(templates)} шт.")
+                self._checked_at = time.monotonic()
+            except Exception as e:
+                # Оставляем прежний снимок, если он есть
+                logger.error(f"Ошибка загрузки шаблонов документов: {e}")
+                if self._version is None:
+                    raise
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def all(self) -> List[Template]:
+        """Все шаблоны в порядке order_position"""
+        self._refresh()
+        return list(self._templates)
+
+    def get(self, template_id: int) -> Optional[Template]:
+        """
+        Шаблон по ID. При первом промахе версия сверяется без ожидания интервала,
+        повторные промахи по тому же ID до смены версии в базу не ходят
+        """
+        self._refresh()
+        template = self._by_id.get(template_id)
+        if template is None and template_id not in self._missing:
+            self._refresh(force=True)
+            template = self._by_id.get(template_id)
+            if template is None:
+                self._missing.add(template_id)
+        return template
+
+    def name(self, template_id: int, default: str = "Документ") -> str:
+        template = self.get(template_id)
+        return template.name if template else default
+
+    def order(self, template_id: int) -> int:
+        template = self.get(template_id)
+        return template.order_position if template else 0
+
+    def invalidate(self):
+        """Сверить версию при следующем обращении (после изменения шаблонов в этом процессе)"""
+        with self._lock:
+            self._checked_at = 0.0
+
+
+template_registry = TemplateRegistry(check_interval=settings.project_management_setting.TEMPLATE_VERSION_CHECK_INTERVAL)
@@ -0,0 +1,46 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+from core.metrics import BOT_HANDLER_ERRORS, BOT_HANDLER_SECONDS, track
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Время обработки апдейта по имени хендлера. Подключается как inner middleware,
+    поэтому хендлер уже выбран фильтрами и ожидание блокировки чата не учитывается
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            BOT_HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            BOT_HANDLER_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+class TelegramApiMetricsMiddleware(BaseRequestMiddleware):
+    """Время и ошибки запросов к Telegram Bot API по имени метода"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with track("telegram", type(method).__name__):
+            return await make_request(bot, method)
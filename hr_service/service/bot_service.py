@@ -3,10 +3,11 @@ import logging
 
 from aiogram import Bot
 from core.config import settings, DOCUMENT_STATUSES
+from core.metrics import track
 
-import pandas as pd
 from datetime import datetime
 from repository.database import get_connection
+from repository.audit_events import AuditEvent, record_event
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -152,6 +153,9 @@ async def create_required_documents(candidate_uuid: str):
 
 async def process_bank_statement(file_path, candidate_uuid):
     """Обработка банковской выписки из Excel файла"""
+    # pandas нужен только здесь, поэтому не замедляет холодный старт бота
+    import pandas as pd
+
     try:
         # Загружаем Excel файл
         df = pd.read_excel(file_path)
@@ -242,7 +246,8 @@ def send_telegram_message(chat_id: int, text: str):
     async def async_send():
         bot = Bot(token=settings.bot.TELEGRAM_TOKEN)
         try:
-            await bot.send_message(chat_id=int(chat_id), text=text)
+            with track("telegram", "SendMessage"):
+                await bot.send_message(chat_id=int(chat_id), text=text)
             logger.info(f"Сообщение отправлено в чат {chat_id}")
         except Exception as e:
             logger.error(f"Ошибка при отправке сообщения: {e}")
@@ -263,7 +268,7 @@ def get_status_text(status_id: int) -> str:
     return f"{status[1]} {status[0]}"
 
 async def update_document_status(document_id: int, new_status: int, chat_id: int, doc_name: str):
-    """Обновляет статус документа и сохраняет сообщение"""
+    """Обновляет статус документа и пишет событие в журнал аудита"""
     try:
         with get_connection() as conn:
             with conn.cursor() as cursor:
@@ -286,18 +291,9 @@ async def update_document_status(document_id: int, new_status: int, chat_id: int
                     conn.commit()
                     
                     # Сохраняем информативное сообщение
-                    action = {
-                        1: "сброшен в 'Не загружен'",
-                        2: "отмечен как заказанный",
-                        3: "отправлен на проверку",
-                        4: "отмечен как проверенный",
-                        5: "запрошена повторная загрузка"
-                    }.get(new_status, "изменен")
-                    
-                    await save_message(
-                        chat_id,
-                        f"Документ '{doc_name}' {action}",
-                        True
+                    record_event(
+                        chat_id, AuditEvent.DOCUMENT_STATUS_CHANGED,
+                        document=doc_name, status_id=new_status,
                     )
                     return True
         return False
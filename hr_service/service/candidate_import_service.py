@@ -0,0 +1,168 @@
+import io
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from core.config import settings
+from repository.database import get_connection
+from repository.strml_repository import INVITATION_CHANNEL, add_candidates_bulk, find_existing_candidate_emails
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Заголовки колонок файла (в нижнем регистре) и поля кандидата
+COLUMN_ALIASES = {
+    "имя": "first_name",
+    "first_name": "first_name",
+    "фамилия": "last_name",
+    "last_name": "last_name",
+    "email": "email",
+    "e-mail": "email",
+    "почта": "email",
+    "пол": "sex",
+    "sex": "sex",
+    "заметки": "notes",
+    "notes": "notes",
+}
+REQUIRED_COLUMNS = ["first_name", "last_name", "email", "sex"]
+SEX_VALUES = {
+    "м": True, "муж": True, "мужской": True, "m": True, "male": True,
+    "ж": False, "жен": False, "женский": False, "f": False, "female": False,
+}
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+@dataclass
+class InvitationProgress:
+    """Состояние рассылки приглашений одного импорта по hr.candidate_invitation"""
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    last_sent_at: Optional[datetime] = None
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.sent - self.failed
+
+    @property
+    def is_running(self) -> bool:
+        return self.pending > 0
+
+    @property
+    def fraction(self) -> float:
+        if not self.total:
+            return 1.0
+        return (self.sent + self.failed) / self.total
+
+
+def read_candidates_file(file_name: str, data: bytes) -> pd.DataFrame:
+    """Читает CSV (разделитель определяется автоматически) или XLSX, все значения - строки"""
+    if file_name.lower().endswith(".xlsx"):
+        df = pd.read_excel(io.BytesIO(data), dtype=str)
+    else:
+        df = pd.read_csv(io.BytesIO(data), sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+    df.columns = [COLUMN_ALIASES.get(str(column).strip().lower(), str(column).strip()) for column in df.columns]
+    return df.fillna("")
+
+
+def validate_candidates(df: pd.DataFrame) -> tuple[list, list]:
+    """
+    Проверяет строки файла.
+    :return: (кандидаты для импорта, ошибки [(номер строки в файле, текст)])
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        return [], [(0, f"Нет колонок: {', '.join(missing)}")]
+    if len(df) > settings.candidate_import.MAX_ROWS:
+        return [], [(0, f"Слишком много строк: {len(df)}, максимум {settings.candidate_import.MAX_ROWS}")]
+
+    candidates, errors = [], []
+    seen_emails = set()
+    # Первая строка файла - заголовок
+    for row_number, row in enumerate(df.to_dict("records"), start=2):
+        first_name = row["first_name"].strip()
+        last_name = row["last_name"].strip()
+        email = row["email"].strip()
+        if not first_name or not last_name or not email:
+            errors.append((row_number, "Не заполнены имя, фамилия или email"))
+            continue
+        if not EMAIL_PATTERN.match(email):
+            errors.append((row_number, f"Некорректный email: {email}"))
+            continue
+        if email.lower() in seen_emails:
+            errors.append((row_number, f"Email повторяется в файле: {email}"))
+            continue
+
+        sex_value = str(row.get("sex", "")).strip().lower()
+        if sex_value not in SEX_VALUES:
+            errors.append((row_number, f"Не удалось определить пол: '{row.get('sex', '')}'"))
+            continue
+
+        seen_emails.add(email.lower())
+        candidates.append({
+            "row_number": row_number,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "sex": SEX_VALUES[sex_value],
+            "notes": str(row.get("notes", "")).strip(),
+        })
+
+    # Уже заведенных кандидатов проверяем одним запросом на весь файл
+    existing = find_existing_candidate_emails([candidate["email"] for candidate in candidates])
+    if existing:
+        errors.extend(
+            (candidate["row_number"], f"Кандидат с email {candidate['email']} уже есть")
+            for candidate in candidates if candidate["email"].lower() in existing
+        )
+        candidates = [candidate for candidate in candidates if candidate["email"].lower() not in existing]
+
+    errors.sort()
+    return candidates, errors
+
+
+def import_candidates(candidates: list, tutor_id) -> tuple[str, int, int]:
+    """
+    Заводит кандидатов, их обязательные документы и приглашения одной транзакцией.
+    Письма отправляет воркер service/candidate_invitation_service.py.
+    :return: (import_id для прогресса рассылки, количество кандидатов, количество документов)
+    """
+    import_id = str(uuid.uuid4())
+    created, documents = add_candidates_bulk(candidates, tutor_id, import_id)
+    return import_id, len(created), documents
+
+
+def get_invitation_progress(import_id: str) -> InvitationProgress:
+    """Прогресс рассылки приглашений импорта; ошибка - приглашение, у которого кончились попытки"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    count(*),
+                    count(sent_at),
+                    count(*) FILTER (WHERE sent_at IS NULL AND attempts >= %s),
+                    max(sent_at)
+                FROM hr.candidate_invitation
+                WHERE import_id = %s
+            """, (settings.candidate_import.INVITE_MAX_ATTEMPTS, import_id))
+            return InvitationProgress(*cursor.fetchone())
+
+
+def retry_invitations(import_id: str) -> int:
+    """Возвращает в очередь неотправленные приглашения импорта, возвращает их количество"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE hr.candidate_invitation
+                SET attempts = 0, last_error = NULL
+                WHERE import_id = %s AND sent_at IS NULL
+            """, (import_id,))
+            retried = cursor.rowcount
+            cursor.execute(f"NOTIFY {INVITATION_CHANNEL}")
+        conn.commit()
+    return retried
@@ -0,0 +1,115 @@
+import argparse
+import logging
+import select
+import time
+
+import psycopg2.extensions
+
+from core.config import settings
+from repository.database import get_connection
+from repository.strml_repository import INVITATION_CHANNEL
+from service.email_service import invitation_email, send_emails
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы одно приглашение не отправили два воркера
+INVITATION_LOCK_NAME = "hr.candidate_invitation"
+
+
+def get_pending_invitations() -> list[tuple]:
+    """Неотправленные приглашения, у которых остались попытки: (candidate_uuid, email, код), старые первыми"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT i.candidate_uuid::text, c.email, c.invitation_code
+                FROM hr.candidate_invitation i
+                JOIN hr.candidate c ON c.candidate_uuid = i.candidate_uuid
+                WHERE i.sent_at IS NULL AND i.attempts < %s
+                ORDER BY i.created_at
+            """, (settings.candidate_import.INVITE_MAX_ATTEMPTS,))
+            return cursor.fetchall()
+
+
+def save_results(sent: list, failed: list):
+    """Отмечает отправленные приглашения и считает попытку для неотправленных"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE hr.candidate_invitation
+                SET sent_at = now(), attempts = attempts + 1, last_error = NULL
+                WHERE candidate_uuid = ANY(%s::uuid[])
+            """, (sent,))
+            cursor.execute("""
+                UPDATE hr.candidate_invitation
+                SET attempts = attempts + 1, last_error = 'Письмо не принято почтовым сервером'
+                WHERE candidate_uuid = ANY(%s::uuid[])
+            """, (failed,))
+        conn.commit()
+
+
+def run_invitations() -> dict:
+    """
+    Рассылает приглашения из очереди пачками по INVITE_BATCH_SIZE писем на одну
+    SMTP-сессию. За один запуск каждое приглашение пробуется не больше одного раза:
+    неотправленные ждут следующего запуска, пока не кончатся INVITE_MAX_ATTEMPTS
+    """
+    stats = {"sent": 0, "failed": 0}
+
+    lock_conn = get_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (INVITATION_LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                logger.info("Приглашения уже рассылает другой процесс")
+                return stats
+
+        invitations = get_pending_invitations()
+        batch_size = settings.candidate_import.INVITE_BATCH_SIZE
+        for start in range(0, len(invitations), batch_size):
+            if start:
+                time.sleep(settings.candidate_import.INVITE_PAUSE_SECONDS)
+            batch = invitations[start:start + batch_size]
+            results = send_emails([(email, *invitation_email(code), True) for _, email, code in batch])
+            sent = [candidate_uuid for (candidate_uuid, _, _), ok in zip(batch, results) if ok]
+            failed = [candidate_uuid for (candidate_uuid, _, _), ok in zip(batch, results) if not ok]
+            save_results(sent, failed)
+            stats["sent"] += len(sent)
+            stats["failed"] += len(failed)
+            logger.info(f"Приглашения: {start + len(batch)}/{len(invitations)}, ошибок: {stats['failed']}")
+    finally:
+        lock_conn.close()  # advisory lock снимается вместе с сессией
+
+    if any(stats.values()):
+        logger.info(f"Рассылка приглашений: {stats}")
+    return stats
+
+
+def wait_for_imports(listen_conn, timeout: float):
+    """Ждет NOTIFY о новом импорте не дольше timeout секунд"""
+    if select.select([listen_conn], [], [], timeout) == ([], [], []):
+        return
+    listen_conn.poll()
+    listen_conn.notifies.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Рассылка приглашений импортированным кандидатам")
+    parser.add_argument("--loop", action="store_true", help="ждать новые импорты и повторять неотправленные")
+    args = parser.parse_args()
+
+    listen_conn = None
+    if args.loop:
+        listen_conn = get_connection()
+        listen_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with listen_conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {INVITATION_CHANNEL}")
+
+    while True:
+        try:
+            run_invitations()
+        except Exception as e:
+            logger.error(f"Ошибка рассылки приглашений: {e}")
+        if not args.loop:
+            break
+        wait_for_imports(listen_conn, settings.candidate_import.INVITE_INTERVAL_SECONDS)
@@ -0,0 +1,194 @@
+import argparse
+import logging
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.config import CANDIDATE_STATUSES, settings
+from repository.database import get_connection
+from service.gemini_service import ANALYSIS_MODEL, generate_content_cached, prompt_key
+from utils.rate_limiter import RateLimiter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы пересчет не запускался параллельно в нескольких процессах
+SUMMARY_LOCK_NAME = "hr.candidate_summary"
+
+
+def build_candidate_analysis_prompt(candidate: dict, document_statuses: list) -> str:
+    """Промпт краткого анализа кандидата по его данным и статусам документов"""
+    status_name, status_icon = CANDIDATE_STATUSES.get(candidate['status_id'], ("Неизвестно", "❓"))
+    docs_summary = {
+        "completed": document_statuses.count(4),
+        "pending_review": document_statuses.count(3),
+        "needs_resubmit": document_statuses.count(5),
+        "ordered": document_statuses.count(2),
+        "missing": document_statuses.count(1),
+    }
+
+    return f"""
+        Ты - HR-аналитик в крупной компании. Проанализируй кандидата и предоставь краткий отчет.
+
+        ### Основная информация:
+        - Кандидат: {candidate['first_name']} {candidate['last_name']}
+        - Текущий статус: {status_icon} {status_name}
+        - Контакты: {candidate.get('email') or 'нет email'} | {candidate.get('phone') or 'нет телефона'}
+        - Куратор: {candidate.get('tutor_first_name') or ''} {candidate.get('tutor_last_name') or ''}
+        - Заметки: {textwrap.shorten(candidate.get('notes') or 'нет заметок', width=150, placeholder='...')}
+
+        ### Статистика документов:
+        - ✅ Проверено и одобрено: {docs_summary['completed']}
+        - 🔍 Ожидают проверки: {docs_summary['pending_review']}
+        - 🔄 Требуют перезагрузки: {docs_summary['needs_resubmit']}
+        - 🛒 Заказаны: {docs_summary['ordered']}
+        - ❌ Отсутствуют: {docs_summary['missing']}
+        - 📋 Всего документов: {len(document_statuses)}
+
+        ### Задание:
+        1. Оцените текущий прогресс кандидата по документам
+        2. Выделите потенциальные проблемы или задержки
+        3. Дайте рекомендации по дальнейшим действиям
+        4. Будь кратким (3-5 предложений) и конкретным
+        5. Используй профессиональный, но дружелюбный тон
+
+        Формат вывода:
+        [Анализ прогресса] [Проблемы] [Рекомендации]
+        """
+
+
+def summary_input_hash(prompt: str) -> str:
+    """Хэш входных данных анализа: совпадает, пока не изменились кандидат и его документы"""
+    return prompt_key(ANALYSIS_MODEL, prompt)
+
+
+def get_candidate_summary(candidate_uuid: str) -> Optional[dict]:
+    """Сохраненный анализ кандидата (summary, input_hash, generated_at) или None"""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT summary, input_hash, generated_at
+                    FROM hr.candidate_summary
+                    WHERE candidate_uuid = %s
+                """, (candidate_uuid,))
+                row = cursor.fetchone()
+                if row:
+                    return {"summary": row[0], "input_hash": row[1], "generated_at": row[2]}
+                return None
+    except Exception as e:
+        logger.error(f"Ошибка получения анализа кандидата: {e}")
+        return None
+
+
+def save_candidate_summary(candidate_uuid: str, input_hash: str, summary: str):
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO hr.candidate_summary (candidate_uuid, input_hash, summary, model, generated_at)
+                VALUES (%s, %s, %s, %s, NOW())
+                ON CONFLICT (candidate_uuid) DO UPDATE
+                SET input_hash = EXCLUDED.input_hash,
+                    summary = EXCLUDED.summary,
+                    model = EXCLUDED.model,
+                    generated_at = EXCLUDED.generated_at
+            """, (candidate_uuid, input_hash, summary, ANALYSIS_MODEL))
+            conn.commit()
+
+
+def generate_candidate_summary(candidate: dict, document_statuses: list) -> str:
+    """Генерирует анализ кандидата и сохраняет его вместе с хэшем входных данных"""
+    prompt = build_candidate_analysis_prompt(candidate, document_statuses)
+    summary = generate_content_cached(prompt, ANALYSIS_MODEL)
+    save_candidate_summary(str(candidate['candidate_uuid']), summary_input_hash(prompt), summary)
+    return summary
+
+
+def find_stale_candidates() -> list:
+    """
+    Кандидаты, у которых анализа нет или он построен по устаревшим данным.
+    Данные всех кандидатов читаются одним запросом, сравнение - по хэшу промпта.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    c.*,
+                    u.first_name as tutor_first_name,
+                    u.last_name as tutor_last_name,
+                    ARRAY(
+                        SELECT d.status_id FROM hr.candidate_document d
+                        WHERE d.candidate_id = c.candidate_uuid
+                    ) as document_statuses,
+                    s.input_hash as summary_input_hash
+                FROM hr.candidate c
+                LEFT JOIN auth.user u ON c.tutor_uuid = u.user_uuid
+                LEFT JOIN hr.candidate_summary s ON s.candidate_uuid = c.candidate_uuid
+            """)
+            columns = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    stale = []
+    for candidate in rows:
+        prompt = build_candidate_analysis_prompt(candidate, candidate['document_statuses'])
+        if summary_input_hash(prompt) != candidate['summary_input_hash']:
+            stale.append(candidate)
+    return stale
+
+
+def run_summary_batch() -> dict:
+    """
+    Пересчитывает анализ для кандидатов с изменившимися данными.
+    Запросы к модели выполняются параллельно (не больше CONCURRENCY) и с ограничением частоты.
+    """
+    stats = {"stale": 0, "generated": 0, "failed": 0}
+
+    lock_conn = get_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (SUMMARY_LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                logger.info("Пересчет анализа кандидатов уже выполняется")
+                return stats
+
+        stale = find_stale_candidates()
+        stats["stale"] = len(stale)
+        logger.info(f"Анализ кандидатов: требуют обновления {len(stale)}")
+        if not stale:
+            return stats
+
+        limiter = RateLimiter(settings.summary.REQUESTS_PER_MINUTE)
+
+        def summarize(candidate: dict) -> bool:
+            limiter.acquire()
+            try:
+                generate_candidate_summary(candidate, candidate['document_statuses'])
+                return True
+            except Exception as e:
+                logger.error(f"Ошибка анализа кандидата {candidate['candidate_uuid']}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=settings.summary.CONCURRENCY, thread_name_prefix="summary") as executor:
+            for ok in executor.map(summarize, stale):
+                stats["generated" if ok else "failed"] += 1
+    finally:
+        lock_conn.close()  # advisory lock снимается вместе с сессией
+
+    logger.info(f"Анализ кандидатов обновлен: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчет AI-анализа кандидатов")
+    parser.add_argument("--loop", action="store_true", help="повторять каждые SUMMARY_INTERVAL_SECONDS")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            run_summary_batch()
+        except Exception as e:
+            logger.error(f"Ошибка пересчета анализа кандидатов: {e}")
+        if not args.loop:
+            break
+        time.sleep(settings.summary.INTERVAL_SECONDS)
@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Optional
+
+import psycopg2
+from core.config import settings
+from repository.database import get_connection
+from repository.strml_repository import create_required_documents_bulk
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы backfill не запускался параллельно в нескольких процессах
+BACKFILL_LOCK_NAME = "hr.document_backfill"
+MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+ACTIVE_CANDIDATES_FILTER = """
+    c.status_id NOT IN (SELECT status_id FROM hr.candidate_status WHERE is_final = true)
+"""
+
+
+@dataclass
+class BackfillProgress:
+    total_candidates: int = 0
+    processed_candidates: int = 0
+    created_documents: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    @property
+    def fraction(self) -> float:
+        if not self.total_candidates:
+            return 1.0 if self.finished_at else 0.0
+        return min(1.0, self.processed_candidates / self.total_candidates)
+
+
+# Прогресс последнего запуска в этом процессе (для страницы шаблонов)
+backfill_progress = BackfillProgress()
+_backfill_thread: Optional[threading.Thread] = None
+_backfill_thread_lock = threading.Lock()
+_rerun_requested = False
+
+
+def is_business_hours(now: Optional[datetime] = None) -> bool:
+    """Попадает ли текущее время в рабочие часы из настроек (например, '9-19')"""
+    now = now or datetime.now()
+    try:
+        start, end = (int(part) for part in settings.backfill.BUSINESS_HOURS.split("-"))
+    except ValueError:
+        return False
+    return now.weekday() < 5 and start <= now.hour < end
+
+
+def get_throttle() -> tuple[int, float]:
+    """Размер пачки и пауза между пачками с учетом рабочих часов"""
+    if is_business_hours():
+        return settings.backfill.BUSINESS_HOURS_BATCH_SIZE, settings.backfill.BUSINESS_HOURS_PAUSE_SECONDS
+    return settings.backfill.BATCH_SIZE, settings.backfill.PAUSE_SECONDS
+
+
+def count_active_candidates() -> int:
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM hr.candidate c WHERE {ACTIVE_CANDIDATES_FILTER}")
+            return cursor.fetchone()[0]
+
+
+def get_active_candidates_batch(after_uuid: str, limit: int) -> list:
+    """Следующая пачка активных кандидатов (keyset-пагинация по candidate_uuid)"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT c.candidate_uuid::text
+                FROM hr.candidate c
+                WHERE {ACTIVE_CANDIDATES_FILTER}
+                AND c.candidate_uuid > %s::uuid
+                ORDER BY c.candidate_uuid
+                LIMIT %s
+            """, (after_uuid, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+
+def provision_batch(candidate_uuids: list) -> int:
+    """
+    Создает документы для пачки кандидатов в короткой транзакции.
+    При конкуренции за блокировки ждет не дольше LOCK_TIMEOUT и повторяет попытку.
+    """
+    for attempt in range(1, settings.backfill.MAX_RETRIES + 1):
+        conn = get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT set_config('lock_timeout', %s, true)", (settings.backfill.LOCK_TIMEOUT,))
+            created = create_required_documents_bulk(candidate_uuids, connection=conn)
+            conn.commit()
+            return created
+        except psycopg2.errors.LockNotAvailable:
+            conn.rollback()
+            logger.warning(f"Backfill: блокировка занята, попытка {attempt}")
+            time.sleep(attempt)
+        finally:
+            conn.close()
+    raise RuntimeError("Backfill: не удалось получить блокировку hr.candidate_document")
+
+
+def backfill_required_documents(
+    progress: Optional[BackfillProgress] = None,
+    progress_callback: Optional[Callable[[BackfillProgress], None]] = None,
+) -> BackfillProgress:
+    """
+    Создает недостающие документы всем активным кандидатам пачками.
+    Одновременно может выполняться только один backfill (pg advisory lock).
+    """
+    progress = progress or BackfillProgress()
+    progress.started_at = datetime.now()
+    progress.finished_at = None
+    progress.error = None
+
+    lock_conn = get_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (BACKFILL_LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                progress.error = "Backfill уже выполняется"
+                logger.info(progress.error)
+                return progress
+
+        progress.total_candidates = count_active_candidates()
+        logger.info(f"Backfill документов: {progress.total_candidates} активных кандидатов")
+
+        last_uuid = MIN_UUID
+        while True:
+            batch_size, pause = get_throttle()
+            batch = get_active_candidates_batch(last_uuid, batch_size)
+            if not batch:
+                break
+
+            progress.created_documents += provision_batch(batch)
+            progress.processed_candidates += len(batch)
+            last_uuid = batch[-1]
+
+            logger.info(
+                f"Backfill: {progress.processed_candidates}/{progress.total_candidates} кандидатов, "
+                f"создано документов: {progress.created_documents}"
+            )
+            if progress_callback:
+                progress_callback(progress)
+            time.sleep(pause)
+    except Exception as e:
+        progress.error = str(e)
+        logger.error(f"Ошибка backfill документов: {e}")
+    finally:
+        lock_conn.close()  # advisory lock снимается вместе с сессией
+        progress.finished_at = datetime.now()
+
+    return progress
+
+
+def _run_backfill_loop():
+    """Повторяет backfill, если за время работы добавили еще один шаблон"""
+    global _rerun_requested, backfill_progress
+
+    while True:
+        backfill_required_documents(backfill_progress)
+        with _backfill_thread_lock:
+            if not _rerun_requested:
+                return
+            _rerun_requested = False
+            backfill_progress = BackfillProgress()
+
+
+def start_backfill_in_background() -> bool:
+    """
+    Запускает backfill в фоновом потоке.
+    Если он уже идет в этом процессе, планирует повторный проход и возвращает False.
+    """
+    global _backfill_thread, backfill_progress, _rerun_requested
+
+    with _backfill_thread_lock:
+        if _backfill_thread is not None and _backfill_thread.is_alive():
+            _rerun_requested = True
+            return False
+        backfill_progress = BackfillProgress()
+        _backfill_thread = threading.Thread(target=_run_backfill_loop, name="document-backfill", daemon=True)
+        _backfill_thread.start()
+        return True
+
+
+def get_backfill_progress() -> BackfillProgress:
+    return backfill_progress
+
+
+if __name__ == "__main__":
+    result = backfill_required_documents()
+    print(asdict(result))
@@ -0,0 +1,161 @@
+import logging
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from typing import Optional
+
+from minio.commonconfig import ENABLED, Filter
+from minio.lifecycleconfig import Expiration, LifecycleConfig, Rule
+
+from core.config import settings
+from repository.database import ensure_bucket, get_connection, get_minio_client, get_public_minio_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Общий на процесс лимит одновременных чтений из MinIO: несколько HR, выгружающих
+# архивы одновременно, не должны забирать все соединения у бота и страниц
+_read_slots = threading.BoundedSemaphore(settings.document_export.MAX_CONCURRENT_READS)
+_lifecycle_configured = False
+UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\n\r\t]+')
+
+
+def get_export_documents(candidate_uuids: list) -> list[tuple]:
+    """Загруженные документы кандидатов: (фамилия, имя, тип документа, бакет, ключ)"""
+    if not candidate_uuids:
+        return []
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.last_name, c.first_name, t.name, d.s3_bucket, d.s3_key
+                FROM hr.candidate_document d
+                JOIN hr.candidate c ON c.candidate_uuid = d.candidate_id
+                JOIN hr.document_template t ON t.template_id = d.template_id
+                WHERE d.candidate_id = ANY(%s::uuid[])
+                  AND d.status_id NOT IN (1, 2)
+                  AND d.s3_key IS NOT NULL
+                ORDER BY c.last_name, c.first_name, c.candidate_uuid, t.order_position
+            """, ([str(candidate_uuid) for candidate_uuid in candidate_uuids],))
+            return cursor.fetchall()
+
+
+def safe_name(name: str) -> str:
+    return UNSAFE_NAME_CHARS.sub("_", str(name)).strip() or "_"
+
+
+def archive_name(last_name: str, first_name: str, document_type: str, s3_key: str, used: set) -> str:
+    """Путь файла в архиве: папка кандидата и название документа с расширением исходного файла"""
+    _, extension = os.path.splitext(s3_key)
+    base = f"{safe_name(f'{last_name} {first_name}')}/{safe_name(document_type)}"
+    name, suffix = f"{base}{extension}", 2
+    # Однофамильцы с одинаковыми документами не должны перезаписать друг друга
+    while name in used:
+        name, suffix = f"{base} ({suffix}){extension}", suffix + 1
+    used.add(name)
+    return name
+
+
+def write_zip(output, documents: list[tuple]) -> int:
+    """
+    Пишет ZIP в поток без перемотки: каждый файл копируется из MinIO кусками по
+    CHUNK_SIZE, ни файл, ни архив целиком в памяти не держатся. Документы - сканы
+    и PDF, которые уже сжаты, поэтому файлы кладутся без сжатия.
+    :return: количество файлов в архиве
+    """
+    minio_client = get_minio_client()
+    used_names = set()
+    files = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for last_name, first_name, document_type, bucket, key in documents:
+            name = archive_name(last_name, first_name, document_type, key, used_names)
+            with _read_slots:
+                try:
+                    response = minio_client.get_object(bucket, key)
+                except Exception as e:
+                    logger.error(f"Документ {bucket}/{key} не попал в архив: {e}")
+                    continue
+                try:
+                    with archive.open(name, "w", force_zip64=True) as entry:
+                        for chunk in response.stream(settings.document_export.CHUNK_SIZE):
+                            entry.write(chunk)
+                finally:
+                    response.close()
+                    response.release_conn()
+            files += 1
+    return files
+
+
+def ensure_export_bucket(minio_client):
+    """Бакет архивов с автоматическим удалением через RETENTION_DAYS"""
+    global _lifecycle_configured
+
+    bucket = settings.document_export.BUCKET
+    ensure_bucket(minio_client, bucket)
+    if not _lifecycle_configured:
+        minio_client.set_bucket_lifecycle(bucket, LifecycleConfig([
+            Rule(
+                ENABLED,
+                rule_filter=Filter(prefix=""),
+                rule_id="expire-exports",
+                expiration=Expiration(days=settings.document_export.RETENTION_DAYS),
+            ),
+        ]))
+        _lifecycle_configured = True
+
+
+def export_documents_zip(candidate_uuids: list, title: str) -> Optional[str]:
+    """
+    Собирает документы кандидатов в ZIP и возвращает подписанную ссылку на него.
+    Архив пишется в трубу, из которой MinIO multipart-загрузкой забирает части по
+    PART_SIZE: память на выгрузку не зависит от числа и размера документов.
+    :return: ссылка на архив или None, если загруженных документов нет
+    """
+    documents = get_export_documents(candidate_uuids)
+    if not documents:
+        return None
+
+    minio_client = get_minio_client()
+    ensure_export_bucket(minio_client)
+    bucket = settings.document_export.BUCKET
+    key = f"{datetime.now():%Y/%m/%d}/{safe_name(title)}_{datetime.now():%H%M%S}.zip"
+
+    read_fd, write_fd = os.pipe()
+    reader, writer = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    result = {}
+
+    def produce():
+        try:
+            result["files"] = write_zip(writer, documents)
+        except Exception as e:
+            result["error"] = e
+        finally:
+            try:
+                writer.close()
+            except OSError:
+                pass  # читатель уже закрыт: ошибку загрузки вернет put_object
+
+    producer = threading.Thread(target=produce, name="document-export", daemon=True)
+    producer.start()
+    try:
+        minio_client.put_object(
+            bucket, key, reader,
+            length=-1,
+            part_size=settings.document_export.PART_SIZE,
+            content_type="application/zip",
+        )
+    finally:
+        # Если загрузка оборвалась, писатель получит BrokenPipeError и завершится
+        reader.close()
+        producer.join()
+
+    if "error" in result:
+        # Труба закрылась раньше времени: в MinIO лежит обрезанный архив
+        minio_client.remove_object(bucket, key)
+        raise result["error"]
+
+    logger.info(f"Архив {bucket}/{key}: {result['files']} документов, кандидатов: {len(candidate_uuids)}")
+    return get_public_minio_client().presigned_get_object(
+        bucket, key, expires=timedelta(seconds=settings.document_export.URL_EXPIRES_SECONDS)
+    )
@@ -0,0 +1,254 @@
+import argparse
+import io
+import logging
+import select
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import psycopg2.extensions
+
+from core.config import settings
+from repository.database import get_connection, get_minio_client
+from repository.document_storage import PREVIEW_CHANNEL, preview_key
+from utils.preview import UnsupportedPreview, render_preview
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы один документ не обрабатывали несколько воркеров
+PREVIEW_LOCK_NAME = "hr.document_preview"
+
+
+def get_pending_documents(limit: int) -> list[dict]:
+    """Загруженные документы без превью, старые первыми"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT document_id::text, s3_bucket, s3_key, content_type, file_size, content_sha256
+                FROM hr.candidate_document
+                WHERE s3_key IS NOT NULL AND preview_key IS NULL AND preview_error IS NULL
+                ORDER BY submitted_at
+                LIMIT %s
+            """, (limit,))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def find_shared_preview(content_sha256: Optional[str]) -> Optional[str]:
+    """Готовое превью другого документа с тем же файлом"""
+    if not content_sha256:
+        return None
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT preview_key FROM hr.candidate_document
+                WHERE content_sha256 = %s AND preview_key IS NOT NULL
+                LIMIT 1
+            """, (content_sha256,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+
+def save_preview_result(document: dict, key: Optional[str] = None, error: Optional[str] = None):
+    """
+    Записывает превью или причину, по которой его нет. Если за время работы
+    документ перезалили, строка не меняется: новый файл попадет в следующую пачку
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE hr.candidate_document
+                SET preview_key = %s, preview_error = %s
+                WHERE document_id = %s AND s3_key = %s
+            """, (key, error, document["document_id"], document["s3_key"]))
+        conn.commit()
+
+
+def download_original(document: dict) -> bytes:
+    response = get_minio_client().get_object(document["s3_bucket"], document["s3_key"])
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def store_preview(document: dict, data: bytes):
+    key = preview_key(document["document_id"], document["content_sha256"])
+    get_minio_client().put_object(
+        document["s3_bucket"], key, io.BytesIO(data), length=len(data), content_type="image/jpeg"
+    )
+    save_preview_result(document, key=key)
+
+
+class RendererPool:
+    """Пул процессов растрирования; после аварийного завершения процесса пересоздается"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, document: dict, data: bytes) -> Future:
+        try:
+            return self._executor.submit(render_document, data, document["content_type"])
+        except BrokenProcessPool:
+            logger.error("Процесс построения превью завершился аварийно, пул пересоздан")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor.submit(render_document, data, document["content_type"])
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+def render_document(data: bytes, content_type: str) -> bytes:
+    return render_preview(data, content_type, settings.preview.MAX_SIZE, settings.preview.JPEG_QUALITY)
+
+
+def render_isolated(document: dict) -> Future:
+    """
+    Строит превью одного файла в отдельном процессе. Если упал и он, виноват
+    именно этот файл (segfault в PyMuPDF, нехватка памяти на огромной картинке)
+    """
+    data = download_original(document)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(render_document, data, document["content_type"])
+        wait([future])
+    return future
+
+
+def run_preview_batch(pool: RendererPool) -> dict:
+    """
+    Строит превью пачки документов. Оригиналы скачиваются здесь, растрирование
+    идет в пуле процессов; одновременно в работе не больше двух файлов на процесс,
+    чтобы память не росла с размером очереди
+    """
+    # retry - документы, которые остались в очереди (например, MinIO недоступен)
+    stats = {"created": 0, "shared": 0, "skipped": 0, "failed": 0, "retry": 0}
+
+    lock_conn = get_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (PREVIEW_LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                logger.info("Превью документов уже строит другой процесс")
+                return stats
+
+        in_flight = {}
+        crashed = []
+
+        def finish(document: dict, future: Future, isolated: bool = False):
+            try:
+                data = future.result()
+            except UnsupportedPreview as e:
+                save_preview_result(document, error=str(e))
+                stats["skipped"] += 1
+                return
+            except BrokenProcessPool as e:
+                if not isolated:
+                    # Ошибку получают все файлы в работе, а виноват из них один: после
+                    # пачки каждый из них строится отдельно (render_isolated)
+                    crashed.append(document)
+                    return
+                # Иначе файл попадал бы в начало каждой пачки и ронял пул снова и снова
+                logger.error(f"Превью документа {document['document_id']} роняет процесс построения: {e}")
+                save_preview_result(document, error="Процесс построения превью аварийно завершается на этом файле")
+                stats["failed"] += 1
+                return
+            except Exception as e:
+                # Ошибка разбора самого файла: битый файл не должен попадать в очередь снова
+                logger.error(f"Ошибка превью документа {document['document_id']}: {e}")
+                save_preview_result(document, error=f"Ошибка: {e}")
+                stats["failed"] += 1
+                return
+
+            try:
+                store_preview(document, data)
+                stats["created"] += 1
+            except Exception as e:
+                # MinIO или база недоступны: превью построится заново при следующем запуске
+                logger.error(f"Не удалось сохранить превью документа {document['document_id']}: {e}")
+                stats["retry"] += 1
+
+        def collect(futures):
+            for future in futures:
+                finish(in_flight.pop(future), future)
+
+        for document in get_pending_documents(settings.preview.BATCH_SIZE):
+            shared = find_shared_preview(document["content_sha256"])
+            if shared:
+                save_preview_result(document, key=shared)
+                stats["shared"] += 1
+                continue
+            if (document["file_size"] or 0) > settings.preview.MAX_SOURCE_BYTES:
+                save_preview_result(document, error="Файл слишком большой для превью")
+                stats["skipped"] += 1
+                continue
+
+            if len(in_flight) >= settings.preview.WORKERS * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            try:
+                data = download_original(document)
+            except Exception as e:
+                # MinIO недоступен: документ останется в очереди до следующего запуска
+                logger.error(f"Не удалось скачать {document['s3_bucket']}/{document['s3_key']}: {e}")
+                stats["retry"] += 1
+                continue
+            in_flight[pool.submit(document, data)] = document
+
+        collect(list(in_flight))
+
+        for document in crashed:
+            try:
+                future = render_isolated(document)
+            except Exception as e:
+                logger.error(f"Не удалось повторить превью документа {document['document_id']}: {e}")
+                stats["retry"] += 1
+                continue
+            finish(document, future, isolated=True)
+    finally:
+        lock_conn.close()  # advisory lock снимается вместе с сессией
+
+    if any(stats.values()):
+        logger.info(f"Превью документов: {stats}")
+    return stats
+
+
+def wait_for_uploads(listen_conn, timeout: float):
+    """Ждет NOTIFY о новом файле документа не дольше timeout секунд"""
+    if select.select([listen_conn], [], [], timeout) == ([], [], []):
+        return
+    listen_conn.poll()
+    listen_conn.notifies.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Превью загруженных документов кандидатов")
+    parser.add_argument("--loop", action="store_true", help="ждать новые файлы и обрабатывать их по мере загрузки")
+    args = parser.parse_args()
+
+    listen_conn = None
+    if args.loop:
+        listen_conn = get_connection()
+        listen_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with listen_conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {PREVIEW_CHANNEL}")
+
+    pool = RendererPool(settings.preview.WORKERS)
+    try:
+        while True:
+            try:
+                # Полная пачка значит, что очередь не разобрана: берем следующую сразу
+                while True:
+                    stats = run_preview_batch(pool)
+                    if sum(stats.values()) - stats["retry"] < settings.preview.BATCH_SIZE:
+                        break
+            except Exception as e:
+                logger.error(f"Ошибка построения превью: {e}")
+            if not args.loop:
+                break
+            wait_for_uploads(listen_conn, settings.preview.INTERVAL_SECONDS)
+    finally:
+        pool.shutdown()
@@ -1,5 +1,6 @@
 import io
 import smtplib
+from core.metrics import track
 import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -10,28 +11,36 @@ from typing import Optional
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def build_email(to_email: str, subject: str, message: str, is_html: bool = False) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = settings.email_settings.EMAIL_LOGIN
+    msg["To"] = to_email
+    msg["Subject"] = subject
+
+    if is_html:
+        msg.attach(MIMEText(message, "html"))
+    else:
+        msg.attach(MIMEText(message, "plain"))
+    return msg
+
+def open_smtp_session() -> smtplib.SMTP:
+    server = smtplib.SMTP(settings.email_settings.EMAIL_SERVER, settings.email_settings.EMAIL_PORT)
+    try:
+        server.starttls()
+        server.login(
+            settings.email_settings.EMAIL_LOGIN,
+            settings.email_settings.EMAIL_PASSWORD,
+        )
+    except Exception:
+        server.close()
+        raise
+    return server
+
 def send_email(to_email: str, subject: str, message: str, is_html: bool = False):
     """Базовая функция отправки email"""
     try:
-        msg = MIMEMultipart()
-        msg["From"] = settings.email_settings.EMAIL_LOGIN
-        msg["To"] = to_email
-        msg["Subject"] = subject
-
-        if is_html:
-            msg.attach(MIMEText(message, "html"))
-        else:
-            msg.attach(MIMEText(message, "plain"))
-
-        with smtplib.SMTP(
-            settings.email_settings.EMAIL_SERVER, 
-            settings.email_settings.EMAIL_PORT
-        ) as server:
-            server.starttls()
-            server.login(
-                settings.email_settings.EMAIL_LOGIN,
-                settings.email_settings.EMAIL_PASSWORD,
-            )
+        msg = build_email(to_email, subject, message, is_html)
+        with track("smtp", "send_message"), open_smtp_session() as server:
             server.send_message(msg)
 
         logger.info(f"Email отправлен на {to_email} с темой '{subject}'")
@@ -40,8 +49,33 @@ def send_email(to_email: str, subject: str, message: str, is_html: bool = False)
         logger.error(f"Ошибка отправки email: {str(e)}")
         return False
 
+def send_emails(messages: list) -> list:
+    """
+    Отправляет пачку писем [(email, тема, текст, is_html), ...] в одной SMTP-сессии:
+    вместо подключения, STARTTLS и логина на каждое письмо - одно на пачку.
+    :return: список успехов в порядке писем
+    """
+    results = [False] * len(messages)
+    try:
+        with track("smtp", "send_batch"), open_smtp_session() as server:
+            for index, (to_email, subject, message, is_html) in enumerate(messages):
+                try:
+                    server.send_message(build_email(to_email, subject, message, is_html))
+                    results[index] = True
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Плохой адрес не должен обрывать отправку остальным
+                    logger.error(f"Email на {to_email} не принят сервером: {e}")
+    except Exception as e:
+        logger.error(f"Ошибка отправки пачки email: {str(e)}")
+    logger.info(f"Отправлено писем: {sum(results)} из {len(messages)}")
+    return results
+
 def send_invitation_email(email: str, invitation_code: str):
     """Отправляет email с кодом приглашения"""
+    return send_email(email, *invitation_email(invitation_code), is_html=True)
+
+def invitation_email(invitation_code: str) -> tuple:
+    """Тема и HTML письма с кодом приглашения"""
     subject = "Ваш код доступа к системе"
     html = f"""
     <html>
@@ -87,7 +121,7 @@ def send_invitation_email(email: str, invitation_code: str):
         </body>
     </html>
     """
-    return send_email(email, subject, html, is_html=True)
+    return subject, html
 
 def send_status_email(email: str, first_name: str, last_name: str, status: str, status_description: str):
     """Отправляет email об изменении статуса кандидата"""
@@ -133,7 +167,8 @@ def send_telegram_notification(chat_id: str, message: str):
             "parse_mode": "HTML"
         }
 
-        response = requests.post(url, json=payload)
+        with track("telegram", "SendMessage"):
+            response = requests.post(url, json=payload)
         response.raise_for_status()
 
         logger.info(f"Telegram уведомление отправлено в чат {chat_id}")
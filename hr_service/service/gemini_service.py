@@ -1,29 +1,269 @@
-from core.config import EXPERT_PROMPT, GEMINI_API_KEY
+from core.config import EXPERT_PROMPT, GEMINI_API_KEY, settings
+from core.metrics import track
+import hashlib
 import logging
-import google.generativeai as genai
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from utils.ttl_cache import TTLCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-2.0-flash-exp")
+CHAT_MODEL = "gemini-2.0-flash-exp"
+ANALYSIS_MODEL = "gemini-1.5-flash"
 
+# ключ промпта -> текст ответа
+response_cache = TTLCache(maxsize=settings.gemini.GEMINI_CACHE_SIZE, ttl=settings.gemini.GEMINI_CACHE_TTL)
+# ключ промпта -> Future запроса, который уже выполняется
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_models = {}
+_models_lock = threading.Lock()
 
-def generate_expert_response(prompt: str, chat_history: list) -> str:
+
+@dataclass
+class StubResponse:
+    text: str
+
+
+class StubModel:
     """
-    Генерирует экспертный ответ на основе истории чата
+    Локальная замена genai.GenerativeModel: детерминированный ответ без обращения к API.
+    Считает вызовы, чтобы в тестах можно было проверить работу кэша.
     """
+
+    def __init__(self, model_name: str = "stub"):
+        self.model_name = model_name
+        self.calls = 0
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        text = f"[{self.model_name}] Ответ на промпт {digest}"
+        if stream:
+            return iter(StubResponse(text=f"{word} ") for word in text.split())
+        return StubResponse(text=text)
+
+
+def get_model(model_name: str):
+    """Модель Gemini (или заглушка при GEMINI_BACKEND=stub), создается один раз на процесс"""
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            if settings.gemini.GEMINI_BACKEND == "stub":
+                model = StubModel(model_name)
+            else:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                model = genai.GenerativeModel(model_name)
+            _models[model_name] = model
+        return model
+
+
+def set_model(model_name: str, model):
+    """Подменяет модель (например, на StubModel в тестах) и сбрасывает кэш ответов"""
+    with _models_lock:
+        _models[model_name] = model
+    response_cache.clear()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Убирает отступы, лишние пробелы и пустые строки, не влияющие на смысл промпта"""
+    lines = (" ".join(line.split()) for line in prompt.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+def generate_content_cached(prompt: str, model_name: str = CHAT_MODEL) -> str:
+    """
+    Текст ответа модели на промпт с кэшированием.
+
+    Одинаковые (после нормализации) промпты берутся из кэша, а одновременные
+    одинаковые запросы разных пользователей ждут один общий вызов API.
+    Ошибки не кэшируются и передаются всем ожидающим.
+    """
+    key = prompt_key(model_name, prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _inflight_lock:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+        future = _inflight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[key] = future
+
+    if not is_owner:
+        logger.info(f"Ожидаем уже выполняющийся запрос к {model_name}")
+        return future.result(timeout=settings.gemini.GEMINI_TIMEOUT)
+
     try:
-        # Формируем контекст из истории сообщений
-        context = EXPERT_PROMPT + "\n\nКонтекст беседы:\n"
-        for msg in chat_history[-5:]:  # Берем последние 5 сообщений для контекста
-            role = "HR" if msg[2] else "Кандидат"
-            context += f"{role}: {msg[0]}\n"
+        with track("gemini", model_name):
+            text = get_model(model_name).generate_content(prompt).text
+        response_cache.set(key, text)
+        future.set_result(text)
+        return text
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
 
-        full_prompt = f"{context}\nЭкспертный ответ HR на последнее сообщение кандидата:\n{prompt}"
+class StreamingResponseJob:
+    """
+    Потоковая генерация ответа в фоновом потоке.
 
-        response = model.generate_content(full_prompt)
-        return response.text
+    Скрипт Streamlit не ждет полного ответа: он читает уже полученные части через
+    iter_text(), а задачу можно отменить или прервать по бюджету времени.
+    Полный ответ попадает в общий кэш ответов.
+    """
+
+    def __init__(self, prompt: str, model_name: str = CHAT_MODEL, timeout: float | None = None):
+        self.prompt = prompt
+        self.model_name = model_name
+        self.timeout = timeout or settings.gemini.GEMINI_STREAM_TIMEOUT
+        self.status = "pending"  # running / done / cancelled / timeout / error
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.first_token_at: float | None = None
+        self.finished_at: float | None = None
+        self._chunks: list[str] = []
+        self._cancelled = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="gemini-stream", daemon=True)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    @property
+    def is_running(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def start(self) -> "StreamingResponseJob":
+        self.started_at = time.monotonic()
+        self.status = "running"
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _append(self, text: str):
+        with self._changed:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(text)
+            self._changed.notify_all()
+
+    def _finish(self, status: str):
+        with self._changed:
+            if not self.is_running:
+                return
+            self.status = status
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+        logger.info(f"Генерация {self.model_name}: {status}, {self.metrics()}")
+
+    def _run(self):
+        key = prompt_key(self.model_name, self.prompt)
+        try:
+            cached = response_cache.get(key)
+            if cached is not None:
+                self._append(cached)
+                self._finish("done")
+                return
+
+            deadline = self.started_at + self.timeout
+            with track("gemini", f"{self.model_name}:stream"):
+                response = get_model(self.model_name).generate_content(
+                    self.prompt, stream=True, request_options={"timeout": self.timeout}
+                )
+                for chunk in response:
+                    if self._cancelled.is_set():
+                        self._finish("cancelled")
+                        return
+                    if time.monotonic() > deadline:
+                        self._finish("timeout")
+                        return
+                    self._append(chunk.text)
+
+            response_cache.set(key, self.text)
+            self._finish("done")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Ошибка потоковой генерации Gemini: {e}")
+            self._finish("error")
+
+    def iter_text(self, poll_interval: float = 0.1):
+        """Отдает текст по мере поступления (с начала), пока задача не завершится"""
+        sent = 0
+        # Страховка на случай зависшего соединения: поток проверяет бюджет только между частями
+        give_up_at = (self.started_at or time.monotonic()) + self.timeout + 5
+        while True:
+            with self._changed:
+                if len(self.text) == sent and self.is_running:
+                    self._changed.wait(poll_interval)
+                text = self.text
+                running = self.is_running
+            if len(text) > sent:
+                yield text[sent:]
+                sent = len(text)
+            if not running:
+                return
+            if time.monotonic() > give_up_at:
+                self.cancel()
+                self._finish("timeout")
+                return
+
+    def metrics(self) -> dict:
+        """Время до первой части ответа и полное время генерации, мс"""
+        def elapsed_ms(moment: float | None) -> float | None:
+            if moment is None or self.started_at is None:
+                return None
+            return round((moment - self.started_at) * 1000, 1)
+
+        return {
+            "status": self.status,
+            "time_to_first_token_ms": elapsed_ms(self.first_token_at),
+            "total_ms": elapsed_ms(self.finished_at),
+            "chars": len(self.text),
+        }
+
+
+def build_expert_prompt(prompt: str, chat_history: list) -> str:
+    # Формируем контекст из истории сообщений
+    context = EXPERT_PROMPT + "\n\nКонтекст беседы:\n"
+    for msg in chat_history[-5:]:  # Берем последние 5 сообщений для контекста
+        role = "HR" if msg[2] else "Кандидат"
+        context += f"{role}: {msg[0]}\n"
+
+    return f"{context}\nЭкспертный ответ HR на последнее сообщение кандидата:\n{prompt}"
+
+
+def generate_expert_response(prompt: str, chat_history: list) -> str:
+    """
+    Генерирует экспертный ответ на основе истории чата
+    """
+    try:
+        return generate_content_cached(build_expert_prompt(prompt, chat_history), CHAT_MODEL)
     except Exception as e:
         logger.error(f"Ошибка генерации ответа Gemini: {e}")
         return "Извините, возникла ошибка при генерации ответа."
+
+
+def start_expert_response_stream(prompt: str, chat_history: list) -> StreamingResponseJob:
+    """Запускает потоковую генерацию экспертного ответа в фоне"""
+    return StreamingResponseJob(build_expert_prompt(prompt, chat_history), CHAT_MODEL).start()
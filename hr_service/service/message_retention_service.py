@@ -0,0 +1,274 @@
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import fs
+from psycopg2 import sql
+
+from core.config import settings
+from core.metrics import track
+from repository.database import ensure_bucket, get_connection, get_minio_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы задача не запускалась параллельно в нескольких процессах
+RETENTION_LOCK_NAME = "comm.message_retention"
+# Имена партиций задает comm.create_message_partitions (миграция 0005)
+PARTITION_NAME = re.compile(r"^message_y(\d{4})m(\d{2})$")
+MESSAGE_COLUMNS = ["message_id", "chat_id", "content", "sender_type", "sent_at", "is_from_admin"]
+ARCHIVE_SCHEMA = pa.schema([
+    ("message_id", pa.int64()),
+    ("chat_id", pa.int64()),
+    ("content", pa.string()),
+    ("sender_type", pa.string()),
+    ("sent_at", pa.timestamp("us")),
+    ("is_from_admin", pa.bool_()),
+])
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(today: Optional[date] = None) -> int:
+    """Создает партиции с текущего месяца на PARTITIONS_AHEAD_MONTHS вперед, возвращает число новых"""
+    month = (today or date.today()).replace(day=1)
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT comm.create_message_partitions(%s, %s)",
+                (month, add_months(month, settings.message_retention.PARTITIONS_AHEAD_MONTHS)),
+            )
+            created = cursor.fetchone()[0]
+        conn.commit()
+    if created:
+        logger.info(f"Создано партиций comm.message: {created}")
+    return created
+
+
+def list_partitions() -> list[tuple[str, date]]:
+    """Партиции comm.message и первый день месяца каждой, по возрастанию"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'comm.message'::regclass
+            """)
+            names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match is None:
+            logger.warning(f"Партиция comm.{name} создана не по схеме имен, задача хранения ее пропускает")
+            continue
+        partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def archive_key(partition_name: str, month: date) -> str:
+    return f"messages/{month:%Y}/{partition_name}.parquet"
+
+
+def export_partition(conn, partition_name: str, path: str) -> int:
+    """
+    Выгружает партицию в Parquet (zstd) пачками через именованный курсор в текущей
+    транзакции. Строки отсортированы по чату, поэтому статистика групп строк
+    позволяет при аудите читать только группы с нужным chat_id
+    """
+    batch_size = settings.message_retention.BATCH_SIZE
+    rows_written = 0
+    with pq.ParquetWriter(path, ARCHIVE_SCHEMA, compression="zstd") as writer:
+        with conn.cursor(name=f"export_{partition_name}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(
+                sql.SQL("SELECT {} FROM comm.{} ORDER BY chat_id, sent_at").format(
+                    sql.SQL(", ").join(map(sql.Identifier, MESSAGE_COLUMNS)),
+                    sql.Identifier(partition_name),
+                )
+            )
+            while rows := cursor.fetchmany(batch_size):
+                columns = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=column.type) for values, column in zip(columns, ARCHIVE_SCHEMA)],
+                    schema=ARCHIVE_SCHEMA,
+                ))
+                rows_written += len(rows)
+    return rows_written
+
+
+def archive_partition(partition_name: str, month: date) -> bool:
+    """
+    Выгружает партицию в MinIO, записывает ее в каталог comm.message_archive,
+    отсоединяет и удаляет - все в одной транзакции. Партиция с начала выгрузки
+    заблокирована в SHARE MODE: изменить или удалить строки, пока файл пишется,
+    нельзя, поэтому удаляется ровно то, что попало в архив. Если блокировку не
+    удалось взять за LOCK_TIMEOUT или загрузка упала, транзакция откатывается,
+    партиция остается на месте, а файл в MinIO перезапишется при следующем запуске
+    """
+    bucket = settings.message_retention.ARCHIVE_BUCKET
+    key = archive_key(partition_name, month)
+    minio_client = get_minio_client()
+    ensure_bucket(minio_client, bucket)
+
+    conn = get_connection()
+    handle, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(handle)
+    try:
+        with conn.cursor() as cursor:
+            # Блокировки партиции и comm.message (для DETACH) не ждем дольше LOCK_TIMEOUT,
+            # чтобы не останавливать запись сообщений ботом
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", (settings.message_retention.LOCK_TIMEOUT,))
+            cursor.execute(sql.SQL("LOCK TABLE comm.{} IN SHARE MODE").format(sql.Identifier(partition_name)))
+
+        rows = export_partition(conn, partition_name, path)
+        size = os.path.getsize(path)
+        minio_client.fput_object(bucket, key, path, content_type="application/vnd.apache.parquet")
+
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("ALTER TABLE comm.message DETACH PARTITION comm.{}").format(
+                sql.Identifier(partition_name)
+            ))
+            cursor.execute("""
+                INSERT INTO comm.message_archive
+                    (partition_name, range_start, range_end, s3_bucket, s3_key, row_count, size_bytes)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (partition_name) DO UPDATE SET
+                    s3_bucket = EXCLUDED.s3_bucket,
+                    s3_key = EXCLUDED.s3_key,
+                    row_count = EXCLUDED.row_count,
+                    size_bytes = EXCLUDED.size_bytes,
+                    archived_at = now()
+            """, (partition_name, month, add_months(month, 1), bucket, key, rows, size))
+            cursor.execute(sql.SQL("DROP TABLE comm.{}").format(sql.Identifier(partition_name)))
+        conn.commit()
+        logger.info(f"Партиция comm.{partition_name} выгружена в {bucket}/{key}: {rows} строк, {size} байт")
+        return True
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Ошибка выгрузки партиции comm.{partition_name}: {e}")
+        return False
+    finally:
+        conn.close()
+        os.remove(path)
+
+
+def run_retention(today: Optional[date] = None) -> dict:
+    """Создает партиции вперед и выгружает в архив партиции старше RETENTION_MONTHS"""
+    stats = {"created": 0, "archived": 0, "failed": 0}
+    today = today or date.today()
+
+    lock_conn = get_connection()
+    try:
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (RETENTION_LOCK_NAME,))
+            if not cursor.fetchone()[0]:
+                logger.info("Задача хранения сообщений уже выполняется")
+                return stats
+
+        stats["created"] = ensure_partitions(today)
+        cutoff = add_months(today.replace(day=1), -settings.message_retention.RETENTION_MONTHS)
+        for partition_name, month in list_partitions():
+            if add_months(month, 1) > cutoff:
+                break
+            stats["archived" if archive_partition(partition_name, month) else "failed"] += 1
+    finally:
+        lock_conn.close()  # advisory lock снимается вместе с сессией
+
+    logger.info(f"Хранение сообщений: {stats}")
+    return stats
+
+
+def archive_filesystem() -> fs.S3FileSystem:
+    """MinIO как файловая система pyarrow: Parquet читается запросами по диапазонам байт"""
+    return fs.S3FileSystem(
+        access_key='minioadmin',
+        secret_key='minioadmin',
+        endpoint_override=settings.minio.MINIO_ENDPOINT,
+        scheme="http",
+        region="us-east-1",
+    )
+
+
+def read_archived_messages(chat_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Сообщения чата из выгруженных в Parquet партиций за период [start, end).
+    Файл не скачивается целиком: pyarrow читает footer, по статистике отбрасывает
+    группы строк без нужного chat_id и запрашивает из MinIO только остальные
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT s3_bucket, s3_key
+                FROM comm.message_archive
+                WHERE (%(start)s::timestamp IS NULL OR range_end > %(start)s)
+                  AND (%(end)s::timestamp IS NULL OR range_start < %(end)s)
+                ORDER BY range_start
+            """, {"start": start, "end": end})
+            files = cursor.fetchall()
+
+    filesystem = archive_filesystem() if files else None
+    frames = []
+    for bucket, key in files:
+        with track("minio", "read_archive"):
+            table = pq.read_table(f"{bucket}/{key}", filesystem=filesystem, filters=[("chat_id", "=", chat_id)])
+        frames.append(table.to_pandas())
+
+    messages = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=MESSAGE_COLUMNS)
+    if start is not None:
+        messages = messages[messages["sent_at"] >= start]
+    if end is not None:
+        messages = messages[messages["sent_at"] < end]
+    return messages
+
+
+def get_chat_history_for_audit(chat_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+    """Полная история чата для аудита: архив из MinIO и партиции, которые еще в Postgres"""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(MESSAGE_COLUMNS)}
+                FROM comm.message
+                WHERE chat_id = %(chat_id)s
+                  AND (%(start)s::timestamp IS NULL OR sent_at >= %(start)s)
+                  AND (%(end)s::timestamp IS NULL OR sent_at < %(end)s)
+            """, {"chat_id": chat_id, "start": start, "end": end})
+            live = pd.DataFrame(cursor.fetchall(), columns=MESSAGE_COLUMNS)
+
+    frames = [frame for frame in (read_archived_messages(chat_id, start, end), live) if not frame.empty]
+    if not frames:
+        return live
+    return pd.concat(frames, ignore_index=True).sort_values("sent_at", ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Партиции comm.message и выгрузка старых сообщений в архив")
+    parser.add_argument("--loop", action="store_true", help="повторять каждые MESSAGE_RETENTION_INTERVAL_SECONDS")
+    parser.add_argument("--audit-chat", type=int, help="вывести в CSV всю историю чата, включая архив, и выйти")
+    args = parser.parse_args()
+
+    if args.audit_chat is not None:
+        get_chat_history_for_audit(args.audit_chat).to_csv(sys.stdout, index=False)
+        sys.exit(0)
+
+    while True:
+        try:
+            run_retention()
+        except Exception as e:
+            logger.error(f"Ошибка задачи хранения сообщений: {e}")
+        if not args.loop:
+            break
+        time.sleep(settings.message_retention.INTERVAL_SECONDS)
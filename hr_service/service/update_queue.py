@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def get_update_chat_id(update: Update) -> int:
+    """Возвращает chat_id апдейта (или id пользователя, если чата нет)"""
+    try:
+        event = update.event
+    except Exception:
+        return 0
+
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, "from_user", None)
+    return user.id if user else 0
+
+
+class UpdateWorkerPool:
+    """
+    Пул воркеров для обработки апдейтов, полученных через вебхук.
+
+    Апдейты шардируются по chat_id: у каждого воркера своя ограниченная очередь,
+    поэтому апдейты одного чата обрабатываются строго по порядку, а разные чаты -
+    параллельно. Если очередь шарда заполнена дольше put_timeout, апдейт
+    отклоняется, и вебхук отвечает Telegram ошибкой, чтобы тот повторил доставку.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers: int, queue_size: int, put_timeout: float):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.put_timeout = put_timeout
+        shard_size = max(1, queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        self._tasks: list[asyncio.Task] = []
+
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_processing_seconds = 0.0
+
+    def _shard(self, update: Update) -> asyncio.Queue:
+        return self._queues[get_update_chat_id(update) % self.workers]
+
+    async def start(self):
+        """Запускает воркеры"""
+        for index, queue in enumerate(self._queues):
+            self._tasks.append(asyncio.create_task(self._worker(queue), name=f"update-worker-{index}"))
+        logger.info(f"Запущено воркеров обработки апдейтов: {self.workers}")
+
+    async def stop(self, drain_timeout: Optional[float] = 10.0):
+        """Дожидается обработки очереди и останавливает воркеры"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Очередь апдейтов не обработана до конца: {self.depth()} апдейтов")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(self, update: Update) -> bool:
+        """Ставит апдейт в очередь; False - очередь переполнена (backpressure)"""
+        queue = self._shard(update)
+        try:
+            await asyncio.wait_for(queue.put((time.monotonic(), update)), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"Очередь апдейтов переполнена, апдейт {update.update_id} отклонен")
+            return False
+
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, queue.qsize())
+        return True
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            enqueued_at, update = await queue.get()
+            started_at = time.monotonic()
+            self.total_wait_seconds += started_at - enqueued_at
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing update {update.update_id}: {e}")
+            finally:
+                self.total_processing_seconds += time.monotonic() - started_at
+                queue.task_done()
+
+    def depth(self) -> int:
+        """Текущее количество апдейтов в очередях"""
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> dict:
+        """Метрики очереди для мониторинга backpressure"""
+        done = self.processed + self.failed
+        return {
+            "workers": self.workers,
+            "depth": self.depth(),
+            "shard_depths": [q.qsize() for q in self._queues],
+            "shard_capacity": self._queues[0].maxsize,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / done * 1000, 2) if done else 0.0,
+            "avg_processing_ms": round(self.total_processing_seconds / done * 1000, 2) if done else 0.0,
+        }
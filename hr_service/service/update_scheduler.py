@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WAIT_SAMPLES = 1000
+
+
+class ChatUpdateScheduler(BaseEventIsolation):
+    """
+    Планировщик обработки апдейтов.
+
+    Подключается в Dispatcher как events_isolation: апдейты одного чата
+    обрабатываются строго по очереди (блокировка по ключу FSM берется до чтения
+    состояния, поэтому двойное нажатие кнопки не гоняется за статусом документа),
+    а разные чаты - параллельно, но не больше concurrency одновременно.
+
+    Блокировку по чату выполняет inner: SimpleEventIsolation в одном процессе или
+    RedisEventIsolation для нескольких реплик бота.
+    """
+
+    def __init__(self, inner: BaseEventIsolation, concurrency: int, wait_warning_seconds: float = 5.0):
+        self.inner = inner
+        self.concurrency = max(1, concurrency)
+        self.wait_warning_seconds = wait_warning_seconds
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._chat_depths: dict[int, int] = {}
+
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.max_chat_depth = 0
+        self.started = 0
+        self.processed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._wait_samples: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        chat_id = key.chat_id
+        chat_depth = self._chat_depths.get(chat_id, 0) + 1
+        self._chat_depths[chat_id] = chat_depth
+        self.max_chat_depth = max(self.max_chat_depth, chat_depth)
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        enqueued_at = time.monotonic()
+        started = False
+        try:
+            async with self.inner.lock(key):
+                async with self._semaphore:
+                    started = True
+                    self.waiting -= 1
+                    self._record_wait(chat_id, time.monotonic() - enqueued_at)
+                    self.running += 1
+                    try:
+                        yield
+                    finally:
+                        self.running -= 1
+                        self.processed += 1
+        finally:
+            if not started:
+                self.waiting -= 1
+            remaining = self._chat_depths.get(chat_id, 1) - 1
+            if remaining > 0:
+                self._chat_depths[chat_id] = remaining
+            else:
+                self._chat_depths.pop(chat_id, None)
+
+    def _record_wait(self, chat_id: int, wait_seconds: float):
+        self.started += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self._wait_samples.append(wait_seconds)
+        if wait_seconds > self.wait_warning_seconds:
+            logger.warning(f"Апдейт чата {chat_id} ждал обработки {wait_seconds:.2f} с")
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def stats(self) -> dict:
+        """Глубина очереди и время ожидания апдейтов"""
+        samples = sorted(self._wait_samples)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "active_chats": len(self._chat_depths),
+            "max_chat_depth": self.max_chat_depth,
+            "processed": self.processed,
+            "avg_wait_ms": round(self.total_wait_seconds / self.started * 1000, 2) if self.started else 0.0,
+            "p50_wait_ms": percentile(0.50),
+            "p95_wait_ms": percentile(0.95),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
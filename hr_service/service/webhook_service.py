@@ -0,0 +1,141 @@
+import asyncio
+import hmac
+import logging
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from core.config import settings
+from core.metrics import metrics_payload
+from repository.query_trace import explain_slowest, query_tracer
+from service.update_queue import UpdateWorkerPool
+from service.update_scheduler import ChatUpdateScheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# /queries: сколько запросов отдавать и для скольких выполнять EXPLAIN ANALYZE
+MAX_QUERIES_LIMIT = 100
+MAX_EXPLAIN_LIMIT = 5
+
+
+def is_admin_request(request: web.Request) -> bool:
+    """Запрос к служебному эндпоинту с верным токеном; без настроенного токена - никогда"""
+    token = settings.bot.ADMIN_TOKEN
+    if not token:
+        return False
+    authorization = request.headers.get("Authorization", "")
+    return hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+
+
+def query_int(request: web.Request, name: str, default: int, minimum: int, maximum: int) -> int:
+    """Целый параметр запроса, приведенный к [minimum, maximum]; ValueError, если это не число"""
+    raw = request.query.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"Параметр {name} должен быть целым числом")
+    return max(minimum, min(value, maximum))
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, pool: UpdateWorkerPool,
+                       scheduler: ChatUpdateScheduler) -> web.Application:
+    """Создает aiohttp-приложение, принимающее апдейты от Telegram"""
+
+    async def handle_update(request: web.Request) -> web.Response:
+        # Без секрета любой, кто достучался до порта, мог бы слать апдейты от имени кандидатов
+        expected = settings.bot.WEBHOOK_SECRET
+        secret = request.headers.get(SECRET_HEADER, "")
+        if not expected or not hmac.compare_digest(secret.encode(), expected.encode()):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except Exception as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return web.Response(status=400)
+
+        # Не-2xx ответ заставит Telegram повторить доставку позже
+        if not await pool.submit(update):
+            return web.Response(status=503)
+        return web.Response()
+
+    async def handle_stats(request: web.Request) -> web.Response:
+        if not is_admin_request(request):
+            return web.Response(status=401)
+        return web.json_response({"queue": pool.stats(), "scheduler": scheduler.stats()})
+
+    async def handle_queries(request: web.Request) -> web.Response:
+        # ?explain=N - дополнительно EXPLAIN (ANALYZE, BUFFERS) для N самых медленных запросов.
+        # Запросы выполняются на БД, поэтому доступ - только с токеном администратора
+        if not is_admin_request(request):
+            return web.Response(status=401)
+        if query_tracer is None:
+            return web.json_response({"error": "QUERY_TRACE выключен"}, status=404)
+        try:
+            limit = query_int(request, "limit", 20, 1, MAX_QUERIES_LIMIT)
+            explain_limit = query_int(request, "explain", 0, 0, MAX_EXPLAIN_LIMIT)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        result = {"queries": [stat.as_dict() for stat in query_tracer.top(limit)]}
+        if explain_limit:
+            plans = await asyncio.to_thread(explain_slowest, explain_limit)
+            result["explain"] = [{**stat.as_dict(), "plan": plan} for stat, plan in plans]
+        return web.json_response(result)
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        if not is_admin_request(request):
+            return web.Response(status=401)
+        payload, content_type = metrics_payload()
+        return web.Response(body=payload, headers={"Content-Type": content_type})
+
+    app = web.Application()
+    app.router.add_post(settings.bot.WEBHOOK_PATH, handle_update)
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/queries", handle_queries)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, scheduler: ChatUpdateScheduler):
+    """Запускает бота в режиме вебхука с пулом воркеров"""
+    if not settings.bot.WEBHOOK_BASE_URL:
+        raise RuntimeError("WEBHOOK_BASE_URL must be set for webhook mode")
+    if not settings.bot.WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set for webhook mode")
+
+    pool = UpdateWorkerPool(
+        dispatcher,
+        bot,
+        workers=settings.bot.UPDATE_WORKERS,
+        queue_size=settings.bot.UPDATE_QUEUE_SIZE,
+        put_timeout=settings.bot.UPDATE_QUEUE_PUT_TIMEOUT,
+    )
+    app = create_webhook_app(dispatcher, bot, pool, scheduler)
+    runner = web.AppRunner(app)
+
+    await dispatcher.emit_startup(bot=bot, **dispatcher.workflow_data)
+    await pool.start()
+    await runner.setup()
+    site = web.TCPSite(runner, settings.bot.WEBHOOK_HOST, settings.bot.WEBHOOK_PORT)
+    await site.start()
+
+    webhook_url = f"{settings.bot.WEBHOOK_BASE_URL.rstrip('/')}{settings.bot.WEBHOOK_PATH}"
+    await bot.set_webhook(
+        url=webhook_url,
+        secret_token=settings.bot.WEBHOOK_SECRET,
+        max_connections=settings.bot.WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info(f"Webhook установлен: {webhook_url}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await pool.stop()
+        await dispatcher.emit_shutdown(bot=bot, **dispatcher.workflow_data)
+        await bot.session.close()
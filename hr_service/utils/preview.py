@@ -0,0 +1,49 @@
+import io
+
+import fitz
+from PIL import Image, ImageOps
+
+
+class UnsupportedPreview(Exception):
+    """Для файла такого типа превью не строится"""
+
+
+def _to_jpeg(image: Image.Image, max_size: int, quality: int) -> bytes:
+    image.thumbnail((max_size, max_size))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def _pdf_first_page(data: bytes, max_size: int) -> Image.Image:
+    with fitz.open(stream=data, filetype="pdf") as document:
+        if document.page_count == 0:
+            raise UnsupportedPreview("PDF без страниц")
+        page = document[0]
+        # Растрируем сразу в нужном размере, а не в 72 dpi с последующим увеличением
+        zoom = max_size / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def _image(data: bytes, max_size: int) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    # Для JPEG декодер сразу уменьшает картинку в 2-8 раз: скан с телефона не
+    # разворачивается в память целиком
+    image.draft("RGB", (max_size, max_size))
+    return ImageOps.exif_transpose(image)
+
+
+def render_preview(data: bytes, content_type: str, max_size: int, quality: int) -> bytes:
+    """
+    JPEG-превью файла: первая страница PDF или уменьшенное изображение.
+    Выполняется в отдельном процессе, поэтому зависит только от байтов файла
+    """
+    content_type = (content_type or "").lower()
+    if "pdf" in content_type:
+        return _to_jpeg(_pdf_first_page(data, max_size), max_size, quality)
+    if content_type.startswith("image/"):
+        return _to_jpeg(_image(data, max_size), max_size, quality)
+    raise UnsupportedPreview(f"Превью не строится для {content_type or 'неизвестного типа'}")
@@ -0,0 +1,23 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Потокобезопасное ограничение частоты вызовов: не больше rate_per_minute в минуту,
+    вызовы равномерно разносятся во времени
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Блокирует поток до момента, когда вызов разрешен"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        if wait > 0:
+            time.sleep(wait)
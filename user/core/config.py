@@ -60,4 +60,3 @@ class Settings:
     gemini : GEMINI = field(default_factory=GEMINI)
 
 settings = Settings()
-print(settings.project_management_setting.DATABASE_URL)
@@ -1,8 +1,7 @@
 import logging
-from repository.database import get_connection, get_async_connection, get_minio_client
+from repository.database import get_connection, get_async_connection
 import pandas as pd 
 import datetime
-import io 
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -165,21 +164,8 @@ def add_candidate(first_name: str, last_name: str, email: str, sex: bool):
                 )
                 
                 candidate_uuid, invitation_code = cursor.fetchone()
-                
-                # Создание папки в MinIO
-                minio_client = get_minio_client()
-                bucket_name = "candidates"
-                folder_name = f"{candidate_uuid}/"
-                
-                if not minio_client.bucket_exists(bucket_name):
-                    minio_client.make_bucket(bucket_name)
-                
-                minio_client.put_object(
-                    bucket_name,
-                    folder_name,
-                    io.BytesIO(b""),
-                    0
-                )
+                # Папку в MinIO не создаем: префикс "{candidate_uuid}/" появляется
+                # с первым загруженным файлом
                 
                 connection.commit()
                 logger.info(f"Добавлен кандидат {candidate_uuid}")